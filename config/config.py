@@ -16,4 +16,91 @@ def cargar_configuracion():
 
         return config
     except Exception as e:
-        raise e
\ No newline at end of file
+        raise e
+
+def obtener_parametro(cfg, seccion, clave, defecto=None, tipo=str):
+    """
+    Obtiene un parámetro de la configuración convirtiéndolo al tipo indicado.
+
+    ConfigObj entrega todos los valores como texto; esta función centraliza la
+    conversión y retorna el valor por defecto si la sección o la clave no existen.
+
+    :param cfg: Configuración cargada (ConfigObj o dict).
+    :param seccion: Nombre de la sección del archivo INI.
+    :param clave: Nombre de la clave dentro de la sección.
+    :param defecto: Valor a retornar si la clave no existe.
+    :param tipo: Tipo destino (str, int, float, bool o list).
+    :return: El valor convertido o el valor por defecto.
+    """
+    try:
+        valor = cfg[seccion][clave]
+    except (KeyError, TypeError):
+        return defecto
+
+    if tipo is bool:
+        if isinstance(valor, bool):
+            return valor
+        return str(valor).strip().lower() in ("1", "true", "si", "sí", "yes", "on")
+    if tipo is list:
+        if isinstance(valor, (list, tuple)):
+            return [str(v).strip() for v in valor if str(v).strip()]
+        return [v.strip() for v in str(valor).split(",") if v.strip()]
+    try:
+        return tipo(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+
+# Par por defecto cuando la configuración no declara la sección [pares]
+PAR_PRINCIPAL = "USDPEN"
+
+# Claves de un par que sobrescriben la sección [valores]; el resto sobrescribe [fuentes_tc]
+CLAVES_VALORES_PAR = ("inicial", "final", "brecha", "decimales")
+
+
+def par_principal(cfg):
+    """Par cuyo tipo de cambio se publica en SuperAdmin y ModuloTC."""
+    return obtener_parametro(cfg, "pares", "principal", PAR_PRINCIPAL)
+
+
+def pares_activos(cfg):
+    """
+    Lista de pares a procesar (pares.activos). El par principal siempre se incluye primero.
+    """
+    principal = par_principal(cfg)
+    activos = obtener_parametro(cfg, "pares", "activos", [principal], list)
+    return [principal] + [par for par in activos if par != principal]
+
+
+def modo_por_pares(cfg):
+    """
+    True si los Bots 01 y 02 deben procesar los pares en lote: solo cuando pares.activos
+    tiene más de un par. Con un solo par se usa el flujo de fuentes_tc (secuencial o concurrente).
+    """
+    return "pares" in cfg and len(pares_activos(cfg)) > 1
+
+
+def cfg_para_par(cfg, par):
+    """
+    Construye una vista de la configuración para un par de monedas.
+
+    Las claves de la subsección [[par]] dentro de [pares] sobrescriben [valores]
+    (inicial, final, brecha, decimales) y [fuentes_tc] (url_bloomberg, url_xe_com, tc_minimo, ...).
+    La configuración original no se modifica.
+
+    :param cfg: Configuración cargada.
+    :param par: Código del par (ej. "EURPEN").
+    :return: dict con las secciones de cfg y las sobrescrituras del par.
+    """
+    try:
+        seccion_par = dict(cfg["pares"][par])
+    except (KeyError, TypeError):
+        seccion_par = {}
+
+    derivado = dict(cfg)
+    derivado["valores"] = dict(cfg.get("valores", {}))
+    derivado["fuentes_tc"] = dict(cfg.get("fuentes_tc", {}))
+    for clave, valor in seccion_par.items():
+        seccion = "valores" if clave in CLAVES_VALORES_PAR else "fuentes_tc"
+        derivado[seccion][clave] = valor
+    return derivado
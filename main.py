@@ -1,20 +1,35 @@
+import argparse
+import json
 import logging
+import sys
+import time
 import traceback
 import platform
 import os
-import psutil
-import variables_globales as vg
-from utilidades.limpieza import cerrarProcesos as Limpieza
-from modulos.bot_00_configuracion import bot_run as Bot_00_Configuracion
-from modulos.bot_01_tc_bloomberg import bot_run as Bot_01_Bloomberg
-from modulos.bot_02_calcular_tc import bot_run as Bot_02_CalcularTC
-from modulos.bot_03_super_admin import bot_run as Bot_03_SuperAdmin
-from modulos.bot_04_modulo_tc import bot_run as Bot_04_ModuloTC
-from modulos.bot_05_tc_sbs import bot_run as Bot_05_TC_SBS
-from modulos.bot_06_gescom_cargar_tc import bot_run as Bot_06_Gescom_Cargar_TC
-from utilidades.notificaiones_whook import WebhookNotifier
+from utilidades.contexto import ContextoEjecucion
+from utilidades.orquestador import ESTADO_FALLO, ESTADO_OK, ESTADO_PLAZO_AGOTADO, Etapa, FuncionDiferida, OrquestadorDAG
+from utilidades.plazo import iniciar_plazo
+from utilidades.trazas import Traza, iniciar_traza, ruta_traza, span
+from utilidades.worker import TrabajadorResidente, enviar_orden
+from config.config import cargar_configuracion, obtener_parametro
 from datetime import datetime
 
+# Los bots y sus dependencias (selenium, lxml, bs4, requests, psutil) se importan recién
+# al ejecutarse: --help, --simular y las órdenes al worker no cargan el árbol completo.
+# test/test_importtime.py verifica que siga siendo así.
+Limpieza = FuncionDiferida("utilidades.limpieza:cerrarProcesos")
+Bot_00_Configuracion = FuncionDiferida("modulos.bot_00_configuracion:bot_run")
+Bot_01_Bloomberg = FuncionDiferida("modulos.bot_01_tc_bloomberg:bot_run")
+Bot_02_CalcularTC = FuncionDiferida("modulos.bot_02_calcular_tc:bot_run")
+Bot_03_SuperAdmin = FuncionDiferida("modulos.bot_03_super_admin:bot_run")
+Bot_04_ModuloTC = FuncionDiferida("modulos.bot_04_modulo_tc:bot_run")
+Bot_05_TC_SBS = FuncionDiferida("modulos.bot_05_tc_sbs:bot_run")
+Bot_06_Gescom_Cargar_TC = FuncionDiferida("modulos.bot_06_gescom_cargar_tc:bot_run")
+WebhookNotifier = FuncionDiferida("utilidades.notificaiones_whook:WebhookNotifier")
+
+BOTS = (Bot_01_Bloomberg, Bot_02_CalcularTC, Bot_03_SuperAdmin, Bot_04_ModuloTC,
+        Bot_05_TC_SBS, Bot_06_Gescom_Cargar_TC, WebhookNotifier)
+
 
 logger = logging.getLogger("Main - Orquestador")
 
@@ -26,6 +41,8 @@ def obtener_info_sistema():
         dict: Información básica del sistema
     """
     try:
+        import psutil
+
         info = {
             "platform": platform.platform(),
             "python_version": platform.python_version(),
@@ -41,24 +58,118 @@ def obtener_info_sistema():
         return {"error": str(e)}
 
 
-def main():
-    inicio = datetime.now()
-    
-    # Limpieza de ambiente
-    lista_procesos = ["chrome.exe", "firefox.exe"]
-    Limpieza(lista_procesos)
+def construir_etapas(cfg, notificaion):
+    """
+    Declara los bots del pipeline con los datos que consumen y producen.
 
-    logger.info("==================== INICIO DE ORQUESTACIÓN ====================")
-    logger.info(f"Inicio de orquestación - {inicio.strftime('%Y-%m-%d %H:%M:%S')}")
+    Bot 05 (SBS) y Bot 06 (Gescom) forman una rama independiente de Bloomberg;
+    Bots 03 y 04 dependen únicamente de la validación del Bot 02.
+    """
+    def notificar_superadmin(contexto):
+        publicacion = contexto.get("publicacion_superadmin") or {}
+        accion = "ya estaba registrado" if publicacion.get("sin_cambios") else "se registró"
+        notificaion.send_notification(
+            f"Tipo de cambio PayPal {accion}. Brecha: {cfg['valores']['brecha']} - "
+            f"TC Bloomberg: {contexto.get('tipo_cambio_bloomberg')} - "
+            f"TC Venta: {contexto.get('tipo_cambio_venta')} - "
+            f"TC Compra: {contexto.get('tipo_cambio_compra')}"
+        )
+
+    def notificar_modulo_tc(contexto):
+        notificaion.send_notification(
+            "Se registró tipo de cambio ModuloTC\n"
+            f"TC Bloomberg: {contexto.get('tipo_cambio_bloomberg')}\n"
+            f"TC Compra: {contexto.get('tipo_cambio_modulo_compra')}\n"
+            f"TC Venta: {contexto.get('tipo_cambio_modulo_venta')}"
+        )
+
+    return [
+        Etapa("Bot 01 - Obtener TC bloomberg", Bot_01_Bloomberg,
+              salidas=("tipo_cambio_bloomberg", "tipos_cambio_pares")),
+        Etapa("Bot 02 - Calcular TC", Bot_02_CalcularTC,
+              entradas=("tipo_cambio_bloomberg", "tipos_cambio_pares"),
+              salidas=("tipo_cambio_compra", "tipo_cambio_venta", "tipos_cambio_calculados")),
+        Etapa("Bot 03 - Super Admin", Bot_03_SuperAdmin,
+              entradas=("tipo_cambio_compra", "tipo_cambio_venta"),
+              salidas=("publicacion_superadmin",),
+              al_completar=notificar_superadmin),
+        # Registra el TC Bloomberg, pero solo si el Bot 02 validó la banda de compra/venta
+        Etapa("Bot 04 - Registrar TC", Bot_04_ModuloTC,
+              entradas=("tipo_cambio_bloomberg", "tipo_cambio_compra", "tipo_cambio_venta"),
+              salidas=("tipo_cambio_modulo_compra", "tipo_cambio_modulo_venta"),
+              al_completar=notificar_modulo_tc),
+        Etapa("Bot 05 - Tipo cambio sbs", Bot_05_TC_SBS,
+              salidas=("tipo_cambio_sbs_compra", "tipo_cambio_sbs_venta")),
+        Etapa("Bot 06 - Gescom Cargar TC", Bot_06_Gescom_Cargar_TC,
+              entradas=("tipo_cambio_sbs_compra", "tipo_cambio_sbs_venta"),
+              salidas=("publicacion_gescom",)),
+    ]
 
-    # Recopilar información del sistema
-    info_sistema = obtener_info_sistema()
-    logger.info(f"Información del sistema: {info_sistema}")
-    cfg = Bot_00_Configuracion()
-    if not cfg:
-        logger.error("Error al cargar la configuración. Abortando proceso.")
-        vg.system_exception = True
-        return
+
+def parsear_argumentos(argv=None):
+    """
+    Interpreta los argumentos de línea de comandos del orquestador.
+    """
+    parser = argparse.ArgumentParser(description="Orquestador del proceso de tipo de cambio")
+    parser.add_argument(
+        "--sin-cache",
+        action="store_true",
+        help="Ignora la cache local de tipos de cambio y consulta siempre las fuentes",
+    )
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument(
+        "--simular",
+        action="store_true",
+        help="Valida la configuración y muestra el plan de etapas sin ejecutarlas (dry run)",
+    )
+    modo.add_argument(
+        "--worker",
+        action="store_true",
+        help="Inicia el worker residente que atiende ejecuciones por un socket Unix",
+    )
+    modo.add_argument(
+        "--disparar",
+        action="store_true",
+        help="Solicita una ejecución al worker residente y muestra el resultado",
+    )
+    modo.add_argument(
+        "--estado",
+        action="store_true",
+        help="Consulta el estado del worker residente",
+    )
+    modo.add_argument(
+        "--detener",
+        action="store_true",
+        help="Detiene el worker residente",
+    )
+    modo.add_argument(
+        "--cargar-gescom",
+        metavar="ARCHIVO",
+        default=None,
+        help="Carga en Gescom los tipos de cambio de un CSV (fecha,compra,venta) por lotes",
+    )
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Ruta del socket del worker (por defecto worker.socket en config.ini)",
+    )
+    return parser.parse_args(argv)
+
+
+def ejecutar_pipeline(cfg, sin_cache=False):
+    """
+    Ejecuta el grafo de bots con una configuración ya cargada.
+
+    Se usa tanto en la ejecución única (main) como en cada orden del worker residente.
+
+    :param cfg: Configuración cargada por el Bot 00.
+    :param sin_cache: Ignora la cache de tipos de cambio solo en esta ejecución.
+    :return: Tupla (resultados por etapa, contexto final) o (None, None) si hubo una excepción.
+    """
+    if sin_cache:
+        # Copia superficial: la configuración compartida del worker no se modifica
+        cfg = dict(cfg)
+        cfg["cache"] = dict(cfg.get("cache", {}), omitir="true")
 
     try:
         # Configuración del bot
@@ -72,64 +183,99 @@ def main():
         # Notificación de inicio
         #notificaion.send_notification("Inicio del proceso tipo de cambio PayPal")
 
-        # Ejecución de los bots
-        for bot_name, bot_function in [
-            ("Bot 01 - Obtener TC bloomberg", Bot_01_Bloomberg),   
-            ("Bot 02 - Calcular TC", Bot_02_CalcularTC),
-            ("Bot 03 - Super Admin", Bot_03_SuperAdmin),
-            ("Bot 04 - Registrar TC", Bot_04_ModuloTC),
-            ("Bot 05 - Tipo cambio sbs", Bot_05_TC_SBS),
-            ("Bot 06 - Gescom Cargar TC", Bot_06_Gescom_Cargar_TC),
-        ]:
-            logger.info(f"==================== INICIANDO {bot_name} ====================")
-            resultado, mensaje = bot_function(cfg)
-            
-            if resultado:
-                logger.info(f"{bot_name} completado exitosamente: {mensaje}")
-                if bot_name == "Bot 03 - Super Admin":
-                    notificaion.send_notification(
-                        f"Se registró tipo de cambio PayPal. Brecha: {cfg['valores']['brecha']} - "
-                        f"TC Bloomberg: {vg.tipo_cambio_bloomberg} - "
-                        f"TC Venta: {vg.tipo_cambio_venta} - "
-                        f"TC Compra: {vg.tipo_cambio_compra}"
-                    )  
-                if bot_name == "Bot 04 - Registrar TC":
-                    notificaion.send_notification(
-                        "Se registró tipo de cambio ModuloTC\n"
-                        f"TC Bloomberg: {vg.tipo_cambio_bloomberg}\n"
-                        f"TC Compra: {vg.tipo_cambio_compra}\n"
-                        f"TC Venta: {vg.tipo_cambio_venta}"
-                    )   
-            else:
-                logger.error(f"{bot_name} falló: {mensaje}")
-                # Si falla el Bot 01, saltamos los bots 02, 03 y 04
-                if bot_name == "Bot 01 - Obtener TC bloomberg":
-                    # Continuamos con el Bot 05
-                    continue_from_bot = "Bot 05 - Tipo cambio sbs"
-                    if bot_function.__name__ != continue_from_bot:
-                        if any(bot in bot_function.__name__ for bot in ["Bot 02", "Bot 03", "Bot 04"]):
-                            continue
-                else:
-                    return
+        # Ejecución de los bots según el grafo de dependencias
+        orquestador = OrquestadorDAG(
+            construir_etapas(cfg, notificaion),
+            max_workers=obtener_parametro(cfg, "orquestacion", "max_workers", 4, int),
+        )
+        from utilidades.httpclient import get_rate_limiter
+        from utilidades.metricas import DURACION_ETAPA, EJECUCIONES, ULTIMA_EJECUCION
+
+        limitador = get_rate_limiter()
+        limitador.reiniciar_estadisticas()
+        contexto = ContextoEjecucion()
+        logger.info(f"Identificador de ejecución: {contexto.id_ejecucion}")
+        traza = iniciar_traza(cfg, contexto.id_ejecucion)
+        tokens_traza = traza.activar() if traza is not None else None
+        try:
+            with span("pipeline", id_ejecucion=contexto.id_ejecucion):
+                resultados, contexto = orquestador.ejecutar(cfg, contexto, plazo=iniciar_plazo(cfg))
+        finally:
+            if traza is not None:
+                Traza.desactivar(tokens_traza)
+                try:
+                    logger.info(f"Trazas de la ejecución: {traza.guardar(ruta_traza(cfg, traza))}")
+                except OSError as e:
+                    logger.warning(f"No se pudieron guardar las trazas: {e}")
+        for resultado_etapa in resultados.values():
+            logger.info(
+                f"{resultado_etapa.nombre}: {resultado_etapa.estado} "
+                f"({resultado_etapa.duracion:.2f}s) - {resultado_etapa.mensaje}"
+            )
+            DURACION_ETAPA.observar(resultado_etapa.duracion, etapa=resultado_etapa.nombre, estado=resultado_etapa.estado)
+        EJECUCIONES.inc(resultado="ok" if all(r.estado == ESTADO_OK for r in resultados.values()) else "fallo")
+        ULTIMA_EJECUCION.fijar(time.time())
+        for host, estadistica in limitador.estadisticas().items():
+            logger.info(
+                f"Límite de tasa {host}: {estadistica['peticiones']} peticiones, "
+                f"{estadistica['esperas']} esperas, {estadistica['espera_total']:.2f}s en total"
+            )
         
+        agotadas = [r.nombre for r in resultados.values() if r.estado == ESTADO_PLAZO_AGOTADO]
+        if agotadas:
+            logger.error(f"El plazo de la ejecución se agotó en: {', '.join(agotadas)}")
+
         # Verificar si hay excepciones de negocio o sistema
-        if vg.business_exception:
+        fallidas = [r for r in resultados.values() if r.estado == ESTADO_FALLO]
+        if any(r.mensaje.startswith("Error de negocio") for r in fallidas):
             logger.info("Enviando Notificación por Error de Negocio...")
-            return
 
-        if vg.system_exception:
+        if any(r.mensaje.startswith("Error inesperado") for r in fallidas):
             logger.info("Enviando Notificación por Error de Sistema...")
-            return
+
+        return resultados, contexto
 
     except Exception as e:
-        logger.error(f"Error en main: {e}")
+        from utilidades.metricas import EJECUCIONES
+
+        EJECUCIONES.inc(resultado="error")
+        logger.error(f"Error en ejecutar_pipeline: {e}")
         logger.error(traceback.format_exc())
         notificaion = WebhookNotifier(cfg["webhooks"]["webhook_exception"])
         notificaion.send_notification(
             f"Error: {traceback.extract_tb(e.__traceback__)[-1].filename}: {str(e)}"
         )
+        return None, None
+
+
+def main(sin_cache=False):
+    inicio = datetime.now()
+    
+    # Limpieza de ambiente
+    lista_procesos = ["chrome.exe", "firefox.exe"]
+    Limpieza(lista_procesos)
+
+    logger.info("==================== INICIO DE ORQUESTACIÓN ====================")
+    logger.info(f"Inicio de orquestación - {inicio.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    # Recopilar información del sistema
+    info_sistema = obtener_info_sistema()
+    logger.info(f"Información del sistema: {info_sistema}")
+    cfg = Bot_00_Configuracion()
+    if not cfg:
+        logger.error("Error al cargar la configuración. Abortando proceso.")
+        return
+
+    try:
+        ejecutar_pipeline(cfg, sin_cache=sin_cache)
 
     finally:
+        from utilidades.metricas import escribir_metricas
+
+        # Ejecución única: las métricas quedan para el textfile collector de node_exporter
+        ruta_metricas = escribir_metricas(cfg)
+        if ruta_metricas:
+            logger.info(f"Métricas escritas en {ruta_metricas}")
         # Calcular tiempo total de ejecución
         fin = datetime.now()
         tiempo_total = fin - inicio
@@ -142,5 +288,143 @@ def main():
         logger.info("Fin del proceso ...")
 
 
+def resumir_ejecucion(resultados, contexto):
+    """Resumen serializable en JSON de una ejecución (respuesta del worker residente)."""
+    if resultados is None:
+        return {"id_ejecucion": None, "etapas": {}, "exito": False}
+    return {
+        "id_ejecucion": contexto.id_ejecucion,
+        "etapas": {
+            nombre: {"estado": r.estado, "mensaje": r.mensaje, "duracion": round(r.duracion, 3)}
+            for nombre, r in resultados.items()
+        },
+        "exito": all(r.estado == ESTADO_OK for r in resultados.values()),
+    }
+
+
+def ruta_socket_worker(cfg, ruta=None):
+    """Ruta del socket del worker: la indicada por línea de comandos o worker.socket."""
+    return ruta or obtener_parametro(cfg, "worker", "socket", os.path.join("cliente", "output", "tipo_cambio.sock"))
+
+
+def main_worker(ruta_socket=None):
+    """
+    Inicia el worker residente.
+
+    La limpieza de procesos, la carga de configuración y la creación del cliente HTTP se
+    hacen una sola vez; cada orden solo ejecuta el grafo de bots con el pool ya abierto.
+    """
+    Limpieza(["chrome.exe", "firefox.exe"])
+    logger.info(f"Información del sistema: {obtener_info_sistema()}")
+    estado = {"cfg": Bot_00_Configuracion()}
+    if not estado["cfg"]:
+        logger.error("Error al cargar la configuración. Abortando worker.")
+        return
+
+    # El worker sí paga las importaciones al arrancar, para que cada orden empiece en caliente
+    for bot in BOTS:
+        bot.cargar()
+
+    def ejecutar(orden):
+        inicio = time.monotonic()
+        logger.info("==================== INICIO DE ORQUESTACIÓN (worker) ====================")
+        resultados, contexto = ejecutar_pipeline(estado["cfg"], sin_cache=bool(orden.get("sin_cache")))
+        resumen = resumir_ejecucion(resultados, contexto)
+        resumen["duracion"] = round(time.monotonic() - inicio, 3)
+        logger.info(f"Tiempo total de ejecución: {resumen['duracion']}s")
+        return resumen
+
+    def recargar():
+        cfg = Bot_00_Configuracion()
+        if not cfg:
+            raise RuntimeError("No se pudo recargar la configuración")
+        estado["cfg"] = cfg
+        logger.info("Configuración recargada")
+
+    from utilidades.metricas import iniciar_servidor_metricas
+
+    servidor_metricas = iniciar_servidor_metricas(estado["cfg"])
+    try:
+        TrabajadorResidente(ruta_socket_worker(estado["cfg"], ruta_socket), ejecutar, recargar).iniciar()
+    finally:
+        if servidor_metricas is not None:
+            servidor_metricas.shutdown()
+
+
+def main_simulacion():
+    """
+    Dry run: valida la configuración y el grafo de etapas y muestra el plan sin ejecutarlo.
+
+    :return: Código de salida (0 si el grafo es válido).
+    """
+    cfg = cargar_configuracion()
+    try:
+        orquestador = OrquestadorDAG(
+            construir_etapas(cfg, None),
+            max_workers=obtener_parametro(cfg, "orquestacion", "max_workers", 4, int),
+        )
+    except ValueError as e:
+        print(f"Grafo de etapas inválido: {e}", file=sys.stderr)
+        return 1
+    print(f"Plan de ejecución (max_workers={orquestador.max_workers}):")
+    for etapa in orquestador.etapas:
+        dependencias = ", ".join(sorted(orquestador.dependencias[etapa.nombre])) or "-"
+        print(f"  {etapa.nombre}  <- {dependencias}")
+    return 0
+
+
+def main_cliente(comando, ruta_socket=None, sin_cache=False):
+    """
+    Envía una orden al worker residente e imprime la respuesta en JSON.
+
+    :return: Código de salida (0 si la orden y todas las etapas terminaron bien).
+    """
+    cfg = cargar_configuracion()
+    timeout = obtener_parametro(cfg, "worker", "timeout_cliente", None, float)
+    try:
+        respuesta = enviar_orden(ruta_socket_worker(cfg, ruta_socket),
+                                 {"comando": comando, "sin_cache": sin_cache}, timeout)
+    except OSError as e:
+        print(f"No se pudo contactar al worker: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(respuesta, indent=2, ensure_ascii=False))
+    return 0 if respuesta.get("ok") and respuesta.get("exito", True) else 1
+
+
+def main_carga_gescom(ruta_archivo):
+    """
+    Carga masiva en Gescom (ej. tras una caída) e imprime el resultado por registro en JSON.
+
+    :return: Código de salida (0 si todos los registros se cargaron).
+    """
+    from modulos.bot_06_gescom_cargar_tc import cargar_lote_gescom, leer_registros
+    from utilidades.excepciones import BusinessException
+
+    cfg = cargar_configuracion()
+    try:
+        registros = leer_registros(ruta_archivo)
+    except (OSError, BusinessException) as e:
+        print(f"No se pudo leer {ruta_archivo}: {e}", file=sys.stderr)
+        return 2
+    inicio = time.monotonic()
+    resultados = cargar_lote_gescom(cfg, registros)
+    exitosos = sum(item["ok"] for item in resultados)
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+    print(f"{exitosos}/{len(resultados)} tipos de cambio cargados en {time.monotonic() - inicio:.2f}s",
+          file=sys.stderr)
+    return 0 if exitosos == len(resultados) else 1
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parsear_argumentos()
+    if args.simular:
+        sys.exit(main_simulacion())
+    elif args.worker:
+        main_worker(args.socket)
+    elif args.disparar or args.estado or args.detener:
+        comando = "ejecutar" if args.disparar else "estado" if args.estado else "detener"
+        sys.exit(main_cliente(comando, args.socket, args.sin_cache))
+    elif args.cargar_gescom:
+        sys.exit(main_carga_gescom(args.cargar_gescom))
+    else:
+        main(sin_cache=args.sin_cache)
\ No newline at end of file
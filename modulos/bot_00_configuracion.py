@@ -1,6 +1,7 @@
 import logging
 from pathlib import Path
-from config.config import cargar_configuracion
+from config.config import cargar_configuracion, obtener_parametro
+from utilidades.httpclient import configurar_limite_tasa, get_http_client
 from utilidades.logger import init_logger
 from dotenv import load_dotenv
 import os
@@ -43,6 +44,13 @@ def bot_run():
         init_logger(nivel=logging.INFO)
         logger.info("Inicio del proceso ...")
 
+        # Límite de tasa por host compartido por los clientes HTTP
+        configurar_limite_tasa(cfg)
+
+        # Diagnóstico opcional de la IP de salida (cacheado, no bloquea las peticiones)
+        if obtener_parametro(cfg, "proxy", "diagnostico_ip", False, bool):
+            get_http_client().habilitar_diagnostico_ip(obtener_parametro(cfg, "proxy", "ip_ttl", 600.0, float))
+
         # Imprimir configuracion
         logger.info("Configuracion cargada")
         logger.info(f"Ruta de input: {cfg['rutas']['ruta_input']}")
@@ -1,51 +1,277 @@
 import logging
-from utilidades.excepciones import BusinessException
-import variables_globales as vg
+import re
 import subprocess
-from bs4 import BeautifulSoup
+import threading
+import time
+from functools import partial
+from urllib.parse import urlsplit
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from statistics import median
+from utilidades.excepciones import BusinessException
 from lxml import html
-from utilidades.httpclient import get_http_client
+from config.config import cfg_para_par, modo_por_pares, obtener_parametro, par_principal, pares_activos
+from utilidades.contexto import ContextoEtapa
+from utilidades.cache_tc import consultar_con_revalidacion, obtener_cache, obtener_cache_revalidacion, ttl_fuente
+from utilidades.circuito import obtener_circuito
+from utilidades.cobertura import GANADORES, RESPALDOS_LANZADOS, obtener_cobertura
+from utilidades.historico_tc import obtener_historico
+from utilidades.extraccion_streaming import ObjetivoStreaming, extraer_de_respuesta
+from utilidades.httpclient import PROXY_POR_DEFECTO, get_http_client
+from utilidades.metricas import DURACION_FUENTE, PARSEOS, RESPALDOS
+from utilidades.plazo import plazo_vencido, timeout_restante
+from utilidades.trazas import propagar, span, span_medido, traza_actual
 
 logger = logging.getLogger("Bot 01 - Tipo cambio bloomberg")
 
+# Rango por defecto en el que se considera válido un tipo de cambio extraído
+TC_MINIMO = 1.0
+TC_MAXIMO = 10.0
+
+
+# Headers de navegador que se envían a Bloomberg (tanto por curl como por HTTP en proceso)
+HEADERS_BLOOMBERG = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9,es;q=0.8',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0',
+}
+
+
+# Con trazas activas curl agrega al final de la salida sus tiempos por fase (segundos desde el inicio)
+MARCA_TIEMPOS_CURL = b"\n#tiempos_curl:"
+FORMATO_TIEMPOS_CURL = (MARCA_TIEMPOS_CURL.decode() + "%{time_namelookup} %{time_connect} %{time_appconnect} "
+                        "%{time_pretransfer} %{time_starttransfer} %{time_total} %{http_code}")
+
+
+def _registrar_tiempos_curl(stdout, inicio_ns):
+    """
+    Separa los tiempos que agregó curl (-w) y los registra como spans de cada fase.
+
+    :return: stdout sin la línea de tiempos.
+    """
+    contenido, marca, tiempos = stdout.rpartition(MARCA_TIEMPOS_CURL)
+    if not marca:
+        return stdout
+    try:
+        dns, conexion, tls, envio, primer_byte, total, codigo = tiempos.decode().split()
+        dns, conexion, tls, envio, primer_byte, total = (
+            inicio_ns + int(float(valor) * 1e9) for valor in (dns, conexion, tls, envio, primer_byte, total)
+        )
+    except ValueError:
+        return contenido
+    span_medido("http.dns", inicio_ns, dns)
+    span_medido("http.conexion", dns, conexion)
+    if tls > conexion:
+        span_medido("http.tls", conexion, tls)
+    span_medido("http.ttfb", envio, primer_byte)
+    span_medido("http.cuerpo", primer_byte, total, **{"http.response.status_code": int(codigo)})
+    return contenido
+
+
+def _descargar_bloomberg_curl(cfg, url, cancelacion=None):
+    """
+    Descarga la página de Bloomberg lanzando un proceso curl.
+
+    :return: Contenido HTML decodificado.
+    """
+    # curl interpreta 0 como "sin límite": un plazo casi agotado no debe redondear a 0.000
+    timeout_total = max(timeout_restante(obtener_parametro(cfg, "proxy", "timeout_total", 30, int)), 0.001)
+    timeout_conexion = min(obtener_parametro(cfg, "proxy", "timeout_conexion", 10, int), timeout_total)
+    curl_cmd = ['curl', '--proxy', url_proxy(cfg), '--compressed',
+                '--connect-timeout', f"{timeout_conexion:.3f}", '--max-time', f"{timeout_total:.3f}"]
+    for nombre, valor in HEADERS_BLOOMBERG.items():
+        curl_cmd += ['-H', f'{nombre}: {valor}']
+    trazando = traza_actual() is not None
+    if trazando:
+        curl_cmd += ['-w', FORMATO_TIEMPOS_CURL]
+    curl_cmd.append(url)
+
+    logger.info(f"Ejecutando comando curl: {' '.join(curl_cmd)}")
+
+    with span("curl GET", **{"url.full": url, "server.address": urlsplit(url).hostname or ""}) as span_curl:
+        inicio_ns = time.time_ns()
+        stdout = _ejecutar_curl(curl_cmd, cancelacion)
+        if trazando:
+            stdout = _registrar_tiempos_curl(stdout, inicio_ns)
+        span_curl.atributo("http.response.body.size", len(stdout))
+    return stdout.decode('utf-8')
+
+
+def _ejecutar_curl(curl_cmd, cancelacion=None):
+    """Ejecuta curl y retorna su salida estándar (bytes)."""
+    process = subprocess.Popen(curl_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    while True:
+        try:
+            stdout, stderr = process.communicate(timeout=0.25)
+            break
+        except subprocess.TimeoutExpired:
+            # Permite abortar la descarga si otra fuente ya entregó un valor válido
+            if cancelacion is not None and cancelacion.is_set():
+                process.kill()
+                process.communicate()
+                raise BusinessException("Consulta a Bloomberg cancelada")
+
+    if process.returncode != 0:
+        logger.error(f"Error al ejecutar curl: {stderr.decode()}")
+        raise BusinessException("Error al conectar con Bloomberg")
+    return stdout
+
+
+def _descargar_bloomberg_http(cfg, url, cancelacion=None):
+    """
+    Descarga la página de Bloomberg en el mismo proceso usando la sesión compartida
+    de AdvancedHTTPClient.
+
+    El pool de conexiones mantiene vivo el túnel CONNECT del proxy y la sesión TLS,
+    por lo que un reintento cuesta una sola petición y no un proceso nuevo más handshakes.
+
+    :param cancelacion: threading.Event opcional; si se activa se deja de descargar.
+
+    :return: Contenido HTML decodificado.
+    """
+    http_client = get_http_client()
+    proxy = url_proxy(cfg)
+    headers = dict(HEADERS_BLOOMBERG)
+    headers['Accept-Encoding'] = http_client.accept_encoding()
+
+    response = http_client.make_request(
+        url,
+        headers=headers,
+        proxies={'http': proxy, 'https': proxy},
+        timeout=obtener_parametro(cfg, "proxy", "timeout_conexion", 10, int),
+        timeout_total=obtener_parametro(cfg, "proxy", "timeout_total", 30, int),
+        cancelacion=cancelacion,
+    )
+    if response is None:
+        raise BusinessException("Error al conectar con Bloomberg")
+    return response.text
+
+
+def _es_precio_bloomberg(elemento):
+    """Nodo con el precio: //main//*[@data-component='sized-price']."""
+    return elemento.get('data-component') == 'sized-price' and next(elemento.iterancestors('main'), None) is not None
+
+
+def _texto(elemento):
+    """Texto completo de un elemento del parser incremental."""
+    return ''.join(elemento.itertext()).strip()
+
+
+OBJETIVO_BLOOMBERG = ObjetivoStreaming("Bloomberg", _es_precio_bloomberg, lambda elemento: _texto(elemento) or None)
+
+
+def _numero_inicial(texto):
+    """Extrae el número al inicio del texto de xe.com (ej. '3.7461 Peruvian Soles' -> '3.7461')."""
+    coincidencia = re.match(r'\s*([\d.,]+)', texto)
+    return coincidencia.group(1) if coincidencia else None
+
 
-def extrer_tipo_cambio_bloomberg(cfg):
+def _extraer_conversion_xe(elemento):
+    """Dentro del div de conversión, el segundo <p> contiene el valor seguido del nombre de la moneda."""
+    p_tags = elemento.findall('.//p')
+    if len(p_tags) >= 2:
+        return _numero_inicial(_texto(p_tags[1]))
+    return None
+
+
+OBJETIVO_XE = ObjetivoStreaming(
+    "xe.com",
+    lambda elemento: elemento.tag == 'div' and elemento.get('data-testid') == 'conversion',
+    _extraer_conversion_xe,
+)
+
+
+def _extraer_bloomberg_streaming(cfg, url, cancelacion=None):
+    """
+    Descarga la página de Bloomberg en streaming y extrae el precio de forma incremental.
+
+    :param cancelacion: threading.Event opcional; si se activa se deja de leer la respuesta.
+
+    :return: Texto del tipo de cambio o None si no se encontró.
+    """
+    http_client = get_http_client()
+    proxy = url_proxy(cfg)
+    headers = dict(HEADERS_BLOOMBERG)
+    headers['Accept-Encoding'] = http_client.accept_encoding()
+
+    response = http_client.make_request(
+        url,
+        headers=headers,
+        proxies={'http': proxy, 'https': proxy},
+        timeout=obtener_parametro(cfg, "proxy", "timeout_conexion", 10, int),
+        stream=True,
+        cancelacion=cancelacion,
+    )
+    if response is None:
+        raise BusinessException("Error al conectar con Bloomberg")
+    return extraer_de_respuesta(
+        response, OBJETIVO_BLOOMBERG, timeout_total=obtener_parametro(cfg, "proxy", "timeout_total", 30, int),
+        cancelacion=cancelacion,
+    )
+
+
+XPATH_BLOOMBERG = [
+    "//main//*[@data-component='sized-price']",
+]
+
+
+def parsear_bloomberg(content):
+    """
+    Extrae el precio de la página completa de Bloomberg con XPath (lxml).
+
+    :return: Texto del tipo de cambio o None si no se encontró.
+    """
+    try:
+        with span("parseo.lxml", objetivo="Bloomberg"):
+            tree = html.fromstring(content)
+            for selector in XPATH_BLOOMBERG:
+                with span("estrategia", selector=selector) as span_estrategia:
+                    for elemento in tree.xpath(selector):
+                        tipo_cambio = elemento.text_content().strip()
+                        logger.info(f"Tipo de cambio obtenido con XPath ({selector}): {tipo_cambio}")
+                        PARSEOS.inc(objetivo="Bloomberg", estrategia="xpath", resultado="ok")
+                        return tipo_cambio
+                    span_estrategia.error("Sin resultado")
+        PARSEOS.inc(objetivo="Bloomberg", estrategia="xpath", resultado="sin_valor")
+    except Exception as xpath_error:
+        logger.warning(f"Error al usar XPath: {xpath_error}")
+    return None
+
+
+def url_proxy(cfg):
+    """Obtiene la URL del proxy de salida configurado."""
+    return obtener_parametro(cfg, "proxy", "url_proxy", PROXY_POR_DEFECTO)
+
+
+def extrer_tipo_cambio_bloomberg(cfg, cancelacion=None):
     """
     Función para extraer el tipo de cambio de Bloomberg utilizando XPath y BeautifulSoup como fallback.
-    Utiliza el httpclient de utilidades para realizar la petición HTTP.
+    Utiliza el httpclient de utilidades para realizar la petición HTTP (modo_descarga_bloomberg = http)
+    o un proceso curl (modo_descarga_bloomberg = curl).
+
+    :param cancelacion: threading.Event opcional; si se activa se termina el proceso curl en curso
+        (o se deja de descargar la respuesta HTTP).
     """
     tipo_cambio = None
     try:
         url = cfg["fuentes_tc"]["url_bloomberg"]
-        
-        curl_cmd = [
-            'curl',
-            '--proxy',
-            'http://a3da2aa31a50a4775a4758b9a880c924-1dc7a13991739a83.elb.us-east-1.amazonaws.com:3128',
-            '-H', 'User-Agent: Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            '-H', 'Accept-Language: en-US,en;q=0.9,es;q=0.8',
-            '-H', 'DNT: 1',
-            '-H', 'Connection: keep-alive',
-            '-H', 'Upgrade-Insecure-Requests: 1',
-            '-H', 'Sec-Fetch-Dest: document',
-            '-H', 'Sec-Fetch-Mode: navigate', 
-            '-H', 'Sec-Fetch-Site: none',
-            '-H', 'Cache-Control: max-age=0',
-            url
-        ]
-
-        logger.info(f"Ejecutando comando curl: {' '.join(curl_cmd)}")
-
-        # Ejecutar curl y capturar la salida
-        process = subprocess.Popen(curl_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = process.communicate()
-        
-        if process.returncode == 0:
-            content = stdout.decode('utf-8')
+
+        modo_descarga = obtener_parametro(cfg, "fuentes_tc", "modo_descarga_bloomberg", "http")
+        if modo_descarga == "http" and obtener_parametro(cfg, "extraccion", "streaming", False, bool):
+            # Se deja de leer el socket apenas se cierra el nodo del precio
+            tipo_cambio = _extraer_bloomberg_streaming(cfg, url, cancelacion)
+            logger.info(f"Tipo de cambio obtenido en streaming: {tipo_cambio}")
+            return tipo_cambio
+        if modo_descarga == "http":
+            content = _descargar_bloomberg_http(cfg, url, cancelacion)
         else:
-            logger.error(f"Error al ejecutar curl: {stderr.decode()}")
-            raise BusinessException("Error al conectar con Bloomberg")
+            content = _descargar_bloomberg_curl(cfg, url, cancelacion)
 
         # Verificar que el contenido no esté corrupto o vacío
         if len(content) < 100:
@@ -63,22 +289,9 @@ def extrer_tipo_cambio_bloomberg(cfg):
             raise BusinessException("Contenido no válido recibido de Bloomberg")
 
         # Método 1: Usando XPath con lxml
-        try:
-            tree = html.fromstring(content)
-            xpath_selectors = [
-                "//main//*[@data-component='sized-price']",
-            ]
-            for selector in xpath_selectors:
-                elementos = tree.xpath(selector)
-                if elementos:
-                    for elemento in elementos:
-                        texto = elemento.text_content().strip()
-                        tipo_cambio = texto
-                        logger.info(f"Tipo de cambio obtenido con XPath ({selector}): {tipo_cambio}")
-                        return tipo_cambio
-        except Exception as xpath_error:
-            logger.warning(f"Error al usar XPath: {xpath_error}")
-            
+        tipo_cambio = parsear_bloomberg(content)
+        return tipo_cambio
+
     except BusinessException as be:
         logger.error(f"Error de negocio: {be}")
         raise
@@ -88,40 +301,66 @@ def extrer_tipo_cambio_bloomberg(cfg):
     finally:
         return tipo_cambio
 
-def extraer_tipo_cambio_xe(cfg):
+def _parsear_xe_streaming(response, cancelacion=None):
+    """Extrae el valor de xe.com leyendo la respuesta en streaming."""
+    return extraer_de_respuesta(response, OBJETIVO_XE, cancelacion=cancelacion)
+
+def _parsear_xe(response):
+    """Extrae el valor de xe.com de la página completa con BeautifulSoup."""
+    if response.status_code != 200:
+        logger.error(f"Error HTTP {response.status_code} al acceder a xe.com")
+        raise BusinessException(f"Error HTTP {response.status_code} al acceder a xe.com")
+
+    # bs4 solo se necesita sin streaming; se importa aquí para no cargarlo en cada arranque
+    from bs4 import BeautifulSoup
+
+    tipo_cambio = None
+    with span("parseo.bs4", objetivo="xe.com"):
+        soup = BeautifulSoup(response.text, "html.parser")
+        conversion_div = soup.find('div', {'data-testid': 'conversion'})
+
+    # Dentro de ese div, el segundo <p> contiene el valor, lo separamos del texto extra
+    if conversion_div:
+        p_tags = conversion_div.find_all('p')
+        if len(p_tags) >= 2:
+            raw_text = p_tags[1].text
+            # Limpiar: Extraemos solo el número antes del nombre de la moneda ("Peruvian Soles")
+            tipo_cambio = _numero_inicial(raw_text)
+            logger.info(f"Tipo de cambio xe.com: {tipo_cambio}")
+        else:
+            logger.warning("No se encontró el segundo <p> esperado.")
+    else:
+        logger.warning("No se encontró el valor, probablemente requiere JavaScript.")
+    PARSEOS.inc(objetivo="xe.com", estrategia="bs4", resultado="ok" if tipo_cambio else "sin_valor")
+    return tipo_cambio
+
+def extraer_tipo_cambio_xe(cfg, cancelacion=None):
     """
     Función para extraer el tipo de cambio de xe.com utilizando XPath y BeautifulSoup como fallback.
     Utiliza el httpclient de utilidades para realizar la petición HTTP.
+
+    :param cancelacion: threading.Event opcional; al activarse no se inicia la petición y se
+        deja de leer la respuesta.
     """
     tipo_cambio = None
     http_client = get_http_client()
     
     try:
         url = cfg["fuentes_tc"]["url_xe_com"]
-        response = http_client.make_request(url)
-        if response is None:
-            logger.error("No se pudo obtener respuesta de xe.com usando http_client")
-            raise BusinessException("No se pudo conectar con xe.com (http_client)")
-        
-        if response.status_code != 200:
-            logger.error(f"Error HTTP {response.status_code} al acceder a xe.com")
-            raise BusinessException(f"Error HTTP {response.status_code} al acceder a xe.com")
-        
-        soup = BeautifulSoup(response.text, "html.parser")
-        conversion_div = soup.find('div', {'data-testid': 'conversion'})
+        streaming = obtener_parametro(cfg, "extraccion", "streaming", False, bool)
 
-        # Dentro de ese div, el segundo <p> contiene el valor, lo separamos del texto extra
-        if conversion_div:
-            p_tags = conversion_div.find_all('p')
-            if len(p_tags) >= 2:
-                raw_text = p_tags[1].text
-                # Limpiar: Extraemos solo el número antes de "Peruvian Soles"
-                tipo_cambio = raw_text.split('Peruvian')[0].strip()
-                print(f"Tipo de cambio USD a PEN: {tipo_cambio}")
-            else:
-                print("No se encontró el segundo <p> esperado.")
-        else:
-            print("No se encontró el valor, probablemente requiere JavaScript.")
+        def peticion(cabeceras_condicionales):
+            response = http_client.make_request(url, stream=streaming, validadores=cabeceras_condicionales,
+                                                cancelacion=cancelacion)
+            if response is None:
+                logger.error("No se pudo obtener respuesta de xe.com usando http_client")
+                raise BusinessException("No se pudo conectar con xe.com (http_client)")
+            return response
+
+        # GET condicional: si la página no cambió (304) se reutiliza el último valor parseado
+        parsear = partial(_parsear_xe_streaming, cancelacion=cancelacion) if streaming else _parsear_xe
+        tipo_cambio = consultar_con_revalidacion(obtener_cache_revalidacion(cfg), url, peticion, parsear)
+        logger.info(f"Tipo de cambio USD a PEN obtenido de xe.com: {tipo_cambio}")
             
     except BusinessException as be:
         logger.error(f"Error de negocio: {be}")
@@ -130,53 +369,415 @@ def extraer_tipo_cambio_xe(cfg):
     finally:
         return tipo_cambio
 
-def limpiar_tipo_cambio(tipo_cambio_str):
+def limpiar_tipo_cambio(tipo_cambio_str, minimo=TC_MINIMO, maximo=TC_MAXIMO):
     """
     Limpia el string del tipo de cambio para convertirlo a un número flotante.
+
+    Solo se convierten los textos que pasan is_valid_exchange_rate; el resto retorna None.
     """
-    if not tipo_cambio_str:
+    if not is_valid_exchange_rate(tipo_cambio_str, minimo, maximo):
+        logger.error(f"No se pudo convertir '{tipo_cambio_str}' a un tipo de cambio válido")
         return None
-        
+    return float(re.search(r'\d[\d,]*\.\d+', tipo_cambio_str).group().replace(',', ''))
+
+def is_valid_exchange_rate(tipo_cambio_str, minimo=TC_MINIMO, maximo=TC_MAXIMO):
+    """
+    Valida que el texto extraído de una fuente contenga un tipo de cambio utilizable.
+
+    Se exige un número con punto decimal (ej. "3.45", "USD 3.45") dentro del rango
+    [minimo, maximo]. Textos corruptos, enteros sueltos o comas decimales se rechazan.
+    """
+    if not tipo_cambio_str or not isinstance(tipo_cambio_str, str):
+        return False
+
+    # Se admiten separadores de miles (ej. "1,234.56" para pares como USDCLP)
+    coincidencia = re.search(r'\d[\d,]*\.\d+', tipo_cambio_str)
+    if not coincidencia:
+        return False
+
+    valor = float(coincidencia.group().replace(',', ''))
+    return minimo <= valor <= maximo
+
+# Registro de fuentes disponibles para la consulta concurrente.
+# Para agregar una fuente basta con registrar una función (cfg, cancelacion) -> str | None.
+FUENTES_TC = {
+    "bloomberg": extrer_tipo_cambio_bloomberg,
+    "xe": extraer_tipo_cambio_xe,
+}
+
+def _medir_fuente(nombre, funcion, cfg, cancelacion=None, minimo=TC_MINIMO, maximo=TC_MAXIMO, circuito=None,
+                  sufijo="", cobertura=None):
+    """
+    Consulta una fuente una vez y registra su duración en tc_fuente_duracion_segundos.
+
+    Con circuito, el resultado se reporta al circuit breaker de la fuente: un valor válido
+    lo cierra, un fallo suma al umbral y una consulta cancelada no cuenta.
+
+    Con cobertura, la duración de un intento exitoso se agrega a la ventana de latencias
+    de la fuente (sin sumar reintentos ni esperas previas).
+
+    :param sufijo: Sufijo de la clave del circuito y de las latencias (":<par>" para pares
+        distintos al principal), igual que en la cache, para no mezclar pares.
+    """
+    inicio = time.monotonic()
+    resultado = "error"
     try:
-        # Elimina caracteres no numéricos excepto el punto decimal
-        import re
-        numero_limpio = re.sub(r'[^\d.]', '', tipo_cambio_str)
-        return float(numero_limpio)
-    except ValueError:
-        logger.error(f"No se pudo convertir '{tipo_cambio_str}' a un número")
+        tipo_cambio_str = funcion(cfg, cancelacion=cancelacion)
+        if is_valid_exchange_rate(tipo_cambio_str, minimo, maximo):
+            resultado = "ok"
+        elif (cancelacion is not None and cancelacion.is_set()) or plazo_vencido():
+            resultado = "cancelada"
+        else:
+            resultado = "sin_valor"
+        return tipo_cambio_str
+    finally:
+        duracion = time.monotonic() - inicio
+        DURACION_FUENTE.observar(duracion, fuente=nombre, resultado=resultado)
+        if cobertura is not None and resultado == "ok":
+            cobertura.registrar(f"{nombre}{sufijo}", duracion)
+        if circuito is not None:
+            if resultado == "ok":
+                circuito.registrar_exito(f"{nombre}{sufijo}")
+            elif resultado == "cancelada":
+                circuito.liberar(f"{nombre}{sufijo}")
+            else:
+                circuito.registrar_fallo(f"{nombre}{sufijo}")
+
+def _consultar_fuente(nombre, funcion, cfg, cancelacion, max_intentos, minimo, maximo, circuito=None, sufijo="",
+                      cobertura=None):
+    """
+    Ejecuta una fuente con reintentos hasta obtener un valor válido o ser cancelada.
+
+    Antes de cada intento se consulta el circuito de la fuente: si está abierto (o se abrió
+    con los fallos de esta misma consulta) no se reintenta.
+    """
+    for intento in range(1, max_intentos + 1):
+        if cancelacion.is_set():
+            return None
+        if circuito is not None and not circuito.permitir(f"{nombre}{sufijo}"):
+            return None
+        with span("fuente", fuente=nombre, intento=intento) as span_fuente:
+            tipo_cambio_str = _medir_fuente(nombre, funcion, cfg, cancelacion, minimo, maximo, circuito, sufijo,
+                                            cobertura)
+            if is_valid_exchange_rate(tipo_cambio_str, minimo, maximo):
+                return tipo_cambio_str
+            span_fuente.error("Sin valor válido")
+        logger.warning(f"Fuente {nombre}: intento {intento} de {max_intentos} sin valor válido ({tipo_cambio_str!r})")
+    return None
+
+def _candidatos_cobertura(cfg, funciones, cobertura):
+    """
+    Orden de lanzamiento con cobertura: la fuente principal, la principal por el proxy de
+    respaldo (si cobertura.proxy_respaldo está definido) y luego las demás fuentes.
+
+    :return: Lista de (etiqueta, fuente, funcion, cfg) donde etiqueta identifica la consulta
+        en logs, métricas y circuito, y fuente es la clave del valor entregado.
+    """
+    nombres = list(funciones)
+    principal = nombres[0]
+    candidatos = [(principal, principal, funciones[principal], cfg)]
+    if cobertura is not None and cobertura.proxy_respaldo:
+        cfg_proxy = dict(cfg)
+        cfg_proxy["proxy"] = {**cfg.get("proxy", {}), "url_proxy": cobertura.proxy_respaldo}
+        candidatos.append((f"{principal}@respaldo", principal, funciones[principal], cfg_proxy))
+    candidatos.extend((nombre, nombre, funciones[nombre], cfg) for nombre in nombres[1:])
+    return candidatos
+
+def obtener_tipo_cambio_concurrente(cfg, fuentes=None, quorum=None, timeout=None, sufijo=""):
+    """
+    Consulta todas las fuentes configuradas en paralelo y retorna el primer valor válido.
+
+    Con quorum > 1 se espera a que ese número de fuentes entreguen un valor válido y se
+    retorna la mediana. En cuanto se alcanza el quorum se cancelan las consultas pendientes,
+    por lo que el tiempo total es el de las fuentes más rápidas y no el de la más lenta.
+
+    Con cobertura (cobertura.habilitado y quorum = 1) solo se lanza la fuente principal; si
+    no responde dentro del retardo (percentil de sus latencias pasadas) o termina sin valor,
+    se lanza el siguiente respaldo. El primer valor válido gana y se cancela el resto.
+
+    :param cfg: Configuración cargada.
+    :param fuentes: Lista de nombres de fuentes (por defecto fuentes_tc.fuentes_activas).
+    :param quorum: Número de valores válidos requeridos (por defecto fuentes_tc.quorum).
+    :param timeout: Tiempo máximo de espera en segundos (por defecto fuentes_tc.timeout_concurrente).
+    :param sufijo: Sufijo de las claves del circuito y de las latencias (":<par>" para pares
+        distintos al principal).
+    :return: Tupla (tipo_cambio, {fuente: valor}) o (None, {...}) si no se alcanzó el quorum.
+    """
+    if fuentes is None:
+        fuentes = obtener_parametro(cfg, "fuentes_tc", "fuentes_activas", ["bloomberg", "xe"], list)
+    if quorum is None:
+        quorum = obtener_parametro(cfg, "fuentes_tc", "quorum", 1, int)
+    if timeout is None:
+        timeout = obtener_parametro(cfg, "fuentes_tc", "timeout_concurrente", 60.0, float)
+    timeout = timeout_restante(timeout)
+    max_intentos = obtener_parametro(cfg, "reintentos", "reintentos_max", 3, int)
+    minimo = obtener_parametro(cfg, "fuentes_tc", "tc_minimo", TC_MINIMO, float)
+    maximo = obtener_parametro(cfg, "fuentes_tc", "tc_maximo", TC_MAXIMO, float)
+    circuito = obtener_circuito(cfg)
+
+    funciones = {}
+    for nombre in fuentes:
+        if nombre in FUENTES_TC:
+            funciones[nombre] = FUENTES_TC[nombre]
+        else:
+            logger.warning(f"Fuente de tipo de cambio no registrada: {nombre}")
+    if not funciones:
+        raise BusinessException("No hay fuentes de tipo de cambio configuradas")
+
+    quorum = max(1, min(quorum, len(funciones)))
+    cobertura = obtener_cobertura(cfg) if quorum == 1 else None
+    candidatos = _candidatos_cobertura(cfg, funciones, cobertura)
+    principal = candidatos[0][0]
+    retardo = cobertura.retardo(f"{principal}{sufijo}") if cobertura is not None else 0.0
+    if cobertura is not None:
+        logger.info(f"Consultando {principal} con cobertura tras {retardo:.2f}s "
+                    f"(respaldos: {[etiqueta for etiqueta, *_ in candidatos[1:]]}, timeout={timeout}s)")
+    else:
+        logger.info(f"Consultando en paralelo {list(funciones)} (quorum={quorum}, timeout={timeout}s)")
+
+    cancelacion = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=len(candidatos), thread_name_prefix="fuente_tc")
+    pendientes = {}
+    inicios = {}
+    por_lanzar = list(candidatos)
+
+    def lanzar():
+        etiqueta, fuente, funcion, cfg_candidato = por_lanzar.pop(0)
+        futuro = executor.submit(propagar(_consultar_fuente), etiqueta, funcion, cfg_candidato, cancelacion,
+                                 max_intentos, minimo, maximo, circuito, sufijo, cobertura)
+        pendientes[futuro] = (etiqueta, fuente)
+        inicios[etiqueta] = time.monotonic()
+        return etiqueta
+
+    validos = {}
+    ganador = None
+    limite = time.monotonic() + timeout
+    try:
+        lanzar()
+        while cobertura is None and por_lanzar:
+            lanzar()
+        proximo = time.monotonic() + retardo
+        while (pendientes or por_lanzar) and len(validos) < quorum:
+            ahora = time.monotonic()
+            restante = limite - ahora
+            if restante <= 0:
+                logger.warning(f"Tiempo agotado esperando fuentes: {[e for e, _ in pendientes.values()]}")
+                break
+            # Con cobertura se lanza el siguiente respaldo al vencer el retardo o si no queda nada en curso
+            if por_lanzar and (not pendientes or ahora >= proximo):
+                etiqueta = lanzar()
+                RESPALDOS_LANZADOS.inc(principal=principal, respaldo=etiqueta)
+                logger.info(f"Cobertura: se lanza {etiqueta} tras {ahora - inicios[principal]:.2f}s sin valor de {principal}")
+                proximo = ahora + retardo
+                continue
+            espera = min(restante, proximo - ahora) if por_lanzar else restante
+            completados, _ = wait(pendientes, timeout=espera, return_when=FIRST_COMPLETED)
+            for futuro in completados:
+                etiqueta, nombre = pendientes.pop(futuro)
+                try:
+                    tipo_cambio_str = futuro.result()
+                except Exception as e:
+                    logger.warning(f"Fuente {etiqueta} falló: {e}")
+                    continue
+                if tipo_cambio_str:
+                    validos[nombre] = limpiar_tipo_cambio(tipo_cambio_str, minimo, maximo)
+                    ganador = ganador or etiqueta
+                    logger.info(f"Fuente {etiqueta} entregó valor válido: {validos[nombre]}")
+    finally:
+        cancelacion.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if len(validos) < quorum:
+        logger.error(f"No se alcanzó el quorum de {quorum} fuentes: {validos}")
+        return None, validos
+
+    if cobertura is not None:
+        GANADORES.inc(principal=principal, ganador=ganador)
+    if principal not in validos:
+        RESPALDOS.inc(principal=principal, respaldo=next(iter(validos)))
+    return median(validos.values()), validos
+
+def obtener_tipo_cambio_secuencial(cfg, sufijo=""):
+    """
+    Consulta Bloomberg con reintentos y, si no entrega un valor válido, xe.com como respaldo.
+
+    :param cfg: Configuración cargada (o la vista de un par).
+    :param sufijo: Sufijo de las claves del circuito (":<par>" para pares distintos al principal).
+    :return: Tupla (tipo_cambio, {fuente: valor}) o (None, {}) si ninguna fuente entregó un valor válido.
+    """
+    minimo = obtener_parametro(cfg, "fuentes_tc", "tc_minimo", TC_MINIMO, float)
+    maximo = obtener_parametro(cfg, "fuentes_tc", "tc_maximo", TC_MAXIMO, float)
+    circuito = obtener_circuito(cfg)
+
+    # Intentar obtener el tipo de cambio con reintentos
+    max_intentos = 3
+    intento = 1
+    tipo_cambio_str = None
+    fuente = "bloomberg"
+
+    while intento <= max_intentos and not is_valid_exchange_rate(tipo_cambio_str, minimo, maximo):
+        if circuito is not None and not circuito.permitir(f"bloomberg{sufijo}"):
+            break
+        logger.info(f"Intento {intento} de {max_intentos} para obtener tipo de cambio")
+        tipo_cambio_str = _medir_fuente("bloomberg", extrer_tipo_cambio_bloomberg, cfg, None, minimo, maximo,
+                                        circuito, sufijo)
+        if not is_valid_exchange_rate(tipo_cambio_str, minimo, maximo):
+            logger.warning(f"Intento {intento} fallido, reintentando...")
+            intento += 1
+
+    if not is_valid_exchange_rate(tipo_cambio_str, minimo, maximo) and (
+            circuito is None or circuito.permitir(f"xe{sufijo}")):
+        logger.error(f"No se pudo obtener el tipo de cambio de Bloomberg después de {intento - 1} intentos")
+        logger.info("Intentando obtener tipo de cambio desde xe.com...")
+        tipo_cambio_str = _medir_fuente("xe", extraer_tipo_cambio_xe, cfg, None, minimo, maximo, circuito, sufijo)
+        fuente = "xe"
+        if is_valid_exchange_rate(tipo_cambio_str, minimo, maximo):
+            RESPALDOS.inc(principal="bloomberg", respaldo="xe")
+
+    # Convertir a número (None si el texto no es un tipo de cambio válido)
+    tipo_cambio_num = limpiar_tipo_cambio(tipo_cambio_str, minimo, maximo) if tipo_cambio_str else None
+    if tipo_cambio_num is None:
+        return None, {}
+    return tipo_cambio_num, {fuente: tipo_cambio_num}
+
+def _leer_cache(cfg, cache, modo_concurrente, sufijo=""):
+    """
+    Busca en la cache valores vigentes de las fuentes configuradas.
+
+    Se respeta el mismo criterio que la consulta en red: el primer valor según el orden
+    de prioridad de las fuentes o, con quorum > 1, la mediana de los valores cacheados.
+
+    :param sufijo: Sufijo de la clave de cache (":<par>" para pares distintos al principal).
+    :return: Tipo de cambio o None si la cache no alcanza el quorum.
+    """
+    if modo_concurrente:
+        fuentes = obtener_parametro(cfg, "fuentes_tc", "fuentes_activas", ["bloomberg", "xe"], list)
+        quorum = max(1, obtener_parametro(cfg, "fuentes_tc", "quorum", 1, int))
+    else:
+        fuentes, quorum = ["bloomberg", "xe"], 1
+
+    cacheados = []
+    for fuente in fuentes:
+        valor = cache.obtener(f"{fuente}{sufijo}", ttl_fuente(cfg, fuente))
+        if valor is not None:
+            cacheados.append(valor)
+    if len(cacheados) < min(quorum, len(fuentes)):
         return None
+    return cacheados[0] if quorum == 1 else median(cacheados)
+
+def _registrar_historico(historico, par, valores):
+    """Guarda en el histórico el valor entregado por cada fuente consultada en la red."""
+    if historico is None:
+        return
+    for fuente, valor in valores.items():
+        historico.registrar(fuente, par, medio=valor)
+
+def _obtener_tipo_cambio_par(cfg_par, par, es_principal, cache, historico=None):
+    """
+    Obtiene el tipo de cambio de un par (cache primero, luego las fuentes en paralelo o, sin
+    fuentes_tc.modo_concurrente, la cadena Bloomberg -> xe.com).
+
+    El par principal usa las claves de cache sin sufijo para compartirlas con el modo de un solo par.
+    Solo los valores obtenidos de la red se agregan al histórico.
+    """
+    sufijo = "" if es_principal else f":{par}"
+    modo_concurrente = obtener_parametro(cfg_par, "fuentes_tc", "modo_concurrente", False, bool)
+    if cache is not None:
+        valor = _leer_cache(cfg_par, cache, modo_concurrente, sufijo)
+        if valor is not None:
+            logger.info(f"{par}: tipo de cambio obtenido de la cache: {valor}")
+            return valor
+
+    with span("par", par=par):
+        if modo_concurrente:
+            valor, valores = obtener_tipo_cambio_concurrente(cfg_par, sufijo=sufijo)
+        else:
+            valor, valores = obtener_tipo_cambio_secuencial(cfg_par, sufijo=sufijo)
+    if cache is not None:
+        for fuente, valor_fuente in valores.items():
+            cache.guardar(f"{fuente}{sufijo}", valor_fuente)
+    _registrar_historico(historico, par, valores)
+    logger.info(f"{par}: tipo de cambio {valor} (fuentes: {valores})")
+    return valor
+
+def obtener_tipos_cambio_pares(cfg, cache=None, historico=None):
+    """
+    Obtiene en paralelo el tipo de cambio de todos los pares activos.
+
+    Cada par consulta sus fuentes usando su vista de configuración (cfg_para_par), así que
+    agregar una moneda cuesta una consulta más en paralelo.
 
-def bot_run(cfg, mensaje="Bot 01 - Tipo cambio bloomberg"):
+    :return: dict par -> tipo de cambio, en el orden de pares_activos (solo pares obtenidos).
+    """
+    pares = pares_activos(cfg)
+    principal = par_principal(cfg)
+    tipos_cambio = {}
+    with ThreadPoolExecutor(max_workers=len(pares), thread_name_prefix="par_tc") as executor:
+        futuros = {
+            executor.submit(propagar(_obtener_tipo_cambio_par), cfg_para_par(cfg, par), par, par == principal, cache, historico): par
+            for par in pares
+        }
+        for futuro in as_completed(futuros):
+            par = futuros[futuro]
+            try:
+                valor = futuro.result()
+            except Exception as e:
+                logger.warning(f"{par}: error al obtener el tipo de cambio: {e}")
+                continue
+            if valor is not None:
+                tipos_cambio[par] = valor
+            else:
+                logger.warning(f"{par}: no se pudo obtener el tipo de cambio")
+    return {par: tipos_cambio[par] for par in pares if par in tipos_cambio}
+
+def bot_run(cfg, contexto=None, mensaje="Bot 01 - Tipo cambio bloomberg"):
     resultado = False
+    contexto = contexto or ContextoEtapa()
     try:
         logger.info(f"Iniciando {mensaje}")
-        # Intentar obtener el tipo de cambio con reintentos
-        max_intentos = 3
-        intento = 1
-        tipo_cambio_str = None
-        
-        while intento <= max_intentos and not tipo_cambio_str:
-            logger.info(f"Intento {intento} de {max_intentos} para obtener tipo de cambio")
-            tipo_cambio_str = extrer_tipo_cambio_bloomberg(cfg)
-            if not tipo_cambio_str:
-                logger.warning(f"Intento {intento} fallido, reintentando...")
-                intento += 1
-        
-        if not tipo_cambio_str:
-            logger.error(f"No se pudo obtener el tipo de cambio de Bloomberg después de {max_intentos} intentos")
-            logger.info("Intentando obtener tipo de cambio desde xe.com...")
-            tipo_cambio_str = extraer_tipo_cambio_xe(cfg)
-
-        if tipo_cambio_str:
-            # Convertir a número si es necesario
-            tipo_cambio_num = limpiar_tipo_cambio(tipo_cambio_str)
-            logger.info(f"Tipo de cambio extraído con éxito: {tipo_cambio_num}")
-            vg.tipo_cambio_bloomberg = tipo_cambio_num
+        modo_concurrente = obtener_parametro(cfg, "fuentes_tc", "modo_concurrente", False, bool)
+
+        cache = obtener_cache(cfg)
+        historico = obtener_historico(cfg)
+
+        # Modo por lotes: todos los pares activos de [pares] en paralelo (solo con más de un par)
+        if modo_por_pares(cfg):
+            tipos_cambio = obtener_tipos_cambio_pares(cfg, cache, historico)
+            if tipos_cambio:
+                contexto.publicar("tipos_cambio_pares", tipos_cambio)
+            principal = par_principal(cfg)
+            if principal in tipos_cambio:
+                contexto.publicar("tipo_cambio_bloomberg", tipos_cambio[principal])
+                logger.info(f"Tipos de cambio extraídos: {tipos_cambio}")
+                resultado = True
+            else:
+                logger.warning(f"No se pudo obtener el tipo de cambio del par principal {principal}")
+            return resultado, mensaje
+
+        # Reutilizar un valor reciente antes de ir a la red
+        if cache is not None:
+            tipo_cambio_num = _leer_cache(cfg, cache, modo_concurrente)
+            if tipo_cambio_num is not None:
+                logger.info(f"Tipo de cambio obtenido de la cache: {tipo_cambio_num}")
+                contexto.publicar("tipo_cambio_bloomberg", tipo_cambio_num)
+                resultado = True
+                return resultado, mensaje
+
+        if modo_concurrente:
+            tipo_cambio_num, valores = obtener_tipo_cambio_concurrente(cfg)
+        else:
+            tipo_cambio_num, valores = obtener_tipo_cambio_secuencial(cfg)
+        if cache is not None:
+            for fuente, valor in valores.items():
+                cache.guardar(fuente, valor)
+        _registrar_historico(historico, par_principal(cfg), valores)
+        if tipo_cambio_num is not None:
+            logger.info(f"Tipo de cambio extraído con éxito: {tipo_cambio_num} (fuentes: {valores})")
+            contexto.publicar("tipo_cambio_bloomberg", tipo_cambio_num)
             resultado = True
         else:
             logger.warning("No se pudo obtener el tipo de cambio de ninguna fuente")
-            resultado = False
-        
+
     except BusinessException as be:
         logger.error(f"Error de negocio en bot_run: {be}")
         mensaje = f"Error de negocio: {be}"
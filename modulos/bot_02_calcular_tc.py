@@ -1,51 +1,98 @@
 import logging
-import variables_globales as vg
+from config.config import cfg_para_par, par_principal
+from utilidades.contexto import ContextoEtapa
 from utilidades.excepciones import BusinessException
+from utilidades.historico_tc import obtener_historico
 from decimal import Decimal
 
 logger = logging.getLogger("Bot 02 - Calcular TC")
 
-def bot_run(cfg, mensaje="Bot 02 - Tipo cambio bloomberg"):
+def calcular_par(tipo_cambio, valores):
+    """
+    Calcula compra y venta de un par aplicando la brecha y valida la banda permitida.
+
+    :param tipo_cambio: Tipo de cambio de referencia.
+    :param valores: Sección [valores] del par (inicial, final, brecha y, opcional, decimales).
+    :return: dict con compra, venta y en_rango (ambos valores dentro de (inicial, final)).
+    """
+    referencia = Decimal(str(tipo_cambio))
+    brecha = Decimal(str(valores.get('brecha', 0))) / 100
+    inicial = Decimal(str(valores['inicial']))
+    final = Decimal(str(valores['final']))
+    decimales = int(valores.get('decimales', 4))
+
+    compra = round(referencia * (1 - brecha), decimales)
+    venta = round(referencia * (1 + brecha), decimales)
+    return {
+        "compra": compra,
+        "venta": venta,
+        "en_rango": inicial < compra < final and inicial < venta < final,
+    }
+
+def calcular_pares(tipos_cambio, cfg):
+    """
+    Calcula compra y venta de todos los pares en una sola pasada.
+
+    :param tipos_cambio: dict par -> tipo de cambio de referencia.
+    :param cfg: Configuración cargada (las bandas y brechas se leen por par con cfg_para_par).
+    :return: dict par -> resultado de calcular_par.
+    """
+    return {
+        par: calcular_par(tipo_cambio, cfg_para_par(cfg, par)['valores'])
+        for par, tipo_cambio in tipos_cambio.items()
+    }
+
+def bot_run(cfg, contexto=None, mensaje="Bot 02 - Tipo cambio bloomberg"):
     resultado = False
+    contexto = contexto or ContextoEtapa()
     try:
         logger.info("Inicio del bot: %s", mensaje)
         logger.debug("Configuración recibida: %s", cfg)
-        logger.debug("Tipo de cambio Bloomberg: %s", vg.tipo_cambio_bloomberg)
-
-        # Obtener valores de las variables necesarias
-        valor_inicial = cfg['valores']['inicial']
-        valor_final = cfg['valores']['final']
-        valor_brecha = cfg['valores'].get('brecha', 0)
-        logger.debug("Rango inicial: %s, Rango final: %s, Brecha: %s", valor_inicial, valor_final, valor_brecha)
+        principal = par_principal(cfg)
+        tipos_cambio = contexto.get("tipos_cambio_pares") or {principal: contexto["tipo_cambio_bloomberg"]}
+        logger.debug("Tipos de cambio de referencia: %s", tipos_cambio)
 
-        # Cálculos de tipo de cambio compra y venta
-        vg.tipo_cambio_compra = round(Decimal(vg.tipo_cambio_bloomberg) * (1 - Decimal(valor_brecha) / 100), 4)
-        vg.tipo_cambio_venta = round(Decimal(vg.tipo_cambio_bloomberg) * (1 + Decimal(valor_brecha) / 100), 4)
-        logger.debug("Tipo de cambio compra: %s, Tipo de cambio venta: %s", vg.tipo_cambio_compra, vg.tipo_cambio_venta)
+        calculados = calcular_pares(tipos_cambio, cfg)
+        contexto.publicar("tipos_cambio_calculados", calculados)
+        historico = obtener_historico(cfg)
+        if historico is not None:
+            for par, calculo in calculados.items():
+                historico.registrar("calculado", par, compra=calculo["compra"], venta=calculo["venta"],
+                                    medio=tipos_cambio[par])
+        for par, calculo in calculados.items():
+            if par != principal and not calculo["en_rango"]:
+                logger.warning(f"Error de negocio: {par} fuera de rango permitido "
+                               f"(compra {calculo['compra']}, venta {calculo['venta']})")
 
-        # Validar rangos de tipos de cambio
-        if ((vg.tipo_cambio_compra < 3 or vg.tipo_cambio_compra > 5) or (vg.tipo_cambio_venta < 3 or vg.tipo_cambio_venta > 5)):
-            logger.warning("Error de negocio: Tipo de cambio fuera de rango permitido.")
+        # El par principal define el resultado del bot y alimenta SuperAdmin y ModuloTC
+        calculo = calculados[principal]
+        valores = cfg_para_par(cfg, principal)['valores']
+        valor_inicial, valor_final = valores['inicial'], valores['final']
+        tipo_cambio_compra, tipo_cambio_venta = calculo["compra"], calculo["venta"]
+        contexto.publicar("tipo_cambio_compra", tipo_cambio_compra)
+        contexto.publicar("tipo_cambio_venta", tipo_cambio_venta)
+        logger.debug("Tipo de cambio compra: %s, Tipo de cambio venta: %s", tipo_cambio_compra, tipo_cambio_venta)
 
         # Verificar condiciones para TC Compra
-        if Decimal(vg.tipo_cambio_compra) > Decimal(valor_inicial) and Decimal(vg.tipo_cambio_compra) < Decimal(valor_final):
-            mensaje = f'Se cumple la condición para tc Compra: {valor_inicial} < {vg.tipo_cambio_compra} < {valor_final}'
+        if Decimal(valor_inicial) < tipo_cambio_compra < Decimal(valor_final):
+            mensaje = f'Se cumple la condición para tc Compra: {valor_inicial} < {tipo_cambio_compra} < {valor_final}'
             resultado = True
             logger.info("Condición cumplida para TC Compra.")
         else:
-            mensaje = f'No se cumple la condición para tc Compra: {valor_inicial} < {vg.tipo_cambio_compra} < {valor_final}'
+            mensaje = f'No se cumple la condición para tc Compra: {valor_inicial} < {tipo_cambio_compra} < {valor_final}'
             logger.info("Condición no cumplida para TC Compra.")
 
         # Verificar condiciones para TC Venta
-        if Decimal(vg.tipo_cambio_venta) > Decimal(valor_inicial) and Decimal(vg.tipo_cambio_venta) < Decimal(valor_final) and resultado:
-            mensaje += f' - Se cumple la condición para tc Venta: {valor_inicial} < {vg.tipo_cambio_venta} < {valor_final}'
+        if Decimal(valor_inicial) < tipo_cambio_venta < Decimal(valor_final) and resultado:
+            mensaje += f' - Se cumple la condición para tc Venta: {valor_inicial} < {tipo_cambio_venta} < {valor_final}'
             resultado = True
             logger.info("Condición cumplida para TC Venta.")
         else:
-            mensaje += f' - No se cumple la condición para tc Venta: {valor_inicial} < {vg.tipo_cambio_venta} < {valor_final}'
+            mensaje += f' - No se cumple la condición para tc Venta: {valor_inicial} < {tipo_cambio_venta} < {valor_final}'
+            resultado = False
             logger.info("Condición no cumplida para TC Venta.")
 
-        logger.debug("Resultados guardados en variables globales: %s", {
+        logger.debug("Resultados publicados en el contexto: %s", {
             'boo_respuesta': resultado,
             'out_str_mensaje': mensaje,
         })
@@ -1,95 +1,155 @@
 import logging
-import configparser
-import requests
+import os
+from decimal import Decimal, InvalidOperation
+from config.config import obtener_parametro
 from utilidades.excepciones import BusinessException
-import variables_globales as vg
+from utilidades.contexto import ContextoEtapa
+from utilidades.sesion_persistente import SesionPersistente
+from utilidades.metricas import medir_publicacion
+from utilidades.plazo import timeout_restante
+from utilidades.trazas import span
 
 logger = logging.getLogger("Bot 03 - Super Admin")
 
-def bot_run(cfg, mensaje="Bot 03 - Super Admin"):
-    resultado = False
+# Encabezados de las solicitudes al SuperAdmin
+HEADERS_SUPERADMIN = {
+    "Content-Type": "application/x-www-form-urlencoded"
+}
+
+def _mismo_valor(actual, deseado):
+    """Compara tipos de cambio sin depender del tipo (str, float o Decimal) que entregue el servidor."""
     try:
-        # Leer configuración
-        config = configparser.ConfigParser()
-        config.read(cfg)
-        username = cfg["env_vars"]["super_admin_user"]
-        password = cfg["env_vars"]["super_admin_pwd"]
-        compra = vg.tipo_cambio_compra
-        venta = vg.tipo_cambio_venta
-    
-        # Leer URLs desde el archivo de configuración
+        return Decimal(str(actual)) == Decimal(str(deseado))
+    except (InvalidOperation, TypeError, ValueError):
+        return False
+
+class ClienteSuperAdmin:
+    def __init__(self, cfg):
+        """
+        Cliente del SuperAdmin con sesión autenticada persistente.
+
+        Las cookies se guardan en disco (superadmin.archivo_sesion) y se reutilizan entre
+        ejecuciones; solo se vuelve a iniciar sesión si la sesión venció o el servidor
+        responde 401.
+
+        :param cfg: Configuración cargada (url, env_vars y sección superadmin).
+        """
         base_url = cfg["url"]["url_superadmin"]
-        login_url = f"{base_url}{cfg['url'] ['url_login']}"
-        exchange_rate_get_url = f"{base_url}{cfg['url']['url_tc_paypal_get']}"
-        exchange_rate_save_url = f"{base_url}{cfg['url']['url_tc_paypal_post']}"
+        self.login_url = f"{base_url}{cfg['url']['url_login']}"
+        self.exchange_rate_get_url = f"{base_url}{cfg['url']['url_tc_paypal_get']}"
+        self.exchange_rate_save_url = f"{base_url}{cfg['url']['url_tc_paypal_post']}"
+        self.username = cfg["env_vars"]["super_admin_user"]
+        self.password = cfg["env_vars"]["super_admin_pwd"]
+        self.timeout = obtener_parametro(cfg, "superadmin", "timeout", 15.0, float)
 
-        # Crear una sesión para mantener las cookies
-        session = requests.Session()
+        ruta_output = obtener_parametro(cfg, "rutas", "ruta_output", ".")
+        archivo = obtener_parametro(cfg, "superadmin", "archivo_sesion", "sesion_superadmin.json")
+        self.sesion = SesionPersistente(
+            os.path.join(ruta_output, archivo),
+            ttl=obtener_parametro(cfg, "superadmin", "sesion_ttl", 1200.0, float),
+        )
+        self.llamadas = 0
 
-        # Datos del formulario de inicio de sesión
+    def iniciar_sesion(self):
+        """Inicia sesión y guarda las cookies en disco."""
         login_data = {
-            "usuario": username, 
-            "password": password 
+            "usuario": self.username,
+            "password": self.password
         }
+        self.llamadas += 1
+        with span("superadmin.login"):
+            login_response = self.sesion.session.post(self.login_url, data=login_data, headers=HEADERS_SUPERADMIN, timeout=timeout_restante(self.timeout))
+        if login_response.status_code != 200:
+            raise BusinessException(f"Error en la solicitud de inicio de sesión: {login_response.status_code}")
+        login_result = login_response.json()
+        if login_result.get("respuesta") != "00":
+            raise BusinessException(f"Inicio de sesión fallido. Mensaje: {login_result.get('mensaje')}")
+        logger.info(f"Inicio de sesión exitoso. Bienvenido {login_result.get('nombres')}!")
+        self.sesion.guardar()
+
+    def _solicitar(self, metodo, url, **kwargs):
+        """
+        Realiza una solicitud autenticada; ante un 401 vuelve a iniciar sesión una sola vez.
+        """
+        if not self.sesion.vigente:
+            self.iniciar_sesion()
+        for intento in (1, 2):
+            self.llamadas += 1
+            response = self.sesion.session.request(metodo, url, headers=HEADERS_SUPERADMIN, timeout=timeout_restante(self.timeout), **kwargs)
+            if response.status_code != 401 or intento == 2:
+                return response
+            logger.info("Sesión rechazada por el servidor (401), iniciando sesión nuevamente")
+            self.sesion.invalidar()
+            self.iniciar_sesion()
+
+    def obtener_tipo_cambio(self):
+        """Tipo de cambio PayPal registrado en el servidor (dict con status, buy y sell) o None."""
+        response = self._solicitar("GET", self.exchange_rate_get_url)
+        if response.status_code != 200:
+            logger.warning(f"No se pudo consultar el tipo de cambio registrado: {response.status_code}")
+            return None
+        existing_data = response.json()
+        logger.info("Datos existentes en el servidor: %s", existing_data)
+        return existing_data
 
-        # Encabezados de la solicitud
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded"
+    def registrar_tipo_cambio(self, compra, venta):
+        """
+        Registra compra/venta salvo que el servidor ya tenga esos valores.
+
+        :return: Tupla (respuesta del servidor, sin_cambios). Si sin_cambios es True no se hizo el POST.
+        """
+        existing_data = self.obtener_tipo_cambio()
+        if (
+            existing_data and
+            existing_data.get("status") == 1 and
+            _mismo_valor(existing_data.get("buy"), compra) and
+            _mismo_valor(existing_data.get("sell"), venta)
+        ):
+            logger.info("El servidor ya tiene el tipo de cambio deseado, no se envía el registro")
+            return existing_data, True
+
+        # Datos a enviar (ajusta los valores de 'buy' y 'sell' según sea necesario)
+        exchange_rate_data = {
+            "buy": compra,  # Tipo de cambio de compra
+            "sell": venta  # Tipo de cambio de venta
         }
+        exchange_rate_response = self._solicitar("POST", self.exchange_rate_save_url, data=exchange_rate_data)
+        if exchange_rate_response.status_code != 200:
+            raise BusinessException(f"Error al guardar el tipo de cambio: {exchange_rate_response.status_code}")
+        response_json = exchange_rate_response.json()
+        logger.info("Respuesta del servidor: %s", response_json)
+        return response_json, False
 
-        # Realizar la solicitud POST para iniciar sesión
-        login_response = session.post(login_url, data=login_data, headers=headers)
-
-        # Verificar si el inicio de sesión fue exitoso
-        if login_response.status_code == 200:
-            login_result = login_response.json()
-            if login_result.get("respuesta") == "00":
-                logger.info(f"Inicio de sesión exitoso. Bienvenido {login_result.get('nombres')}!")
-
-                # Validar si ya existen datos en el endpoint
-                exchange_rate_get_response = session.get(exchange_rate_get_url, headers=headers)
-
-                if exchange_rate_get_response.status_code == 200:
-                    existing_data = exchange_rate_get_response.json()
-                    logger.info("Datos existentes en el servidor: %s", existing_data)
-
-                    # Verificar si los datos existentes coinciden con los valores deseados
-                    if (
-                        existing_data.get("status") == 1 and
-                        existing_data.get("buy") == vg.tipo_cambio_compra and
-                        existing_data.get("sell") == vg.tipo_cambio_venta
-                    ):
-                        compra = existing_data.get("buy")
-                        venta = existing_data.get("sell")
-
-                # Datos a enviar (ajusta los valores de 'buy' y 'sell' según sea necesario)
-                exchange_rate_data = {
-                    "buy": compra,  # Tipo de cambio de compra
-                    "sell": venta  # Tipo de cambio de venta
-                }
-
-                # Realizar la solicitud POST para guardar el tipo de cambio
-                exchange_rate_response = session.post(exchange_rate_save_url, data=exchange_rate_data, headers=headers)
-
-                # Verificar si la solicitud fue exitosa
-                if exchange_rate_response.status_code == 200:
-                    response_json = exchange_rate_response.json()
-                    logger.info("Respuesta del servidor: %s", response_json)
-
-                    # Manejar la respuesta según el estado
-                    if response_json.get("status") == 0:
-                        logger.error("Error: %s", response_json.get("message"))
-                    elif response_json.get("status") == 1:
-                        logger.info("Correcto: %s", response_json.get("message"))
-                        resultado = True
-                    elif response_json.get("status") == 2:
-                        logger.info("Información: %s", response_json.get("message"))
-                else:
-                    logger.error(f"Error al guardar el tipo de cambio: {exchange_rate_response.status_code}")
-            else:
-                raise BusinessException(f"Inicio de sesión fallido. Mensaje: {login_result.get('mensaje')}")
-        else:
-            raise BusinessException(f"Error en la solicitud de inicio de sesión: {login_response.status_code}")
+def bot_run(cfg, contexto=None, mensaje="Bot 03 - Super Admin"):
+    resultado = False
+    contexto = contexto or ContextoEtapa()
+    try:
+        compra = contexto["tipo_cambio_compra"]
+        venta = contexto["tipo_cambio_venta"]
+
+        cliente = ClienteSuperAdmin(cfg)
+        with medir_publicacion("superadmin") as publicacion:
+            response_json, sin_cambios = cliente.registrar_tipo_cambio(compra, venta)
+            if sin_cambios:
+                publicacion["resultado"] = "sin_cambios"
+            elif response_json.get("status") != 1:
+                publicacion["resultado"] = "rechazado"
+        exchange_rate_data = {"buy": compra, "sell": venta}
+
+        # Manejar la respuesta según el estado
+        if sin_cambios:
+            contexto.publicar("publicacion_superadmin", {**exchange_rate_data, "sin_cambios": True})
+            mensaje = f"{mensaje} - Tipo de cambio ya registrado"
+            resultado = True
+        elif response_json.get("status") == 0:
+            logger.error("Error: %s", response_json.get("message"))
+        elif response_json.get("status") == 1:
+            logger.info("Correcto: %s", response_json.get("message"))
+            contexto.publicar("publicacion_superadmin", exchange_rate_data)
+            resultado = True
+        elif response_json.get("status") == 2:
+            logger.info("Información: %s", response_json.get("message"))
+        logger.info(f"Llamadas al SuperAdmin en esta ejecución: {cliente.llamadas}")
 
     except BusinessException as be:
         logger.error(f"Error de negocio en bot_run: {be}")
@@ -99,4 +159,4 @@ def bot_run(cfg, mensaje="Bot 03 - Super Admin"):
         mensaje = f"Error inesperado: {e}"
     finally:
         logger.info("Fin del bot: %s", mensaje)
-        return resultado, mensaje
\ No newline at end of file
+        return resultado, mensaje
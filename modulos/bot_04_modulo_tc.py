@@ -1,77 +1,188 @@
 import logging
-import configparser
+import threading
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from urllib.parse import parse_qsl
 import requests
+from requests.adapters import HTTPAdapter
+from config.config import obtener_parametro
 from utilidades.excepciones import BusinessException
-import variables_globales as vg
+from utilidades.contexto import ContextoEtapa
+from utilidades.metricas import medir_publicacion
+from utilidades.plazo import timeout_restante
+from utilidades.trazas import span
 
 logger = logging.getLogger("Bot 04 - Registrar TC")
 
-def bot_run(cfg, mensaje="Bot 04 - Registrar TC"):
-    resultado = False
+# Encabezados de la solicitud
+HEADERS_MODULO = {
+    "Content-Type": "application/x-www-form-urlencoded"
+}
+
+def _mismo_valor(actual, deseado):
+    """Compara tipos de cambio sin depender del tipo (str, float o Decimal) que entregue la API."""
     try:
-        # Leer configuración
-        config = configparser.ConfigParser()
-        config.read(cfg)
-        username = cfg["env_vars"]["modulo_user"]
-        password = cfg["env_vars"]["modulo_pwd"]
-        
-        # Leer URLs desde el archivo de configuración       
-        login_url = f"{cfg['api'] ['api_modulo_login']}"        
-        exchange_rate_save_url = f"{cfg['api'] ['api_modulo_tc_add']}"
-        exchange_rate_get_url = f"{cfg['api'] ['api_modulo_tc_get']}"
-
-        # Crear una sesión para mantener las cookies
-        session = requests.Session()
-
-        # Datos del formulario de inicio de sesión
+        return Decimal(str(actual)) == Decimal(str(deseado))
+    except (InvalidOperation, TypeError, ValueError):
+        return False
+
+def _primer_campo(registro, campos):
+    """Valor del primer campo de la lista presente en el registro (None si no hay ninguno)."""
+    for campo in campos:
+        if registro.get(campo) not in (None, ""):
+            return registro[campo]
+    return None
+
+class ClienteModuloTC:
+    def __init__(self, cfg):
+        """
+        Cliente de la API de ModuloTC con pool de conexiones y timeouts por llamada.
+
+        La sesión se conserva entre ejecuciones del mismo proceso (worker residente): el
+        inicio de sesión se repite solo si la API responde 401.
+
+        :param cfg: Configuración cargada (api, env_vars y sección modulo_tc).
+        """
+        self.login_url = cfg['api']['api_modulo_login']
+        self.exchange_rate_save_url = cfg['api']['api_modulo_tc_add']
+        self.exchange_rate_get_url = cfg['api']['api_modulo_tc_get']
+        self.username = cfg["env_vars"]["modulo_user"]
+        self.password = cfg["env_vars"]["modulo_pwd"]
+        self.configurar(cfg)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.autenticado = False
+
+    def configurar(self, cfg):
+        """Lee timeouts y campos de la sección [modulo_tc] (se reaplica en cada ejecución)."""
+        self.timeout = (
+            obtener_parametro(cfg, "modulo_tc", "timeout_conexion", 5.0, float),
+            obtener_parametro(cfg, "modulo_tc", "timeout_lectura", 15.0, float),
+        )
+        self.parametros_ultimo = dict(parse_qsl(obtener_parametro(cfg, "modulo_tc", "consulta_ultimo", "")))
+        self.campos_tipo_cambio = obtener_parametro(cfg, "modulo_tc", "campos_tipo_cambio", ["exchangeRate"], list)
+        self.campos_fecha = obtener_parametro(cfg, "modulo_tc", "campos_fecha", ["fecha"], list)
+
+    def iniciar_sesion(self):
         login_data = {
-            "username": username, 
-            "password": password 
+            "username": self.username,
+            "password": self.password
         }
+        with span("modulo_tc.login"):
+            login_response = self.session.post(self.login_url, data=login_data, headers=HEADERS_MODULO, timeout=timeout_restante(self.timeout))
+        if login_response.status_code != 200:
+            raise BusinessException(f"Error en la solicitud de inicio de sesión: {login_response.status_code}")
+        login_result = login_response.json()
+        if login_result.get("data") != "valid":
+            raise BusinessException(f"Inicio de sesión fallido. Mensaje: {login_result.get('mensaje')}")
+        logger.info(f"Inicio de sesión exitoso. Bienvenido {login_result.get('username')}!")
+        self.autenticado = True
+
+    def _solicitar(self, metodo, url, **kwargs):
+        """Solicitud autenticada con timeout; ante un 401 vuelve a iniciar sesión una sola vez."""
+        if not self.autenticado:
+            self.iniciar_sesion()
+        response = self.session.request(metodo, url, headers=HEADERS_MODULO, timeout=timeout_restante(self.timeout), **kwargs)
+        if response.status_code == 401:
+            logger.info("Sesión rechazada por ModuloTC (401), iniciando sesión nuevamente")
+            self.iniciar_sesion()
+            response = self.session.request(metodo, url, headers=HEADERS_MODULO, timeout=timeout_restante(self.timeout), **kwargs)
+        return response
+
+    def ultimo_registro(self):
+        """
+        Último tipo de cambio registrado (primer elemento de dataExchage) o None.
+
+        Se envían los parámetros de modulo_tc.consulta_ultimo (ej. limit=1) para pedir solo
+        el último registro; si la API los ignora se toma igualmente el primer elemento.
+        """
+        response = self._solicitar("GET", self.exchange_rate_get_url, params=self.parametros_ultimo or None)
+        if response.status_code != 200:
+            logger.error(f"Error al consultar los tipos de cambio registrados: {response.status_code}")
+            return None
+        registros = response.json().get('dataExchage') or []
+        logger.info(f"Registros recibidos de ModuloTC: {len(registros)}")
+        return registros[0] if registros else None
 
-        # Encabezados de la solicitud
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded"
+    def ya_registrado(self, registro, tipo_cambio):
+        """
+        True solo si el registro trae fecha de hoy y el mismo tipo de cambio.
+
+        Si el registro no tiene los campos de modulo_tc.campos_tipo_cambio / campos_fecha no se
+        puede confirmar el duplicado y se registra (un registro de más antes que uno omitido).
+        """
+        if not registro:
+            return False
+        actual = _primer_campo(registro, self.campos_tipo_cambio)
+        fecha = _primer_campo(registro, self.campos_fecha)
+        if actual is None or fecha is None:
+            logger.warning(f"El último registro de ModuloTC no tiene los campos configurados "
+                           f"{self.campos_tipo_cambio} / {self.campos_fecha} (campos: {sorted(registro)}); "
+                           f"se registra sin verificar duplicados")
+            return False
+        return _mismo_valor(actual, tipo_cambio) and str(fecha)[:10] == date.today().isoformat()
+
+    def registrar_tipo_cambio(self, tipo_cambio):
+        """
+        Registra el tipo de cambio salvo que el último registro ya lo tenga.
+
+        :return: Tupla (último registro tras la operación, sin_cambios).
+        """
+        registro = self.ultimo_registro()
+        if self.ya_registrado(registro, tipo_cambio):
+            logger.info("El último registro de ModuloTC ya tiene el tipo de cambio, no se envía el registro")
+            return registro, True
+
+        exchange_rate_data = {
+            "user": self.username,
+            "exchangeRate": tipo_cambio
         }
+        exchange_rate_response = self._solicitar("POST", self.exchange_rate_save_url, data=exchange_rate_data)
+        if exchange_rate_response.status_code != 200:
+            raise BusinessException(f"Error al guardar el tipo de cambio: {exchange_rate_response.status_code}")
+        logger.info("Respuesta del servidor: %s", exchange_rate_response.json())
+        return self.ultimo_registro(), False
+
+# Cliente reutilizado entre ejecuciones del mismo proceso (pool de conexiones y sesión)
+_clientes = {}
+_lock_clientes = threading.Lock()
 
-        # Realizar la solicitud POST para iniciar sesión
-        login_response = session.post(login_url, data=login_data, headers=headers)
-
-        # Verificar si el inicio de sesión fue exitoso
-        if login_response.status_code == 200:
-            login_result = login_response.json()
-            if login_result.get("data") == "valid":
-                logger.info(f"Inicio de sesión exitoso. Bienvenido {login_result.get('username')}!")
-
-                exchange_rate_data = {
-                "user": username,
-                "exchangeRate":vg.tipo_cambio_bloomberg                
-                }
-                # Realizar la solicitud POST para guardar el tipo de cambio
-                exchange_rate_response = session.post(exchange_rate_save_url, data=exchange_rate_data, headers=headers)
-
-                # Verificar si la solicitud fue exitosa
-                if exchange_rate_response.status_code == 200:
-                    response_json = exchange_rate_response.json()
-                    logger.info("Respuesta del servidor: %s", response_json)
-                    
-                    
-                else:
-                    logger.error(f"Error al guardar el tipo de cambio: {exchange_rate_response.status_code}")
-                exchange_rate_get_url = session.get(exchange_rate_get_url, headers=headers)
-                    
-                if  exchange_rate_get_url.status_code == 200:
-                    response_json = exchange_rate_get_url.json()
-                    logger.info("Respuesta del servidor: %s", response_json)
-                    primer_item = response_json['dataExchage'][0]
-                    vg.tipo_cambio_venta = primer_item['tc_venta']
-                    vg.tipo_cambio_compra = primer_item['tc_compra']
-                    resultado = True
-
-            else:
-                raise BusinessException(f"Inicio de sesión fallido. Mensaje: {login_result.get('mensaje')}")
+def obtener_cliente(cfg):
+    """Retorna el cliente de ModuloTC del proceso para la URL y usuario configurados."""
+    clave = (cfg['api']['api_modulo_login'], cfg["env_vars"]["modulo_user"])
+    with _lock_clientes:
+        cliente = _clientes.get(clave)
+        if cliente is None:
+            cliente = _clientes[clave] = ClienteModuloTC(cfg)
         else:
-            raise BusinessException(f"Error en la solicitud de inicio de sesión: {login_response.status_code}")
+            cliente.configurar(cfg)
+    return cliente
+
+def bot_run(cfg, contexto=None, mensaje="Bot 04 - Registrar TC"):
+    resultado = False
+    contexto = contexto or ContextoEtapa()
+    try:
+        cliente = obtener_cliente(cfg)
+        with medir_publicacion("modulo_tc") as publicacion:
+            primer_item, sin_cambios = cliente.registrar_tipo_cambio(contexto["tipo_cambio_bloomberg"])
+            if sin_cambios:
+                publicacion["resultado"] = "sin_cambios"
+        if sin_cambios:
+            mensaje = f"{mensaje} - Tipo de cambio ya registrado"
+
+        if primer_item:
+            contexto.publicar("tipo_cambio_modulo_venta", primer_item['tc_venta'])
+            contexto.publicar("tipo_cambio_modulo_compra", primer_item['tc_compra'])
+            resultado = True
+        else:
+            logger.error("No se pudo leer el último tipo de cambio registrado en ModuloTC")
+
+    except requests.exceptions.Timeout as e:
+        logger.error(f"Tiempo de espera agotado con ModuloTC: {e}")
+        mensaje = f"Error de negocio: ModuloTC no respondió a tiempo ({e})"
     except BusinessException as be:
         logger.error(f"Error de negocio en bot_run: {be}")
         mensaje = f"Error de negocio: {be}"
@@ -80,4 +191,4 @@ def bot_run(cfg, mensaje="Bot 04 - Registrar TC"):
         mensaje = f"Error inesperado: {e}"
     finally:
         logger.info("Fin del bot: %s", mensaje)
-        return resultado, mensaje
\ No newline at end of file
+        return resultado, mensaje
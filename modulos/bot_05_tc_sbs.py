@@ -1,15 +1,82 @@
 import logging
+import time
 from utilidades.excepciones import BusinessException
-import variables_globales as vg
 import requests
-from bs4 import BeautifulSoup
-from lxml import html
+from lxml import etree, html
+from config.config import obtener_parametro
+from utilidades.contexto import ContextoEtapa
+from utilidades.cache_tc import consultar_con_revalidacion, obtener_cache, obtener_cache_revalidacion, ttl_fuente
+from utilidades.circuito import obtener_circuito
+from utilidades.historico_tc import obtener_historico
+from utilidades.extraccion_streaming import ObjetivoStreaming, extraer_de_respuesta
+from utilidades.metricas import DURACION_FUENTE, PARSEOS
+from utilidades.plazo import plazo_vencido, timeout_restante
+from utilidades.trazas import span
 
 logger = logging.getLogger("Bot 05 - Tipo cambio sbs")
 
+def _extraer_fila_dolar(fila):
+    """
+    Extrae (venta, compra) de la fila del Dólar de N.A.: la segunda celda es compra y la tercera venta.
+    """
+    celdas = fila.findall('td')
+    if len(celdas) < 3 or 'Dólar de N.A.' not in ''.join(celdas[0].itertext()):
+        return None
+    compra = ''.join(celdas[1].itertext()).strip()
+    venta = ''.join(celdas[2].itertext()).strip()
+    if compra and venta:
+        return venta, compra
+    return None
+
+OBJETIVO_SBS = ObjetivoStreaming("SBS", lambda elemento: elemento.tag == 'tr', _extraer_fila_dolar)
+
+TEXTO_DOLAR = 'Dólar de N.A.'
+
+# Estrategias de búsqueda de la fila del Dólar de N.A., compiladas una sola vez y
+# evaluadas en orden sobre el mismo árbol.
+ESTRATEGIAS_FILA_DOLAR = [
+    # Método 1: celda cuyo texto directo contiene el nombre de la moneda
+    ("XPath texto directo", etree.XPath("//td[contains(text(), $texto)]/parent::tr")),
+    # Método 2: celda cuyo texto completo (incluyendo nodos hijos) contiene la moneda
+    ("XPath texto completo", etree.XPath("//td[contains(string(.), $texto)]/parent::tr")),
+    # Método 3: filas de la tabla de resultados de la SBS (rgMasterTable)
+    ("Tabla rgMasterTable", etree.XPath(
+        "//table[contains(concat(' ', normalize-space(@class), ' '), ' rgMasterTable ')]"
+        "//tr[td[1][contains(string(.), $texto)]]"
+    )),
+]
+XPATH_CELDAS = etree.XPath("./td")
+
+def parsear_tipo_cambio_sbs(contenido):
+    """
+    Parsea una sola vez la página de la SBS y aplica las estrategias de búsqueda
+    precompiladas sobre el mismo árbol.
+
+    :param contenido: Cuerpo de la respuesta (bytes o str).
+    :return: Tupla (tipo_cambio_venta, tipo_cambio_compra); (None, None) si no se encontró.
+    """
+    with span("parseo.lxml", objetivo="SBS"):
+        tree = html.fromstring(contenido)
+        for nombre, xpath in ESTRATEGIAS_FILA_DOLAR:
+            with span("estrategia", estrategia=nombre) as span_estrategia:
+                for fila in xpath(tree, texto=TEXTO_DOLAR):
+                    celdas = XPATH_CELDAS(fila)
+                    if len(celdas) < 3:
+                        continue
+                    tipo_cambio_compra = celdas[1].text_content().strip()
+                    tipo_cambio_venta = celdas[2].text_content().strip()
+                    if tipo_cambio_compra and tipo_cambio_venta:
+                        logger.info(f"Tipo de cambio compra/venta obtenido con {nombre}: {tipo_cambio_compra}/{tipo_cambio_venta}")
+                        PARSEOS.inc(objetivo="SBS", estrategia=nombre, resultado="ok")
+                        return tipo_cambio_venta, tipo_cambio_compra
+                span_estrategia.error("Sin resultado")
+            logger.warning(f"Estrategia '{nombre}' sin resultado, probando la siguiente...")
+    PARSEOS.inc(objetivo="SBS", estrategia="ninguna", resultado="sin_valor")
+    return None, None
+
 def extraer_tipo_cambio_sbs(cfg):
     """
-    Función para extraer el tipo de cambio de la SBS utilizando XPath y BeautifulSoup como fallback.
+    Función para extraer el tipo de cambio de la SBS utilizando XPath precompilado con estrategias de respaldo.
     Retorna una tupla con (tipo_cambio_venta, tipo_cambio_compra)
     """
     tipo_cambio_compra = None
@@ -20,79 +87,35 @@ def extraer_tipo_cambio_sbs(cfg):
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        # Método 1: Usando XPath con lxml
-        try:
-            tree = html.fromstring(response.content)
-            # XPath para encontrar la fila del Dólar de N.A.
-            xpath_dolar_row = "//td[contains(text(), 'Dólar de N.A.')]/parent::tr"
-            dolar_row = tree.xpath(xpath_dolar_row)
-            
-            if dolar_row and len(dolar_row) > 0:
-                # XPath para el valor de compra (segunda columna de la fila)
-                xpath_compra = ".//td[2]"
-                # XPath para el valor de venta (tercera columna de la fila)
-                xpath_venta = ".//td[3]"
-                
-                compra_element = dolar_row[0].xpath(xpath_compra)
-                venta_element = dolar_row[0].xpath(xpath_venta)
-                
-                if compra_element and len(compra_element) > 0:
-                    tipo_cambio_compra = compra_element[0].text_content().strip()
-                    logger.info(f"Tipo de cambio compra obtenido con XPath: {tipo_cambio_compra}")
-                
-                if venta_element and len(venta_element) > 0:
-                    tipo_cambio_venta = venta_element[0].text_content().strip()
-                    logger.info(f"Tipo de cambio venta obtenido con XPath: {tipo_cambio_venta}")
-                
-                # Si se encontraron ambos valores, retornamos la tupla
-                if tipo_cambio_compra and tipo_cambio_venta:
-                    return tipo_cambio_venta, tipo_cambio_compra
-        except Exception as xpath_error:
-            logger.warning(f"Error al usar XPath: {xpath_error}, intentando con BeautifulSoup...")
-        
-        # Método 2: Usando BeautifulSoup como fallback
-        soup = BeautifulSoup(response.content, "html.parser")
-        
-        # Buscar la fila que contiene "Dólar de N.A."
-        dolar_row = soup.find("td", string=lambda text: text and "Dólar de N.A." in text)
-        
-        if dolar_row and dolar_row.parent:
-            # Obtener todas las celdas de la fila
-            celdas = dolar_row.parent.find_all("td")
-            
-            if len(celdas) >= 3:
-                if celdas[1].text.strip():
-                    tipo_cambio_compra = celdas[1].text.strip()
-                    logger.info(f"Tipo de cambio compra obtenido con BeautifulSoup: {tipo_cambio_compra}")
-                
-                if celdas[2].text.strip():
-                    tipo_cambio_venta = celdas[2].text.strip()
-                    logger.info(f"Tipo de cambio venta obtenido con BeautifulSoup: {tipo_cambio_venta}")
-                
-                # Retornamos la tupla si encontramos ambos valores
-                if tipo_cambio_compra and tipo_cambio_venta:
-                    return tipo_cambio_venta, tipo_cambio_compra
-        
-        # Método 3: Intentar buscar en la tabla por clase o estructura
-        tabla = soup.find("table", class_="rgMasterTable")
-        if tabla:
-            filas = tabla.find_all("tr")
-            for fila in filas:
-                celdas = fila.find_all("td")
-                if celdas and len(celdas) >= 3 and "Dólar de N.A." in celdas[0].text:
-                    if celdas[1].text.strip():
-                        tipo_cambio_compra = celdas[1].text.strip()
-                    if celdas[2].text.strip():
-                        tipo_cambio_venta = celdas[2].text.strip()
-                    
-                    # Retornamos la tupla si encontramos ambos valores
-                    if tipo_cambio_compra and tipo_cambio_venta:
-                        logger.info(f"Tipo de cambio compra/venta encontrado en tabla: {tipo_cambio_compra}/{tipo_cambio_venta}")
-                        return tipo_cambio_venta, tipo_cambio_compra
-            
+        streaming = obtener_parametro(cfg, "extraccion", "streaming", False, bool)
+        timeout = (
+            obtener_parametro(cfg, "sbs", "timeout_conexion", 5.0, float),
+            obtener_parametro(cfg, "sbs", "timeout_lectura", 20.0, float),
+        )
+
+        def peticion(cabeceras_condicionales):
+            response = requests.get(url, headers={**headers, **cabeceras_condicionales}, stream=streaming,
+                                    timeout=timeout_restante(timeout))
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response
+
+        def parsear(response):
+            if streaming:
+                # Se deja de leer la página apenas se cierra la fila del Dólar de N.A.; si no
+                # aparece, se aplican las estrategias XPath sobre los bytes ya leídos
+                valores = extraer_de_respuesta(response, OBJETIVO_SBS, respaldo=parsear_tipo_cambio_sbs)
+            else:
+                valores = parsear_tipo_cambio_sbs(response.content)
+            return list(valores) if valores and all(valores) else None
+
+        # GET condicional: si la página no cambió (304) se reutiliza la última fila parseada
+        valores = consultar_con_revalidacion(obtener_cache_revalidacion(cfg), url, peticion, parsear)
+        if valores:
+            tipo_cambio_venta, tipo_cambio_compra = valores
+            logger.info(f"Tipo de cambio compra/venta obtenido: {tipo_cambio_compra}/{tipo_cambio_venta}")
+            return tipo_cambio_venta, tipo_cambio_compra
+
         # Si llegamos aquí, ningún método funcionó
         raise BusinessException("No se encontró el tipo de cambio en la página de la SBS con ningún método")
             
@@ -132,11 +155,38 @@ def limpiar_tipo_cambio(tipo_cambio_str):
         logger.error(f"No se pudo convertir '{tipo_cambio_str}' a un número")
         return None
 
-def bot_run(cfg, mensaje="Bot 01 - Tipo cambio sbs"):
+def bot_run(cfg, contexto=None, mensaje="Bot 05 - Tipo cambio sbs"):
     resultado = False
+    contexto = contexto or ContextoEtapa()
     try:
         logger.info(f"Iniciando {mensaje}")
+
+        # Reutilizar un valor reciente antes de ir a la red
+        cache = obtener_cache(cfg)
+        cacheado = cache.obtener("sbs", ttl_fuente(cfg, "sbs")) if cache is not None else None
+        if cacheado is not None:
+            tipo_cambio_venta_num, tipo_cambio_compra_num = cacheado
+            contexto.publicar("tipo_cambio_sbs_venta", tipo_cambio_venta_num)
+            contexto.publicar("tipo_cambio_sbs_compra", tipo_cambio_compra_num)
+            logger.info(f"Tipo de cambio SBS obtenido de la cache - Venta: {tipo_cambio_venta_num}, Compra: {tipo_cambio_compra_num}")
+            resultado = True
+            return resultado, mensaje
+
+        # Con el circuito abierto la etapa falla de inmediato en vez de esperar el timeout de la SBS
+        circuito = obtener_circuito(cfg)
+        if circuito is not None and not circuito.permitir("sbs"):
+            raise BusinessException("Circuito de la fuente SBS abierto: se omite la consulta")
+
+        inicio = time.monotonic()
         tipo_cambio_venta, tipo_cambio_compra = extraer_tipo_cambio_sbs(cfg)
+        obtenido = bool(tipo_cambio_venta and tipo_cambio_compra)
+        DURACION_FUENTE.observar(time.monotonic() - inicio, fuente="sbs", resultado="ok" if obtenido else "sin_valor")
+        if circuito is not None:
+            if obtenido:
+                circuito.registrar_exito("sbs")
+            elif not plazo_vencido():
+                # Si se agotó el plazo de la ejecución no es un fallo atribuible a la SBS
+                circuito.registrar_fallo("sbs")
         
         if tipo_cambio_venta and tipo_cambio_compra:
             # Convertir a números si es necesario
@@ -144,8 +194,14 @@ def bot_run(cfg, mensaje="Bot 01 - Tipo cambio sbs"):
             tipo_cambio_compra_num = limpiar_tipo_cambio(tipo_cambio_compra)
             
             logger.info(f"Tipo de cambio SBS extraído con éxito - Venta: {tipo_cambio_venta_num}, Compra: {tipo_cambio_compra_num}")
-            vg.tipo_cambio_venta = tipo_cambio_venta_num
-            vg.tipo_cambio_compra = tipo_cambio_compra_num
+            contexto.publicar("tipo_cambio_sbs_venta", tipo_cambio_venta_num)
+            contexto.publicar("tipo_cambio_sbs_compra", tipo_cambio_compra_num)
+            if cache is not None and tipo_cambio_venta_num is not None and tipo_cambio_compra_num is not None:
+                cache.guardar("sbs", [tipo_cambio_venta_num, tipo_cambio_compra_num])
+            historico = obtener_historico(cfg)
+            if historico is not None and tipo_cambio_venta_num is not None and tipo_cambio_compra_num is not None:
+                # La SBS publica el promedio del dólar de N.A.
+                historico.registrar("sbs", "USDPEN", compra=tipo_cambio_compra_num, venta=tipo_cambio_venta_num)
             resultado = True
         
     except BusinessException as be:
@@ -1,38 +1,147 @@
+import csv
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from config.config import obtener_parametro
 from utilidades.excepciones import BusinessException
-import variables_globales as vg
+from utilidades.contexto import ContextoEtapa
+from utilidades.metricas import medir_publicacion
+from utilidades.plazo import timeout_restante
+from utilidades.trazas import propagar
 
 logger = logging.getLogger("Bot 06 - Gescom Cargar TC")
 
-def cargar_tc_gescom(cfg):
+# Sesión keep-alive compartida por el proceso (worker residente y carga por lotes)
+_sesion = None
+_lock_sesion = threading.Lock()
+
+def _timeout(cfg):
+    """Timeout (conexión, lectura) de las llamadas a Gescom."""
+    return (
+        obtener_parametro(cfg, "gescom", "timeout_conexion", 5.0, float),
+        obtener_parametro(cfg, "gescom", "timeout_lectura", 15.0, float),
+    )
+
+def obtener_sesion(cfg):
+    """Retorna la sesión de Gescom del proceso, con tantas conexiones como la concurrencia de carga."""
+    global _sesion
+    with _lock_sesion:
+        if _sesion is None:
+            concurrencia = obtener_parametro(cfg, "gescom", "concurrencia", 4, int)
+            _sesion = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, concurrencia))
+            _sesion.mount("http://", adapter)
+            _sesion.mount("https://", adapter)
+    return _sesion
+
+def _enviar_tc(session, url, payload, timeout):
+    """POST de un tipo de cambio. Retorna la respuesta; lanza las excepciones de requests."""
+    logger.info(f"Enviando request a Gescom con payload: {payload}")
+    with medir_publicacion("gescom"):
+        response = session.post(url, json=payload, timeout=timeout_restante(timeout))
+        response.raise_for_status()
+    return response
+
+def leer_registros(ruta_archivo):
+    """
+    Lee un CSV de tipos de cambio con columnas fecha, compra y venta (encabezado opcional).
+
+    :return: Lista de tuplas (fecha 'YYYY-MM-DD', compra, venta).
+    """
+    registros = []
+    with open(ruta_archivo, newline="", encoding="utf-8") as archivo:
+        for numero, fila in enumerate(csv.reader(archivo), start=1):
+            if not fila or not "".join(fila).strip():
+                continue
+            if numero == 1 and fila[0].strip().lower() == "fecha":
+                continue
+            if len(fila) < 3:
+                raise BusinessException(f"Línea {numero}: se esperaban fecha, compra y venta")
+            fecha, compra, venta = (valor.strip() for valor in fila[:3])
+            try:
+                datetime.strptime(fecha, "%Y-%m-%d")
+                float(compra), float(venta)
+            except ValueError as e:
+                raise BusinessException(f"Línea {numero}: {e}")
+            registros.append((fecha, compra, venta))
+    return registros
+
+def cargar_lote_gescom(cfg, registros):
+    """
+    Carga varios tipos de cambio en Gescom sobre una sola sesión keep-alive.
+
+    Los registros se envían en lotes de gescom.tamano_lote con hasta gescom.concurrencia
+    solicitudes simultáneas. Si un lote completo falla (Gescom caído) se detiene la carga y
+    el resto queda como no enviado.
+
+    :param registros: Iterable de (fecha, compra, venta).
+    :return: Lista de dicts por registro, en el orden recibido, con fecha, compra, venta,
+             ok y mensaje.
+    """
+    url = cfg["api"]["api_gescom_tc_sbs"]
+    timeout = _timeout(cfg)
+    tamano_lote = max(1, obtener_parametro(cfg, "gescom", "tamano_lote", 10, int))
+    concurrencia = max(1, obtener_parametro(cfg, "gescom", "concurrencia", 4, int))
+    session = obtener_sesion(cfg)
+
+    def enviar(registro):
+        fecha, compra, venta = registro
+        item = {"fecha": fecha, "compra": compra, "venta": venta, "ok": False, "mensaje": ""}
+        try:
+            response = _enviar_tc(session, url, {"fecha": fecha, "venta": venta, "compra": compra}, timeout)
+            item["ok"] = True
+            item["mensaje"] = f"HTTP {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            item["mensaje"] = str(e)
+            logger.error(f"Gescom rechazó el tipo de cambio del {fecha}: {e}")
+        return item
+
+    registros = list(registros)
+    resultados = []
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="gescom") as executor:
+        for inicio in range(0, len(registros), tamano_lote):
+            lote = registros[inicio:inicio + tamano_lote]
+            resultados_lote = list(executor.map(propagar(enviar), lote))
+            resultados.extend(resultados_lote)
+            exitosos = sum(item["ok"] for item in resultados_lote)
+            logger.info(f"Lote {inicio // tamano_lote + 1}: {exitosos}/{len(lote)} tipos de cambio cargados")
+            if not exitosos:
+                logger.error("Falló el lote completo, se detiene la carga")
+                resultados.extend(
+                    {"fecha": f, "compra": c, "venta": v, "ok": False, "mensaje": "No enviado"}
+                    for f, c, v in registros[inicio + tamano_lote:]
+                )
+                break
+    return resultados
+
+def cargar_tc_gescom(cfg, contexto):
+    resultado = False
+    mensaje = ""
     try:
         logger.info("Iniciando carga de tipo de cambio en Gescom")
-        
-        import requests
-        from datetime import datetime
-        
+
         url = cfg["api"]["api_gescom_tc_sbs"]
-        
+
         payload = {
             "fecha": datetime.now().strftime("%Y-%m-%d"),
-            "venta": vg.tipo_cambio_venta,
-            "compra": vg.tipo_cambio_compra
+            "venta": contexto["tipo_cambio_sbs_venta"],
+            "compra": contexto["tipo_cambio_sbs_compra"]
         }
-        
-        logger.info(f"Enviando request a Gescom con payload: {payload}")
-        
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        
+
+        response = _enviar_tc(obtener_sesion(cfg), url, payload, _timeout(cfg))
+
         if response.status_code == 200:
             resultado = True
             mensaje = "Carga de tipo de cambio en Gescom completada exitosamente"
+            contexto.publicar("publicacion_gescom", payload)
             logger.info(f"Respuesta exitosa de Gescom: {response.text}")
         else:
             resultado = False
             mensaje = f"Error al cargar tipo de cambio en Gescom. Status: {response.status_code}"
             logger.error(mensaje)
-        return resultado, mensaje
     except BusinessException as be:
         logger.error(f"Error de negocio en cargar_tc_gescom: {be}")
         mensaje = f"Error de negocio: {be}"
@@ -43,15 +152,17 @@ def cargar_tc_gescom(cfg):
         resultado = False
     finally:
         logger.info("Fin del proceso ...")
+        return resultado, mensaje
 
-def bot_run(cfg, mensaje="Bot 06 - Gescom Cargar TC"):
+def bot_run(cfg, contexto=None, mensaje="Bot 06 - Gescom Cargar TC"):
     resultado = False
+    contexto = contexto or ContextoEtapa()
     try:
         logger.info(f"Iniciando {mensaje}")
-        resultado = cargar_tc_gescom(cfg)
-        mensaje = "Bot 06 - Gescom Cargar TC completado exitosamente"
-        return resultado, mensaje
+        resultado, mensaje = cargar_tc_gescom(cfg, contexto)
     except BusinessException as be:
         logger.error(f"Error de negocio en bot_run: {be}")
         mensaje = f"Error de negocio: {be}"
-        resultado = False
\ No newline at end of file
+        resultado = False
+    finally:
+        return resultado, mensaje
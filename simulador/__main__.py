@@ -0,0 +1,5 @@
+import sys
+
+from simulador.carga import main
+
+sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Generador de carga: ejecuta N veces el pipeline completo, con C ejecuciones simultáneas,
+contra los servicios simulados y reporta throughput y percentiles de latencia por etapa.
+
+Uso:
+    python -m simulador --ejecuciones 50 --concurrencia 8 --latencia bloomberg=0.8 --errores xe=0.2
+    python -m simulador --solo-servicios --puerto 8765
+"""
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.config import cargar_configuracion
+from simulador.servicios import SERVICIOS, ConfigServicio, ServiciosSimulados
+
+# Configuración del logger
+logger = logging.getLogger("Simulador - Carga")
+
+TOTAL = "Total"
+
+
+def percentil(valores, p):
+    """Percentil p (0 a 100) con interpolación lineal; None si no hay valores."""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def ejecutar_carga(cfg, ejecuciones, concurrencia):
+    """
+    Ejecuta el pipeline (main.ejecutar_pipeline) ejecuciones veces con hasta concurrencia a la vez.
+
+    Las ejecuciones simultáneas comparten el cliente HTTP, las sesiones y el límite de tasa
+    del proceso, igual que las órdenes que atiende el worker residente.
+
+    :return: Tupla (lista de {"duracion", "etapas": {nombre: {"estado", "duracion"}}}, segundos totales).
+    """
+    from main import ejecutar_pipeline
+
+    def una_ejecucion(_):
+        inicio = time.perf_counter()
+        resultados, _ = ejecutar_pipeline(cfg)
+        return {
+            "duracion": time.perf_counter() - inicio,
+            "etapas": {
+                nombre: {"estado": r.estado, "duracion": r.duracion}
+                for nombre, r in (resultados or {}).items()
+            },
+        }
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrencia), thread_name_prefix="carga") as executor:
+        corridas = list(executor.map(una_ejecucion, range(ejecuciones)))
+    return corridas, time.perf_counter() - inicio
+
+
+def resumir(corridas, segundos):
+    """
+    Throughput y percentiles (p50, p95, p99, máximo en segundos) por etapa y del total.
+
+    :return: dict serializable en JSON.
+    """
+    duraciones = {TOTAL: [c["duracion"] for c in corridas]}
+    estados = {TOTAL: {"ok": 0, "fallo": 0}}
+    for corrida in corridas:
+        fallida = not corrida["etapas"]
+        for nombre, etapa in corrida["etapas"].items():
+            duraciones.setdefault(nombre, []).append(etapa["duracion"])
+            conteo = estados.setdefault(nombre, {})
+            conteo[etapa["estado"]] = conteo.get(etapa["estado"], 0) + 1
+            fallida = fallida or etapa["estado"] != "ok"
+        estados[TOTAL]["fallo" if fallida else "ok"] += 1
+
+    return {
+        "ejecuciones": len(corridas),
+        "segundos": segundos,
+        "ejecuciones_por_segundo": len(corridas) / segundos if segundos else None,
+        "etapas": {
+            nombre: {
+                "estados": estados[nombre],
+                "p50": percentil(valores, 50),
+                "p95": percentil(valores, 95),
+                "p99": percentil(valores, 99),
+                "max": max(valores),
+            }
+            for nombre, valores in duraciones.items() if valores
+        },
+    }
+
+
+def imprimir_reporte(resumen, servicios, concurrencia):
+    print(f"Ejecuciones: {resumen['ejecuciones']} (concurrencia {concurrencia}) en {resumen['segundos']:.2f}s "
+          f"-> {resumen['ejecuciones_por_segundo'] or 0:.2f} ejecuciones/s")
+    print(f"{'Etapa':<32} {'Estados':<24} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for nombre, etapa in resumen["etapas"].items():
+        estados = ", ".join(f"{estado}={n}" for estado, n in sorted(etapa["estados"].items()))
+        print(f"{nombre:<32} {estados:<24} " + " ".join(
+            f"{etapa[p] * 1000:>9.1f}" for p in ("p50", "p95", "p99", "max")))
+    print("Peticiones por servicio: " + ", ".join(
+        f"{nombre}={servicios.peticiones[nombre]} ({servicios.errores[nombre]} errores)" for nombre in SERVICIOS))
+
+
+def _por_servicio(valores, tipo, argumento):
+    """Convierte ["bloomberg=0.8", ...] en {"bloomberg": 0.8, ...}."""
+    resultado = {}
+    for valor in valores or []:
+        nombre, _, dato = valor.partition("=")
+        if nombre not in SERVICIOS or not dato:
+            raise SystemExit(f"{argumento}: se esperaba servicio=valor con servicio en {', '.join(SERVICIOS)}")
+        resultado[nombre] = tipo(dato)
+    return resultado
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Servicios simulados y generador de carga del pipeline")
+    parser.add_argument("--ejecuciones", type=int, default=20, help="Ejecuciones del pipeline en total")
+    parser.add_argument("--concurrencia", type=int, default=4, help="Ejecuciones simultáneas")
+    parser.add_argument("--latencia", action="append", metavar="SERVICIO=SEG", help="Latencia fija por servicio")
+    parser.add_argument("--variacion", action="append", metavar="SERVICIO=SEG", help="Latencia aleatoria adicional")
+    parser.add_argument("--errores", action="append", metavar="SERVICIO=TASA", help="Fracción de respuestas con error")
+    parser.add_argument("--estado-error", action="append", metavar="SERVICIO=CODIGO", help="Código HTTP de los errores (503)")
+    parser.add_argument("--pagina", action="append", metavar="SERVICIO=RUTA", help="HTML alternativo (bloomberg, xe, sbs)")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla para latencias y errores reproducibles")
+    parser.add_argument("--json", metavar="ARCHIVO", help="Guarda el resumen en JSON")
+    parser.add_argument("--solo-servicios", action="store_true", help="Solo levanta los servicios hasta Ctrl+C")
+    parser.add_argument("--puerto", type=int, default=0, help="Puerto de los servicios (0 = uno libre)")
+    return parser.parse_args(argv)
+
+
+def construir_config(args):
+    """ConfigServicio por servicio a partir de los argumentos de línea de comandos."""
+    campos = {
+        "latencia": _por_servicio(args.latencia, float, "--latencia"),
+        "variacion": _por_servicio(args.variacion, float, "--variacion"),
+        "tasa_error": _por_servicio(args.errores, float, "--errores"),
+        "estado_error": _por_servicio(args.estado_error, int, "--estado-error"),
+        "pagina": _por_servicio(args.pagina, str, "--pagina"),
+    }
+    nombres = set().union(*campos.values())
+    return {
+        nombre: ConfigServicio(**{campo: valores[nombre] for campo, valores in campos.items() if nombre in valores})
+        for nombre in nombres
+    }
+
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    servicios = ServiciosSimulados(construir_config(args), puerto=args.puerto, semilla=args.semilla)
+
+    if args.solo_servicios:
+        with servicios:
+            print(f"Servicios simulados en {servicios.url} (Ctrl+C para terminar). Valores para config.ini:")
+            for (seccion, clave), valor in servicios.urls().items():
+                print(f"  [{seccion}] {clave} = \"{valor}\"")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                return 0
+
+    from utilidades.httpclient import configurar_limite_tasa
+
+    # Los bots registran cada petición; el reporte final es la salida de la carga
+    logging.disable(logging.CRITICAL)
+    with servicios, tempfile.TemporaryDirectory() as ruta_output:
+        cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+        configurar_limite_tasa(cfg)
+        corridas, segundos = ejecutar_carga(cfg, args.ejecuciones, args.concurrencia)
+        resumen = resumir(corridas, segundos)
+        resumen["peticiones"] = dict(servicios.peticiones)
+        resumen["errores"] = dict(servicios.errores)
+        imprimir_reporte(resumen, servicios, args.concurrencia)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(resumen, archivo, indent=2, ensure_ascii=False)
+    return 0 if resumen["etapas"][TOTAL]["estados"]["fallo"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+Servicios HTTP locales que reemplazan a Bloomberg, xe.com, SBS, SuperAdmin, ModuloTC,
+Gescom y el webhook, para ejecutar y perfilar el pipeline completo sin tocar producción.
+
+Cada servicio tiene latencia, variación, tasa de errores y contenido configurables:
+
+    servicios = ServiciosSimulados({"bloomberg": ConfigServicio(latencia=0.8, tasa_error=0.2)})
+    with servicios:
+        cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from utilidades import httpclient
+
+# Configuración del logger
+logger = logging.getLogger("Simulador - Servicios")
+
+RUTA_FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test", "fixtures")
+
+SERVICIOS = ("bloomberg", "xe", "sbs", "superadmin", "modulo_tc", "gescom", "webhook")
+
+# Prefijo de ruta de cada servicio en el servidor local
+PREFIJOS = {
+    "/bloomberg/": "bloomberg",
+    "/xe/": "xe",
+    "/sbs": "sbs",
+    "/superadmin/": "superadmin",
+    "/modulo/": "modulo_tc",
+    "/gescom/": "gescom",
+    "/webhook": "webhook",
+}
+
+PAGINAS = {
+    "bloomberg": "bloomberg_usdpen.html",
+    "xe": "xe_usdpen.html",
+    "sbs": "sbs_tipocambio.html",
+}
+
+
+def leer_fixture(nombre):
+    """Contenido (bytes) de una página guardada en test/fixtures o de una ruta explícita."""
+    ruta = nombre if os.path.isabs(nombre) or os.path.exists(nombre) else os.path.join(RUTA_FIXTURES, nombre)
+    with open(ruta, "rb") as archivo:
+        return archivo.read()
+
+
+@dataclass
+class ConfigServicio:
+    """
+    Comportamiento de un servicio simulado.
+
+    :param latencia: Segundos de espera antes de responder.
+    :param variacion: Segundos aleatorios adicionales (uniforme entre 0 y variacion).
+    :param tasa_error: Probabilidad (0 a 1) de responder con estado_error.
+    :param estado_error: Código HTTP de las respuestas con error.
+    :param pagina: Ruta de un HTML que reemplaza la página guardada (Bloomberg, xe.com y SBS).
+    """
+    latencia: float = 0.0
+    variacion: float = 0.0
+    tasa_error: float = 0.0
+    estado_error: int = 503
+    pagina: Optional[str] = None
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Cabeceras y cuerpo se escriben por separado: sin esto Nagle + ACK diferido suman ~40 ms por respuesta
+    disable_nagle_algorithm = True
+
+    def _responder(self, cuerpo, estado=200, tipo="text/html; charset=utf-8", cabeceras=()):
+        self.send_response(estado)
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _json(self, datos, **kwargs):
+        self._responder(json.dumps(datos).encode(), tipo="application/json", **kwargs)
+
+    def _cuerpo(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+
+    def _simular(self, ruta):
+        """Aplica latencia y errores del servicio. Retorna False si ya se respondió con un error."""
+        servicios = self.server.servicios
+        servicio = next((nombre for prefijo, nombre in PREFIJOS.items() if ruta.startswith(prefijo)), None)
+        if servicio is None:
+            self._responder(b"", estado=404)
+            return False
+        servicios.contar(servicio)
+        config = servicios.config[servicio]
+        espera = config.latencia + (servicios.aleatorio.uniform(0, config.variacion) if config.variacion else 0)
+        if espera:
+            time.sleep(espera)
+        if config.tasa_error and servicios.aleatorio.random() < config.tasa_error:
+            servicios.contar(servicio, error=True)
+            self._responder(b"", estado=config.estado_error)
+            return False
+        return True
+
+    def do_GET(self):
+        servicios = self.server.servicios
+        ruta = urlsplit(self.path).path
+        if not self._simular(ruta):
+            return
+        if ruta.startswith("/bloomberg/"):
+            self._responder(servicios.paginas["bloomberg"])
+        elif ruta.startswith("/xe/"):
+            self._responder(servicios.paginas["xe"])
+        elif ruta == "/sbs":
+            self._responder(servicios.paginas["sbs"])
+        elif ruta == "/superadmin/get":
+            self._json(servicios.superadmin)
+        elif ruta == "/modulo/list":
+            with servicios.lock:
+                self._json({"dataExchage": servicios.modulo_tc[:1]})
+        else:
+            self._responder(b"", estado=404)
+
+    def do_POST(self):
+        servicios = self.server.servicios
+        ruta = urlsplit(self.path).path
+        cuerpo = self._cuerpo()
+        if not self._simular(ruta):
+            return
+        if ruta == "/superadmin/login":
+            self._json({"respuesta": "00", "nombres": "Bot"}, cabeceras=[("Set-Cookie", "PHPSESSID=local; path=/")])
+        elif ruta == "/superadmin/save":
+            datos = {k: v[0] for k, v in parse_qs(cuerpo).items()}
+            servicios.superadmin = {"status": 1, **datos}
+            self._json({"status": 1, "message": "Registrado"})
+        elif ruta == "/modulo/auth":
+            self._json({"data": "valid", "username": "bot"})
+        elif ruta == "/modulo/add":
+            tc = float(parse_qs(cuerpo)["exchangeRate"][0])
+            with servicios.lock:
+                servicios.modulo_tc.insert(0, {"exchangeRate": tc, "fecha": date.today().isoformat(),
+                                               "tc_compra": round(tc * 0.97, 4), "tc_venta": round(tc * 1.03, 4)})
+            self._json({"status": "ok"})
+        elif ruta in ("/gescom/exchangeRates", "/webhook"):
+            self._json({"ok": True})
+        else:
+            self._responder(b"", estado=404)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Los extractores en streaming cierran la conexión apenas encuentran el valor
+        pass
+
+
+class ServiciosSimulados:
+    def __init__(self, config: Optional[Dict[str, ConfigServicio]] = None, puerto: int = 0, semilla=None):
+        """
+        Servidor HTTP en 127.0.0.1 con las rutas de todos los sistemas externos.
+
+        :param config: ConfigServicio por servicio (ver SERVICIOS); los omitidos responden sin demora ni errores.
+        :param puerto: Puerto de escucha (0 = uno libre).
+        :param semilla: Semilla de la latencia y los errores aleatorios, para corridas reproducibles.
+        """
+        desconocidos = set(config or {}) - set(SERVICIOS)
+        if desconocidos:
+            raise ValueError(f"Servicios desconocidos: {sorted(desconocidos)}")
+        self.config = {nombre: ConfigServicio() for nombre in SERVICIOS}
+        self.config.update(config or {})
+        self.paginas = {
+            nombre: leer_fixture(self.config[nombre].pagina or archivo) for nombre, archivo in PAGINAS.items()
+        }
+        self.superadmin = {"status": 1, "buy": "0", "sell": "0"}
+        self.modulo_tc = []
+        self.peticiones = {nombre: 0 for nombre in SERVICIOS}
+        self.errores = {nombre: 0 for nombre in SERVICIOS}
+        self.aleatorio = random.Random(semilla)
+        self.lock = threading.Lock()
+        self.puerto = puerto
+        self._httpd = None
+        self._proxy_original = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def contar(self, servicio, error=False):
+        with self.lock:
+            (self.errores if error else self.peticiones)[servicio] += 1
+
+    def iniciar(self):
+        self._httpd = _Servidor(("127.0.0.1", self.puerto), _Manejador)
+        self._httpd.servicios = self
+        # Las URLs locales son http: sin esto AdvancedHTTPClient las enviaría al proxy por defecto
+        self._proxy_original = httpclient.PROXY_POR_DEFECTO
+        httpclient.PROXY_POR_DEFECTO = ""
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        logger.info(f"Servicios simulados escuchando en {self.url}")
+        return self
+
+    def detener(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+            httpclient.PROXY_POR_DEFECTO = self._proxy_original
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def urls(self):
+        """{(sección, clave): valor} de config.ini que apuntan a estos servicios."""
+        base = self.url
+        return {
+            ("fuentes_tc", "url_bloomberg"): f"{base}/bloomberg/quote/USDPEN:CUR",
+            ("fuentes_tc", "url_xe_com"): f"{base}/xe/currencyconverter/convert/?Amount=1&From=USD&To=PEN",
+            ("url", "url_superadmin"): f"{base}/superadmin",
+            ("url", "url_login"): "/login",
+            ("url", "url_tc_paypal_get"): "/get",
+            ("url", "url_tc_paypal_post"): "/save",
+            ("url", "url_sbs"): f"{base}/sbs",
+            ("api", "api_modulo_login"): f"{base}/modulo/auth",
+            ("api", "api_modulo_tc_add"): f"{base}/modulo/add",
+            ("api", "api_modulo_tc_get"): f"{base}/modulo/list",
+            ("api", "api_gescom_tc_sbs"): f"{base}/gescom/exchangeRates",
+            ("webhooks", "webhook_url"): f"{base}/webhook",
+            ("webhooks", "webhook_exception"): f"{base}/webhook",
+        }
+
+    def configurar(self, cfg, ruta_output):
+        """
+        Apunta todas las URLs de la configuración a estos servicios (sin proxy, cache, circuit breaker
+        ni límite de tasa: cada corrida consulta todos los servicios).
+
+        :param cfg: Configuración cargada (se modifica y se retorna).
+        :param ruta_output: Directorio para sesiones, histórico, trazas y métricas de la corrida.
+        """
+        for (seccion, clave), valor in self.urls().items():
+            cfg[seccion][clave] = valor
+        cfg["rutas"]["ruta_output"] = ruta_output
+        cfg["rutas"]["ruta_input"] = ruta_output
+        cfg["fuentes_tc"]["modo_descarga_bloomberg"] = "http"
+        cfg["proxy"]["url_proxy"] = ""
+        cfg["limite_tasa"]["tasa"] = "0"
+        cfg["cache"]["habilitado"] = "false"
+        cfg["circuito"]["habilitado"] = "false"
+        cfg["metricas"]["archivo_textfile"] = os.path.join(ruta_output, "metricas", "tipo_cambio.prom")
+        cfg["env_vars"] = {"super_admin_user": "bot", "super_admin_pwd": "local",
+                           "modulo_user": "bot", "modulo_pwd": "local"}
+        return cfg
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark del extractor de la SBS sobre páginas guardadas.
+
+Compara el extractor de un solo parseo con XPath precompilado contra el camino
+anterior (XPath recompilado + dos parseos con BeautifulSoup html.parser).
+
+Uso: python test/benchmarks/bench_sbs.py [iteraciones]
+"""
+
+import logging
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from lxml import html  # noqa: E402
+
+from modulos.bot_05_tc_sbs import parsear_tipo_cambio_sbs  # noqa: E402
+
+RUTA_FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+PAGINAS = ["sbs_tipocambio.html", "sbs_tipocambio_span.html"]
+
+
+def extraer_sbs_anterior(contenido):
+    """Copia del camino de extracción anterior, conservada solo como referencia de comparación."""
+    tipo_cambio_compra = None
+    tipo_cambio_venta = None
+    try:
+        tree = html.fromstring(contenido)
+        dolar_row = tree.xpath("//td[contains(text(), 'Dólar de N.A.')]/parent::tr")
+        if dolar_row:
+            compra_element = dolar_row[0].xpath(".//td[2]")
+            venta_element = dolar_row[0].xpath(".//td[3]")
+            if compra_element:
+                tipo_cambio_compra = compra_element[0].text_content().strip()
+            if venta_element:
+                tipo_cambio_venta = venta_element[0].text_content().strip()
+            if tipo_cambio_compra and tipo_cambio_venta:
+                return tipo_cambio_venta, tipo_cambio_compra
+    except Exception:
+        pass
+
+    soup = BeautifulSoup(contenido, "html.parser")
+    dolar_row = soup.find("td", string=lambda text: text and "Dólar de N.A." in text)
+    if dolar_row and dolar_row.parent:
+        celdas = dolar_row.parent.find_all("td")
+        if len(celdas) >= 3:
+            tipo_cambio_compra = celdas[1].text.strip()
+            tipo_cambio_venta = celdas[2].text.strip()
+            if tipo_cambio_compra and tipo_cambio_venta:
+                return tipo_cambio_venta, tipo_cambio_compra
+
+    tabla = soup.find("table", class_="rgMasterTable")
+    if tabla:
+        for fila in tabla.find_all("tr"):
+            celdas = fila.find_all("td")
+            if celdas and len(celdas) >= 3 and "Dólar de N.A." in celdas[0].text:
+                return celdas[2].text.strip(), celdas[1].text.strip()
+    return None, None
+
+
+def medir(funcion, contenido, iteraciones):
+    """Retorna el tiempo promedio por llamada en milisegundos (mejor de 3 repeticiones)."""
+    tiempos = timeit.repeat(lambda: funcion(contenido), number=iteraciones, repeat=3)
+    return min(tiempos) / iteraciones * 1000
+
+
+def main(iteraciones=50):
+    logging.disable(logging.CRITICAL)
+    print(f"{'Página':<28} {'Anterior (ms)':>14} {'Nuevo (ms)':>12} {'Mejora':>8}")
+    for pagina in PAGINAS:
+        with open(os.path.join(RUTA_FIXTURES, pagina), "rb") as archivo:
+            contenido = archivo.read()
+
+        esperado = extraer_sbs_anterior(contenido)
+        obtenido = parsear_tipo_cambio_sbs(contenido)
+        assert obtenido == esperado, f"{pagina}: {obtenido} != {esperado}"
+
+        anterior = medir(extraer_sbs_anterior, contenido, iteraciones)
+        nuevo = medir(parsear_tipo_cambio_sbs, contenido, iteraciones)
+        print(f"{pagina:<28} {anterior:>14.3f} {nuevo:>12.3f} {anterior / nuevo:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks offline: extractores (Bloomberg, xe.com, SBS), cálculo del Bot 02 y
+una ejecución completa de main.main contra los servicios simulados
+(paquete simulador).
+
+Los tiempos se guardan en baseline.json relativos a una carga de calibración medida en
+la misma corrida, de modo que la línea base sirve en máquinas de distinta velocidad. Un
+caso más lento que su línea base por encima de la tolerancia es una regresión y el
+script termina con código 1.
+
+Uso:
+    python test/benchmarks/bench_suite.py                  # compara contra baseline.json
+    python test/benchmarks/bench_suite.py --actualizar     # regraba la línea base
+    python test/benchmarks/bench_suite.py --casos sbs_lxml calculo_pares
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import timeit
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from config.config import cargar_configuracion  # noqa: E402
+from modulos.bot_01_tc_bloomberg import OBJETIVO_BLOOMBERG, OBJETIVO_XE, _parsear_xe, parsear_bloomberg  # noqa: E402
+from modulos.bot_02_calcular_tc import calcular_pares  # noqa: E402
+from modulos.bot_05_tc_sbs import OBJETIVO_SBS, parsear_tipo_cambio_sbs  # noqa: E402
+from simulador.servicios import ServiciosSimulados, leer_fixture  # noqa: E402
+from utilidades.extraccion_streaming import extraer_en_streaming  # noqa: E402
+
+RUTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+RUTA_BASELINE = os.path.join(RUTA_BENCHMARKS, "baseline.json")
+TOLERANCIA = 1.0
+
+
+def _bloques(contenido, tamano=16 * 1024):
+    return (contenido[i:i + tamano] for i in range(0, len(contenido), tamano))
+
+
+def _calibracion():
+    """Carga fija de CPU (Python puro) que sirve de unidad para las líneas base."""
+    return sum(i * i % 7 for i in range(200000))
+
+
+def _ejecutar_main(servicios, ruta_output):
+    """Corre main.main con el Bot 00 y la limpieza de procesos reemplazados por la configuración local."""
+    import main
+    from utilidades.httpclient import configurar_limite_tasa
+
+    cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+    configurar_limite_tasa(cfg)
+    originales = main.Bot_00_Configuracion, main.Limpieza, main.ejecutar_pipeline
+    resultados = {}
+
+    def ejecutar_pipeline(cfg, sin_cache=False):
+        resultados["ultimo"] = originales[2](cfg, sin_cache)
+        return resultados["ultimo"]
+
+    main.Bot_00_Configuracion, main.Limpieza, main.ejecutar_pipeline = (lambda: cfg), (lambda procesos: None), ejecutar_pipeline
+    try:
+        main.main()
+    finally:
+        main.Bot_00_Configuracion, main.Limpieza, main.ejecutar_pipeline = originales
+    por_etapa, contexto = resultados["ultimo"]
+    return {nombre: r.estado for nombre, r in por_etapa.items()}, contexto
+
+
+def construir_casos(iteraciones):
+    """
+    Casos del benchmark: nombre -> (función sin argumentos, número de llamadas por medición, validar).
+
+    validar recibe el resultado de una llamada y lanza AssertionError si no es el esperado,
+    para que la suite no mida un extractor que dejó de encontrar el valor.
+    """
+    bloomberg = leer_fixture("bloomberg_usdpen.html")
+    xe = leer_fixture("xe_usdpen.html")
+    sbs = leer_fixture("sbs_tipocambio.html")
+    respuesta_xe = SimpleNamespace(status_code=200, text=xe.decode("utf-8"))
+    cfg = cargar_configuracion()
+    # Todos los pares configurados, no solo los activos
+    tipos_cambio = {par: float(cfg["pares"][par].get("inicial", 3.0)) * 1.2 for par in cfg["pares"].sections}
+
+    def xe_bs4():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return _parsear_xe(respuesta_xe)
+
+    def igual(esperado):
+        def validar(obtenido):
+            assert obtenido == esperado, f"{obtenido!r} != {esperado!r}"
+        return validar
+
+    def todos_los_pares(obtenido):
+        assert obtenido.keys() == tipos_cambio.keys(), f"pares calculados: {list(obtenido)}"
+
+    return {
+        "bloomberg_lxml": (lambda: parsear_bloomberg(bloomberg), iteraciones, igual("3.7512")),
+        "bloomberg_streaming": (lambda: extraer_en_streaming(_bloques(bloomberg), OBJETIVO_BLOOMBERG)[0],
+                                iteraciones, igual("3.7512")),
+        "xe_bs4": (xe_bs4, iteraciones, igual("3.7461234")),
+        "xe_streaming": (lambda: extraer_en_streaming(_bloques(xe), OBJETIVO_XE)[0], iteraciones, igual("3.7461234")),
+        "sbs_lxml": (lambda: parsear_tipo_cambio_sbs(sbs), iteraciones, igual(parsear_tipo_cambio_sbs(sbs))),
+        "sbs_streaming": (lambda: extraer_en_streaming(_bloques(sbs), OBJETIVO_SBS)[0], iteraciones,
+                          igual(parsear_tipo_cambio_sbs(sbs))),
+        "calculo_pares": (lambda: calcular_pares(tipos_cambio, cfg), iteraciones * 20, todos_los_pares),
+        "pipeline_main": (None, max(3, iteraciones // 4), None),
+    }
+
+
+def medir(funcion, numero):
+    """Tiempo por llamada en segundos (mejor de 5 repeticiones)."""
+    return min(timeit.repeat(funcion, number=numero, repeat=5)) / numero
+
+
+def medir_pipeline(numero):
+    """Tiempo por ejecución de main.main contra los servicios locales; valida que todas las etapas terminen bien."""
+    tiempos = []
+    with ServiciosSimulados() as servicios, tempfile.TemporaryDirectory() as ruta_output:
+        for _ in range(numero + 1):
+            inicio = time.perf_counter()
+            estados, _ = _ejecutar_main(servicios, ruta_output)
+            tiempos.append(time.perf_counter() - inicio)
+            fallidas = [nombre for nombre, estado in estados.items() if estado != "ok"]
+            assert not fallidas, f"etapas fallidas: {fallidas}"
+    # La primera corrida paga importaciones y conexiones nuevas
+    return min(tiempos[1:])
+
+
+def ejecutar(casos=None, iteraciones=20):
+    """
+    Ejecuta los casos y retorna {caso: {"segundos": ..., "relativo": ...}} y la calibración en segundos.
+    """
+    definidos = construir_casos(iteraciones)
+    casos = casos or list(definidos)
+    resultados = {}
+    calibraciones = []
+    for nombre in casos:
+        funcion, numero, validar = definidos[nombre]
+        # La calibración se mide junto a cada caso para seguir la carga actual de la máquina
+        calibracion = medir(_calibracion, 3)
+        if nombre == "pipeline_main":
+            segundos = medir_pipeline(numero)
+        else:
+            validar(funcion())
+            segundos = medir(funcion, numero)
+        calibracion = min(calibracion, medir(_calibracion, 3))
+        calibraciones.append(calibracion)
+        resultados[nombre] = {"segundos": segundos, "relativo": segundos / calibracion}
+    return resultados, min(calibraciones)
+
+
+def comparar(resultados, baseline, tolerancia=TOLERANCIA):
+    """Lista de (caso, relativo actual, relativo de la línea base) de los casos que empeoraron."""
+    regresiones = []
+    for nombre, resultado in resultados.items():
+        base = baseline.get("casos", {}).get(nombre)
+        if base is not None and resultado["relativo"] > base * (1 + tolerancia):
+            regresiones.append((nombre, resultado["relativo"], base))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks offline del proceso de tipo de cambio")
+    parser.add_argument("--casos", nargs="*", help="Casos a ejecutar (por defecto todos)")
+    parser.add_argument("--iteraciones", type=int, default=20, help="Llamadas por medición de los extractores")
+    parser.add_argument("--tolerancia", type=float, default=None,
+                        help=f"Empeoramiento admitido sobre la línea base (por defecto el de baseline.json o {TOLERANCIA})")
+    parser.add_argument("--actualizar", action="store_true", help="Graba los resultados como nueva línea base")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    resultados, calibracion = ejecutar(args.casos, args.iteraciones)
+    logging.disable(logging.NOTSET)
+
+    baseline = {}
+    if os.path.exists(RUTA_BASELINE):
+        with open(RUTA_BASELINE, encoding="utf-8") as archivo:
+            baseline = json.load(archivo)
+    tolerancia = args.tolerancia if args.tolerancia is not None else baseline.get("tolerancia", TOLERANCIA)
+
+    print(f"Calibración: {calibracion * 1000:.2f} ms")
+    print(f"{'Caso':<22} {'ms':>10} {'Relativo':>10} {'Base':>10}")
+    for nombre, resultado in resultados.items():
+        base = baseline.get("casos", {}).get(nombre)
+        base_texto = f"{base:>10.3f}" if base is not None else f"{'-':>10}"
+        print(f"{nombre:<22} {resultado['segundos'] * 1000:>10.3f} {resultado['relativo']:>10.3f} {base_texto}")
+
+    if args.actualizar:
+        casos = dict(baseline.get("casos", {}))
+        casos.update({nombre: round(r["relativo"], 6) for nombre, r in resultados.items()})
+        with open(RUTA_BASELINE, "w", encoding="utf-8") as archivo:
+            json.dump({"tolerancia": tolerancia, "casos": casos}, archivo, indent=2, sort_keys=True)
+            archivo.write("\n")
+        print(f"Línea base actualizada: {RUTA_BASELINE}")
+        return 0
+
+    regresiones = comparar(resultados, baseline, tolerancia)
+    if regresiones:
+        # Se confirma con una segunda medición para no fallar por un pico de carga de la máquina
+        logging.disable(logging.CRITICAL)
+        repeticion, _ = ejecutar([nombre for nombre, _, _ in regresiones], args.iteraciones)
+        logging.disable(logging.NOTSET)
+        for nombre, resultado in repeticion.items():
+            if resultado["relativo"] < resultados[nombre]["relativo"]:
+                resultados[nombre] = resultado
+        regresiones = comparar({nombre: resultados[nombre] for nombre in repeticion}, baseline, tolerancia)
+    for nombre, relativo, base in regresiones:
+        print(f"REGRESIÓN {nombre}: {relativo:.3f} vs línea base {base:.3f} (+{(relativo / base - 1) * 100:.0f}%)",
+              file=sys.stderr)
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
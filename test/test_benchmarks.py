@@ -0,0 +1,39 @@
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import bench_suite  # noqa: E402
+from simulador.servicios import ServiciosSimulados  # noqa: E402
+
+# pytest -v test/test_benchmarks.py
+# Solo verifica que los casos sigan encontrando los valores y corran sin red; los tiempos
+# se comparan con python test/benchmarks/bench_suite.py
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+@pytest.mark.parametrize("caso", [c for c in bench_suite.construir_casos(1) if c != "pipeline_main"])
+def test_casos_de_extraccion(caso):
+    funcion, _, validar = bench_suite.construir_casos(1)[caso]
+    validar(funcion())
+
+def test_pipeline_main_offline():
+    with ServiciosSimulados() as servicios, tempfile.TemporaryDirectory() as ruta_output:
+        estados, contexto = bench_suite._ejecutar_main(servicios, ruta_output)
+        assert set(estados.values()) == {"ok"}
+        # Bloomberg (3.7512), xe.com (3.7461234) o la mediana si ambas llegaron juntas
+        assert 3.746 <= contexto["tipo_cambio_bloomberg"] <= 3.7512
+        assert servicios.modulo_tc[0]["exchangeRate"] == contexto["tipo_cambio_bloomberg"]
+
+def test_comparar_detecta_regresion():
+    resultados = {"sbs_lxml": {"relativo": 0.5}, "xe_streaming": {"relativo": 0.05}}
+    baseline = {"casos": {"sbs_lxml": 0.05, "xe_streaming": 0.05}}
+    assert bench_suite.comparar(resultados, baseline, tolerancia=1.0) == [("sbs_lxml", 0.5, 0.05)]
@@ -5,10 +5,12 @@ Test script para verificar las correcciones del bot de Bloomberg.
 
 import sys
 import os
+import tempfile
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from modulos.bot_01_tc_bloomberg import is_valid_exchange_rate, limpiar_tipo_cambio, extrer_tipo_cambio_bloomberg
 from config.config import cargar_configuracion
+from simulador.servicios import ServiciosSimulados
 import logging
 
 # Configurar logging básico para las pruebas
@@ -29,14 +31,15 @@ def test_is_valid_exchange_rate():
         "4.20",
         "USD 3.45",
         "3.45 PEN",
-        "$3.45"
+        "$3.45",
+        "3.456",  # Bloomberg publica 4 decimales (ej. 3.7512) y xe.com más
+        "3.7512"
     ]
     
     # Casos inválidos
     invalid_cases = [
         "abc",
         "123",
-        "3.456",  # Más de 2 decimales
         "0.5",    # Muy bajo
         "15.0",   # Muy alto
         "",       # Vacío
@@ -69,14 +72,14 @@ def test_limpiar_tipo_cambio():
         ("USD 3.45", 3.45),
         ("3.45 PEN", 3.45),
         ("$3.45", 3.45),
-        ("3.50", 3.50)
+        ("3.50", 3.50),
+        ("3.456", 3.456)
     ]
     
     # Casos inválidos
     invalid_cases = [
         "abc",
         "123",
-        "3.456",
         "0.5",
         "15.0",
         "",
@@ -100,36 +103,25 @@ def test_limpiar_tipo_cambio():
     print("✅ Todas las pruebas de limpieza pasaron")
 
 def test_bloomberg_extraction():
-    """Prueba la extracción del tipo de cambio de Bloomberg"""
-    try:
-        print("=== PRUEBA DE EXTRACCIÓN DE BLOOMBERG ===")
-        
-        # Obtener configuración
-        cfg = get_config()
+    """Prueba la extracción del tipo de cambio de Bloomberg contra la página guardada (sin red)"""
+    print("=== PRUEBA DE EXTRACCIÓN DE BLOOMBERG ===")
+
+    with ServiciosSimulados() as servicios, tempfile.TemporaryDirectory() as ruta_output:
+        cfg = servicios.configurar(get_config(), ruta_output)
         print(f"URL de Bloomberg: {cfg['fuentes_tc']['url_bloomberg']}")
-        
-        # Intentar extraer el tipo de cambio
-        print("\nIniciando extracción...")
         tipo_cambio = extrer_tipo_cambio_bloomberg(cfg)
-        
-        if tipo_cambio:
-            print(f"\n✅ ÉXITO: Tipo de cambio extraído: {tipo_cambio}")
-            return True
-        else:
-            print("\n❌ ERROR: No se pudo extraer el tipo de cambio")
-            return False
-            
-    except Exception as e:
-        print(f"\n❌ ERROR: {e}")
-        return False
+
+    assert tipo_cambio == "3.7512", f"Se esperaba '3.7512', se obtuvo {tipo_cambio!r}"
+    assert limpiar_tipo_cambio(tipo_cambio) == 3.7512
+    print(f"✅ Tipo de cambio extraído: {tipo_cambio}")
 
 if __name__ == "__main__":
     try:
         test_is_valid_exchange_rate()
         test_limpiar_tipo_cambio()
-        success = test_bloomberg_extraction()
+        test_bloomberg_extraction()
         print("\n🎉 Todas las pruebas pasaron exitosamente!")
-        sys.exit(0 if success else 1)
+        sys.exit(0)
     except Exception as e:
         print(f"\n❌ Error en las pruebas: {e}")
         sys.exit(1) 
\ No newline at end of file
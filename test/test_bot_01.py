@@ -1,19 +1,61 @@
+import logging
+import os
+import tempfile
+
+import pytest
+
 import modulos.bot_01_tc_bloomberg as Bot_01
+from config.config import cargar_configuracion
+from simulador.servicios import ConfigServicio, ServiciosSimulados
+from utilidades.contexto import ContextoEtapa
+from utilidades.httpclient import configurar_limite_tasa
 
 # pytest -v <- Ejecutar todos los tests
 # pytest -v test/test_bot_01.py <- Ejecutar tests del archivo
-# pytest -v test/test_bot_01.py::test_hola_mundo <- Ejecutar unico test
+# pytest -v test/test_bot_01.py::test_parsear_pagina_guardada <- Ejecutar unico test
+
+RUTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Bloomberg y xe.com no disponibles (404 no se reintenta en el cliente HTTP)
+CAIDA = ConfigServicio(tasa_error=1.0, estado_error=404)
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+def _ejecutar(config=None, por_pares=False):
+    with ServiciosSimulados(config) as servicios, tempfile.TemporaryDirectory() as ruta_output:
+        cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+        configurar_limite_tasa(cfg)
+        if por_pares:
+            cfg["pares"]["activos"] = "USDPEN, EURPEN"
+            cfg["pares"]["EURPEN"]["url_bloomberg"] = servicios.url + "/bloomberg/quote/EURPEN:CUR"
+            cfg["pares"]["EURPEN"]["url_xe_com"] = servicios.url + "/xe/currencyconverter/convert/?From=EUR"
+        contexto = ContextoEtapa()
+        resultado, _ = Bot_01.bot_run(cfg, contexto)
+    return resultado, contexto.salidas
+
+def test_parsear_pagina_guardada():
+    with open(os.path.join(RUTA_FIXTURES, "bloomberg_usdpen.html"), "rb") as archivo:
+        assert Bot_01.parsear_bloomberg(archivo.read()) == "3.7512"
+
+def test_bloomberg_secuencial():
+    resultado, salidas = _ejecutar()
+    assert resultado and salidas == {"tipo_cambio_bloomberg": 3.7512}
 
-def test_hola_mundo():
-    assert Bot_01.hola_mundo() == "Hola mundo"
+def test_respaldo_xe_secuencial():
+    resultado, salidas = _ejecutar({"bloomberg": CAIDA})
+    assert resultado and salidas["tipo_cambio_bloomberg"] == pytest.approx(3.7461234)
 
-def test_hola_error():
-    try:
-        Bot_01.hola_error()
-    except Exception as e:
-        assert str(e) == "Error de negocio - Hola error"
+def test_sin_fuentes_disponibles():
+    resultado, salidas = _ejecutar({"bloomberg": CAIDA, "xe": CAIDA})
+    assert not resultado and salidas == {}
 
-def test_hola_api():
-    # Validar estado 200 de la API
-    res, status = Bot_01.hola_api("https://api.nationalize.io/?name=nathaniel")
-    assert status == 200
\ No newline at end of file
+def test_por_pares_secuencial_por_par():
+    resultado, salidas = _ejecutar({"xe": ConfigServicio(latencia=0.2)}, por_pares=True)
+    assert resultado
+    # Sin modo_concurrente cada par sigue la cadena Bloomberg -> xe.com
+    assert salidas["tipos_cambio_pares"] == {"USDPEN": 3.7512, "EURPEN": 3.7512}
+    assert salidas["tipo_cambio_bloomberg"] == 3.7512
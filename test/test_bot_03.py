@@ -0,0 +1,92 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from modulos.bot_03_super_admin import ClienteSuperAdmin
+from modulos.bot_03_super_admin import bot_run as Bot_03_SuperAdmin
+from utilidades.contexto import ContextoEjecucion, ContextoEtapa
+
+# pytest -v test/test_bot_03.py
+
+class _SuperAdmin(BaseHTTPRequestHandler):
+    llamadas = []
+    registrado = {"status": 1, "buy": "3.6375", "sell": "3.8625"}
+    sesion_valida = True
+
+    def _json(self, datos, estado=200, cabeceras=()):
+        cuerpo = json.dumps(datos).encode()
+        self.send_response(estado)
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _autenticado(self):
+        cls = type(self)
+        if cls.sesion_valida and "PHPSESSID=abc" in self.headers.get("Cookie", ""):
+            return True
+        self._json({}, estado=401)
+        return False
+
+    def do_POST(self):
+        cls = type(self)
+        cls.llamadas.append(("POST", self.path))
+        cuerpo = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        if self.path == "/login":
+            cls.sesion_valida = True
+            self._json({"respuesta": "00", "nombres": "Bot"}, cabeceras=[("Set-Cookie", "PHPSESSID=abc; path=/")])
+        elif self._autenticado():
+            datos = {k: v[0] for k, v in parse_qs(cuerpo).items()}
+            cls.registrado = {"status": 1, **datos}
+            self._json({"status": 1, "message": "ok"})
+
+    def do_GET(self):
+        type(self).llamadas.append(("GET", self.path))
+        if self._autenticado():
+            self._json(type(self).registrado)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def cfg(tmp_path):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _SuperAdmin)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    _SuperAdmin.llamadas = []
+    yield {
+        "url": {"url_superadmin": f"http://127.0.0.1:{httpd.server_address[1]}", "url_login": "/login",
+                "url_tc_paypal_get": "/get", "url_tc_paypal_post": "/save"},
+        "env_vars": {"super_admin_user": "u", "super_admin_pwd": "p"},
+        "rutas": {"ruta_output": str(tmp_path)},
+    }
+    httpd.shutdown()
+
+def _contexto(compra, venta):
+    return ContextoEtapa(ContextoEjecucion({"tipo_cambio_compra": compra, "tipo_cambio_venta": venta}))
+
+def test_publicacion_repetida_es_un_solo_get(cfg):
+    _SuperAdmin.registrado = {"status": 1, "buy": "3.5", "sell": "3.9"}
+    resultado, _ = Bot_03_SuperAdmin(cfg, _contexto("3.6375", "3.8625"))
+    assert resultado
+    assert [m for m, _ in _SuperAdmin.llamadas] == ["POST", "GET", "POST"]
+
+    # Segunda ejecución: cookie en disco y el servidor ya tiene el valor
+    _SuperAdmin.llamadas = []
+    contexto = _contexto("3.6375", "3.8625")
+    resultado, _ = Bot_03_SuperAdmin(cfg, contexto)
+    assert resultado
+    assert _SuperAdmin.llamadas == [("GET", "/get")]
+    assert contexto.salidas["publicacion_superadmin"]["sin_cambios"]
+
+def test_reinicia_sesion_ante_401(cfg):
+    ClienteSuperAdmin(cfg).iniciar_sesion()
+    _SuperAdmin.sesion_valida = False
+    _SuperAdmin.llamadas = []
+    cliente = ClienteSuperAdmin(cfg)
+    assert cliente.obtener_tipo_cambio() is not None
+    assert _SuperAdmin.llamadas == [("GET", "/get"), ("POST", "/login"), ("GET", "/get")]
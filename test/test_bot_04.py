@@ -0,0 +1,112 @@
+import json
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from modulos import bot_04_modulo_tc
+from modulos.bot_04_modulo_tc import bot_run as Bot_04_ModuloTC
+from utilidades.contexto import ContextoEjecucion, ContextoEtapa
+
+# pytest -v test/test_bot_04.py
+
+class _ModuloTC(BaseHTTPRequestHandler):
+    llamadas = []
+    registros = []
+    demora = 0
+
+    def _json(self, datos, estado=200, cabeceras=()):
+        cuerpo = json.dumps(datos).encode()
+        self.send_response(estado)
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_POST(self):
+        cls = type(self)
+        cls.llamadas.append(("POST", self.path))
+        cuerpo = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        if self.path == "/login":
+            self._json({"data": "valid", "username": "bot"}, cabeceras=[("Set-Cookie", "sid=abc; path=/")])
+        else:
+            tc = cuerpo["exchangeRate"][0]
+            cls.registros.insert(0, {"exchangeRate": tc, "fecha": date.today().isoformat(),
+                                     "tc_compra": "3.70", "tc_venta": "3.80"})
+            self._json({"status": "ok"})
+
+    def do_GET(self):
+        cls = type(self)
+        cls.llamadas.append(("GET", self.path))
+        if cls.demora:
+            threading.Event().wait(cls.demora)
+        limite = parse_qs(urlsplit(self.path).query).get("limit")
+        registros = cls.registros[:int(limite[0])] if limite else cls.registros
+        self._json({"dataExchage": registros})
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def cfg():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _ModuloTC)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    _ModuloTC.llamadas = []
+    _ModuloTC.demora = 0
+    _ModuloTC.registros = [{"exchangeRate": "3.70", "fecha": "2024-01-02", "tc_compra": "3.6", "tc_venta": "3.7"}] * 5
+    bot_04_modulo_tc._clientes.clear()
+    yield {
+        "api": {"api_modulo_login": base + "/login", "api_modulo_tc_add": base + "/add", "api_modulo_tc_get": base + "/get"},
+        "env_vars": {"modulo_user": "u", "modulo_pwd": "p"},
+        "modulo_tc": {"consulta_ultimo": "limit=1", "timeout_lectura": "0.2"},
+    }
+    httpd.shutdown()
+
+def _contexto(tc):
+    return ContextoEtapa(ContextoEjecucion({"tipo_cambio_bloomberg": tc}))
+
+def test_registro_repetido_no_envia_add(cfg):
+    contexto = _contexto(3.75)
+    resultado, _ = Bot_04_ModuloTC(cfg, contexto)
+    assert resultado
+    assert _ModuloTC.llamadas == [("POST", "/login"), ("GET", "/get?limit=1"), ("POST", "/add"), ("GET", "/get?limit=1")]
+    assert contexto.salidas["tipo_cambio_modulo_venta"] == "3.80"
+
+    # Segunda ejecución en el mismo proceso: sesión reutilizada y sin registro duplicado
+    _ModuloTC.llamadas = []
+    resultado, mensaje = Bot_04_ModuloTC(cfg, _contexto("3.750"))
+    assert resultado
+    assert "ya registrado" in mensaje
+    assert _ModuloTC.llamadas == [("GET", "/get?limit=1")]
+
+def test_mismo_valor_de_otro_dia_se_registra(cfg):
+    resultado, _ = Bot_04_ModuloTC(cfg, _contexto("3.70"))
+    assert resultado
+    assert ("POST", "/add") in _ModuloTC.llamadas
+
+def test_timeout_de_lectura(cfg):
+    _ModuloTC.demora = 1
+    resultado, mensaje = Bot_04_ModuloTC(cfg, _contexto(3.75))
+    assert not resultado
+    assert "no respondió a tiempo" in mensaje
+
+def test_registro_sin_campos_configurados_se_registra(cfg):
+    # Registro con la forma que lee el bot (tc_compra / tc_venta) sin los campos de tipo de cambio
+    # y fecha configurados: no se puede confirmar el duplicado, así que se registra
+    _ModuloTC.registros = [{"id": 41, "tc_compra": "3.6500", "tc_venta": "3.7500", "usuario": "u"}]
+    resultado, mensaje = Bot_04_ModuloTC(cfg, _contexto("3.70"))
+    assert resultado and "ya registrado" not in mensaje
+    assert ("POST", "/add") in _ModuloTC.llamadas
+
+def test_campos_configurables(cfg):
+    cfg["modulo_tc"].update({"campos_tipo_cambio": "tipoCambio", "campos_fecha": "fechaRegistro"})
+    _ModuloTC.registros = [{"tipoCambio": 3.7, "fechaRegistro": f"{date.today().isoformat()} 08:15:00",
+                            "tc_compra": "3.6", "tc_venta": "3.8"}]
+    resultado, mensaje = Bot_04_ModuloTC(cfg, _contexto("3.70"))
+    assert resultado and "ya registrado" in mensaje
+    assert ("POST", "/add") not in _ModuloTC.llamadas
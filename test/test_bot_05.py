@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+import pytest
+
+from config.config import cargar_configuracion
+from modulos.bot_05_tc_sbs import extraer_tipo_cambio_sbs, parsear_tipo_cambio_sbs
+from simulador.servicios import ConfigServicio, ServiciosSimulados
+
+# pytest -v test/test_bot_05.py
+
+RUTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+@pytest.mark.parametrize("pagina", ["sbs_tipocambio.html", "sbs_tipocambio_span.html"])
+def test_parsear_pagina_guardada(pagina):
+    with open(os.path.join(RUTA_FIXTURES, pagina), "rb") as archivo:
+        assert parsear_tipo_cambio_sbs(archivo.read()) == ("3.748", "3.741")
+
+def test_parsear_sin_fila_dolar():
+    assert parsear_tipo_cambio_sbs(b"<html><body><table><tr><td>Euro</td></tr></table></body></html>") == (None, None)
+
+def test_streaming_con_respaldo_xpath(tmp_path):
+    # Página en latin-1 (declarado en <meta>) servida con charset=utf-8 en la cabecera: el
+    # parser en streaming no reconoce "Dólar de N.A."; las estrategias XPath sí, con el <meta>
+    with open(os.path.join(RUTA_FIXTURES, "sbs_tipocambio.html"), encoding="utf-8") as archivo:
+        texto = archivo.read().replace("charset=utf-8", "charset=iso-8859-1")
+    pagina = tmp_path / "sbs_latin1.html"
+    pagina.write_bytes(texto.encode("latin-1"))
+
+    with ServiciosSimulados({"sbs": ConfigServicio(pagina=str(pagina))}) as servicios, \
+            tempfile.TemporaryDirectory() as ruta_output:
+        cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+        cfg["extraccion"]["streaming"] = "true"
+        assert extraer_tipo_cambio_sbs(cfg) == ("3.748", "3.741")
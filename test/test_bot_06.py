@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from modulos import bot_06_gescom_cargar_tc
+from modulos.bot_06_gescom_cargar_tc import cargar_lote_gescom, leer_registros
+from utilidades.excepciones import BusinessException
+
+# pytest -v test/test_bot_06.py
+
+class _Gescom(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    recibidos = []
+    conexiones = set()
+    en_curso = 0
+    maximo_en_curso = 0
+    rechazar = ()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        cls = type(self)
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with cls.lock:
+            cls.conexiones.add(self.client_address)
+            cls.en_curso += 1
+            cls.maximo_en_curso = max(cls.maximo_en_curso, cls.en_curso)
+        time.sleep(0.02)
+        with cls.lock:
+            cls.en_curso -= 1
+            cls.recibidos.append(payload)
+        estado = 500 if payload["fecha"] in cls.rechazar else 200
+        self.send_response(estado)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def cfg():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Gescom)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    _Gescom.recibidos, _Gescom.conexiones, _Gescom.maximo_en_curso, _Gescom.rechazar = [], set(), 0, ()
+    bot_06_gescom_cargar_tc._sesion = None
+    yield {
+        "api": {"api_gescom_tc_sbs": f"http://127.0.0.1:{httpd.server_address[1]}/exchangeRates"},
+        "gescom": {"tamano_lote": "5", "concurrencia": "3"},
+    }
+    httpd.shutdown()
+    bot_06_gescom_cargar_tc._sesion = None
+
+def _mes():
+    return [(f"2024-03-{dia:02d}", "3.70", "3.75") for dia in range(1, 31)]
+
+def test_carga_un_mes_con_concurrencia_acotada(cfg):
+    _Gescom.rechazar = ("2024-03-07",)
+    resultados = cargar_lote_gescom(cfg, _mes())
+    assert [r["fecha"] for r in resultados] == [f for f, _, _ in _mes()]
+    assert [r["fecha"] for r in resultados if not r["ok"]] == ["2024-03-07"]
+    assert len(_Gescom.recibidos) == 30
+    assert _Gescom.maximo_en_curso <= 3
+    # keep-alive: las conexiones se reutilizan entre registros
+    assert len(_Gescom.conexiones) <= 3
+
+def test_lote_fallido_detiene_la_carga(cfg):
+    _Gescom.rechazar = tuple(f for f, _, _ in _mes())
+    resultados = cargar_lote_gescom(cfg, _mes())
+    assert len(resultados) == 30
+    assert len(_Gescom.recibidos) == 5
+    assert resultados[-1]["mensaje"] == "No enviado"
+
+def test_leer_registros(tmp_path):
+    archivo = tmp_path / "tc.csv"
+    archivo.write_text("fecha,compra,venta\n2024-03-01,3.70,3.75\n\n2024-03-02, 3.71 ,3.76\n", encoding="utf-8")
+    assert leer_registros(archivo) == [("2024-03-01", "3.70", "3.75"), ("2024-03-02", "3.71", "3.76")]
+    archivo.write_text("2024-13-01,3.70,3.75\n", encoding="utf-8")
+    with pytest.raises(BusinessException):
+        leer_registros(archivo)
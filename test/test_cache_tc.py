@@ -0,0 +1,63 @@
+import time
+
+from utilidades.cache_tc import CacheTipoCambio, consultar_con_revalidacion, obtener_cache
+
+# pytest -v test/test_cache_tc.py
+
+def test_guardar_y_obtener(tmp_path):
+    cache = CacheTipoCambio(str(tmp_path / "cache.sqlite"))
+    cache.guardar("sbs", [3.748, 3.741])
+    assert cache.obtener("sbs", ttl=60) == [3.748, 3.741]
+    assert cache.obtener("bloomberg", ttl=60) is None
+
+def test_valor_vencido(tmp_path, monkeypatch):
+    cache = CacheTipoCambio(str(tmp_path / "cache.sqlite"))
+    cache.guardar("bloomberg", 3.75)
+    ahora = time.time()
+    monkeypatch.setattr(time, "time", lambda: ahora + 120)
+    assert cache.obtener("bloomberg", ttl=60) is None
+
+def test_fecha_de_negocio_distinta(tmp_path):
+    cache = CacheTipoCambio(str(tmp_path / "cache.sqlite"))
+    cache.guardar("bloomberg", 3.75, fecha="2026-01-01")
+    assert cache.obtener("bloomberg", ttl=10**9, fecha="2026-01-02") is None
+
+def test_omitir_cache(tmp_path):
+    cfg = {"rutas": {"ruta_output": str(tmp_path)}, "cache": {"habilitado": "true", "omitir": "true"}}
+    assert obtener_cache(cfg) is None
+    cfg["cache"]["omitir"] = "false"
+    assert obtener_cache(cfg) is not None
+
+class _Respuesta:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.cerrada = False
+
+    def close(self):
+        self.cerrada = True
+
+def test_revalidacion_reutiliza_valor_en_304(tmp_path):
+    cache = CacheTipoCambio(str(tmp_path / "cache.sqlite"))
+    enviadas, parseos = [], []
+
+    def peticion(cabeceras):
+        enviadas.append(cabeceras)
+        if cabeceras.get("If-None-Match") == '"v1"':
+            return _Respuesta(304)
+        return _Respuesta(200, {"ETag": '"v1"', "Last-Modified": "Fri, 16 Oct 2026 12:00:00 GMT"})
+
+    def parsear(respuesta):
+        parseos.append(respuesta)
+        return ["3.748", "3.741"]
+
+    assert consultar_con_revalidacion(cache, "http://sbs/", peticion, parsear) == ["3.748", "3.741"]
+    assert consultar_con_revalidacion(cache, "http://sbs/", peticion, parsear) == ["3.748", "3.741"]
+    assert enviadas[0] == {}
+    assert enviadas[1] == {"If-None-Match": '"v1"', "If-Modified-Since": "Fri, 16 Oct 2026 12:00:00 GMT"}
+    assert len(parseos) == 1
+
+def test_revalidacion_sin_validadores_no_guarda(tmp_path):
+    cache = CacheTipoCambio(str(tmp_path / "cache.sqlite"))
+    consultar_con_revalidacion(cache, "http://xe/", lambda cabeceras: _Respuesta(200), lambda r: "3.75")
+    assert cache.obtener_validacion("http://xe/") is None
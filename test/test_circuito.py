@@ -0,0 +1,94 @@
+import pytest
+
+import modulos.bot_01_tc_bloomberg as Bot_01
+from utilidades import circuito as modulo_circuito
+from utilidades.circuito import ABIERTO, CERRADO, SEMIABIERTO, CircuitoFuentes
+
+# pytest -v test/test_circuito.py
+
+@pytest.fixture
+def reloj(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr(modulo_circuito.time, "time", lambda: ahora[0])
+    return ahora
+
+def test_abre_sondea_y_cierra(tmp_path, reloj):
+    circuito = CircuitoFuentes(str(tmp_path / "circuito.sqlite"), umbral_fallos=2, espera_apertura=60)
+    circuito.registrar_fallo("bloomberg")
+    assert circuito.permitir("bloomberg") and circuito.estado("bloomberg") == CERRADO
+    circuito.registrar_fallo("bloomberg")
+    assert circuito.estado("bloomberg") == ABIERTO
+    assert not circuito.permitir("bloomberg")
+
+    # Vencida la espera solo se permite un sondeo; si falla se vuelve a abrir
+    reloj[0] += 60
+    assert circuito.permitir("bloomberg") and circuito.estado("bloomberg") == SEMIABIERTO
+    assert not circuito.permitir("bloomberg")
+    circuito.registrar_fallo("bloomberg")
+    assert circuito.estado("bloomberg") == ABIERTO and not circuito.permitir("bloomberg")
+
+    reloj[0] += 60
+    assert circuito.permitir("bloomberg")
+    circuito.registrar_exito("bloomberg")
+    assert circuito.estado("bloomberg") == CERRADO and circuito.permitir("bloomberg")
+
+def test_persiste_entre_ejecuciones(tmp_path, reloj):
+    ruta = str(tmp_path / "circuito.sqlite")
+    CircuitoFuentes(ruta, umbral_fallos=1).registrar_fallo("xe")
+    otro = CircuitoFuentes(ruta, umbral_fallos=1)
+    assert otro.estado("xe") == ABIERTO and not otro.permitir("xe")
+    assert otro.permitir("bloomberg")
+
+def test_sondeo_cancelado_se_libera(tmp_path, reloj):
+    circuito = CircuitoFuentes(str(tmp_path / "circuito.sqlite"), umbral_fallos=1, espera_apertura=60)
+    circuito.registrar_fallo("bloomberg")
+    reloj[0] += 60
+    assert circuito.permitir("bloomberg")
+    circuito.liberar("bloomberg")
+    assert circuito.estado("bloomberg") == ABIERTO
+    assert circuito.permitir("bloomberg")
+
+def test_fuente_abierta_se_omite_en_la_consulta(tmp_path, monkeypatch):
+    llamadas = []
+
+    def caida(cfg, cancelacion=None):
+        llamadas.append(1)
+        return None
+
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {"caida": caida, "buena": lambda cfg, cancelacion=None: "3.70"})
+    cfg = {
+        "fuentes_tc": {"tc_minimo": "1.0", "tc_maximo": "10.0"},
+        "reintentos": {"reintentos_max": "3"},
+        "rutas": {"ruta_output": str(tmp_path)},
+        "circuito": {"habilitado": "true", "umbral_fallos": "2", "espera_apertura": "300"},
+    }
+    valor, _ = Bot_01.obtener_tipo_cambio_concurrente(cfg, fuentes=["caida", "buena"], quorum=2)
+    assert valor is None
+    assert len(llamadas) == 2
+
+    valor, valores = Bot_01.obtener_tipo_cambio_concurrente(cfg, fuentes=["caida", "buena"])
+    assert valor == 3.70 and valores == {"buena": 3.70}
+    assert len(llamadas) == 2
+    assert modulo_circuito.OMITIDAS.valor(fuente="caida") >= 1
+
+def test_circuito_por_par(tmp_path, monkeypatch):
+    llamadas = []
+
+    def caida(cfg, cancelacion=None):
+        llamadas.append(1)
+        return None
+
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {"caida": caida})
+    cfg = {
+        "fuentes_tc": {"tc_minimo": "1.0", "tc_maximo": "10.0"},
+        "reintentos": {"reintentos_max": "2"},
+        "rutas": {"ruta_output": str(tmp_path)},
+        "circuito": {"habilitado": "true", "umbral_fallos": "2", "espera_apertura": "300"},
+    }
+    Bot_01.obtener_tipo_cambio_concurrente(cfg, fuentes=["caida"], sufijo=":EURPEN")
+    circuito = CircuitoFuentes(str(tmp_path / "circuito_fuentes.sqlite"))
+    assert circuito.estado("caida:EURPEN") == ABIERTO
+    # El circuito abierto de EURPEN no afecta al par principal
+    assert circuito.estado("caida") == CERRADO
+    Bot_01.obtener_tipo_cambio_concurrente(cfg, fuentes=["caida"])
+    assert len(llamadas) == 4
@@ -0,0 +1,115 @@
+import time
+
+import modulos.bot_01_tc_bloomberg as Bot_01
+from utilidades.cobertura import Cobertura, percentil
+
+# pytest -v test/test_cobertura.py
+
+def _cfg(tmp_path, **cobertura):
+    cfg = {
+        "fuentes_tc": {"tc_minimo": "1.0", "tc_maximo": "10.0"},
+        "reintentos": {"reintentos_max": "1"},
+        "rutas": {"ruta_output": str(tmp_path)},
+        "cobertura": {"habilitado": "true", "retardo_defecto": "0.2", "retardo_minimo": "0"},
+    }
+    cfg["cobertura"].update(cobertura)
+    return cfg
+
+def _lenta(cfg, cancelacion=None):
+    cancelacion.wait(5)
+    return "3.80"
+
+def test_retardo_por_percentil(tmp_path):
+    assert percentil([5, 1, 3, 2, 4], 95) == 5 and percentil([5, 1, 3, 2, 4], 50) == 3
+    cobertura = Cobertura(str(tmp_path / "latencias.sqlite"), percentil=90, ventana=10, muestras_minimas=5,
+                          retardo_defecto=7.0, retardo_minimo=0.5)
+    for segundos in (0.1, 0.2, 0.3, 0.4):
+        cobertura.registrar("bloomberg", segundos)
+    assert cobertura.retardo("bloomberg") == 7.0
+    for segundos in range(1, 21):
+        cobertura.registrar("bloomberg", float(segundos))
+    # Solo se conservan las últimas 'ventana' latencias (11 a 20)
+    assert sorted(cobertura.latencias("bloomberg")) == [float(s) for s in range(11, 21)]
+    assert cobertura.retardo("bloomberg") == 19.0
+    cobertura.registrar("xe", 0.01)
+    assert Cobertura(cobertura.ruta_db, muestras_minimas=1, retardo_minimo=0.5).retardo("xe") == 0.5
+
+def test_sin_demora_no_lanza_respaldo(tmp_path, monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {
+        "principal": lambda cfg, cancelacion=None: "3.75",
+        "respaldo": lambda cfg, cancelacion=None: llamadas.append(1) or "3.80",
+    })
+    valor, valores = Bot_01.obtener_tipo_cambio_concurrente(_cfg(tmp_path, retardo_defecto="1"),
+                                                            fuentes=["principal", "respaldo"])
+    time.sleep(0.1)
+    assert valor == 3.75 and valores == {"principal": 3.75}
+    assert llamadas == []
+
+def test_respaldo_tras_retardo_y_cancela_principal(tmp_path, monkeypatch):
+    lanzamientos = {}
+    cancelada = []
+
+    def principal(cfg, cancelacion=None):
+        lanzamientos["principal"] = time.monotonic()
+        cancelada.append(cancelacion.wait(5))
+        return None
+
+    def respaldo(cfg, cancelacion=None):
+        lanzamientos["respaldo"] = time.monotonic()
+        return "3.70"
+
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {"principal": principal, "respaldo": respaldo})
+    inicio = time.monotonic()
+    valor, valores = Bot_01.obtener_tipo_cambio_concurrente(_cfg(tmp_path), fuentes=["principal", "respaldo"])
+    assert valor == 3.70 and valores == {"respaldo": 3.70}
+    assert time.monotonic() - inicio < 2
+    assert lanzamientos["respaldo"] - lanzamientos["principal"] >= 0.2
+    time.sleep(0.1)
+    assert cancelada == [True]
+
+def test_fallo_rapido_lanza_respaldo_sin_esperar(tmp_path, monkeypatch):
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {
+        "principal": lambda cfg, cancelacion=None: None,
+        "respaldo": lambda cfg, cancelacion=None: "3.70",
+    })
+    inicio = time.monotonic()
+    valor, _ = Bot_01.obtener_tipo_cambio_concurrente(_cfg(tmp_path, retardo_defecto="5"),
+                                                      fuentes=["principal", "respaldo"])
+    assert valor == 3.70
+    assert time.monotonic() - inicio < 2
+
+def test_respaldo_por_proxy_alternativo(tmp_path, monkeypatch):
+    def bloomberg(cfg, cancelacion=None):
+        if cfg["proxy"]["url_proxy"] == "http://alterno:3128":
+            return "3.72"
+        return _lenta(cfg, cancelacion)
+
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {"bloomberg": bloomberg, "xe": _lenta})
+    cfg = _cfg(tmp_path, proxy_respaldo="http://alterno:3128")
+    cfg["proxy"] = {"url_proxy": "http://principal:3128"}
+    valor, valores = Bot_01.obtener_tipo_cambio_concurrente(cfg, fuentes=["bloomberg", "xe"])
+    assert valor == 3.72 and valores == {"bloomberg": 3.72}
+    assert cfg["proxy"]["url_proxy"] == "http://principal:3128"
+    assert Cobertura(str(tmp_path / "latencias_fuentes.sqlite")).latencias("bloomberg@respaldo")
+
+def test_latencia_por_par_y_por_intento(tmp_path, monkeypatch):
+    intentos = []
+
+    def inestable(cfg, cancelacion=None):
+        intentos.append(1)
+        if len(intentos) == 1:
+            time.sleep(0.3)
+            return None
+        return "3.75"
+
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {"inestable": inestable})
+    cfg = _cfg(tmp_path)
+    cfg["reintentos"]["reintentos_max"] = "2"
+    valor, _ = Bot_01.obtener_tipo_cambio_concurrente(cfg, fuentes=["inestable"], sufijo=":EURPEN")
+    assert valor == 3.75
+    cobertura = Cobertura(str(tmp_path / "latencias_fuentes.sqlite"))
+    # Solo el intento exitoso, sin el intento fallido previo, y separado del par principal
+    latencias = cobertura.latencias("inestable:EURPEN")
+    assert len(latencias) == 1 and latencias[0] < 0.2
+    assert cobertura.latencias("inestable") == []
@@ -0,0 +1,45 @@
+from modulos.bot_01_tc_bloomberg import OBJETIVO_BLOOMBERG, OBJETIVO_XE
+from modulos.bot_05_tc_sbs import OBJETIVO_SBS
+from utilidades.extraccion_streaming import extraer_en_streaming
+
+# pytest -v test/test_extraccion_streaming.py
+
+def _bloques(documento, tamano=64):
+    datos = documento.encode("utf-8")
+    for i in range(0, len(datos), tamano):
+        yield datos[i:i + tamano]
+
+def test_bloomberg_se_detiene_al_encontrar_precio():
+    relleno = "<div>" + "x" * 50000 + "</div>"
+    documento = (
+        "<html><head><script>var a = 1;</script></head><body>"
+        "<span data-component='sized-price'>9.99</span>"
+        "<main><div><span data-component='sized-price'>3.7512</span></div></main>"
+        + relleno + "</body></html>"
+    )
+    valor, leidos = extraer_en_streaming(_bloques(documento), OBJETIVO_BLOOMBERG)
+    assert valor == "3.7512"
+    assert leidos < len(documento) // 2
+
+def test_xe_segundo_parrafo():
+    documento = (
+        "<html><body><div data-testid='conversion'><p>1.00 US Dollar =</p>"
+        "<p>3.7461<span>234</span> Peruvian Soles</p></div></body></html>"
+    )
+    valor, _ = extraer_en_streaming(_bloques(documento), OBJETIVO_XE)
+    assert valor == "3.7461234"
+
+def test_sbs_fila_dolar():
+    documento = (
+        "<html><head><meta charset='utf-8'></head><body><table class='rgMasterTable'>"
+        "<tr><td>Euro</td><td>4.001</td><td>4.200</td></tr>"
+        "<tr><td>Dólar de N.A.</td><td>3.741</td><td>3.748</td></tr>"
+        "</table></body></html>"
+    )
+    valor, _ = extraer_en_streaming(_bloques(documento), OBJETIVO_SBS)
+    assert valor == ("3.748", "3.741")
+
+def test_sin_objetivo_retorna_none():
+    valor, leidos = extraer_en_streaming(_bloques("<html><body><p>nada</p></body></html>"), OBJETIVO_XE)
+    assert valor is None
+    assert leidos > 0
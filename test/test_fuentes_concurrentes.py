@@ -0,0 +1,69 @@
+import time
+import modulos.bot_01_tc_bloomberg as Bot_01
+
+# pytest -v test/test_fuentes_concurrentes.py
+
+def _cfg(**fuentes_tc):
+    cfg = {"fuentes_tc": {"tc_minimo": "1.0", "tc_maximo": "10.0"}, "reintentos": {"reintentos_max": "1"}}
+    cfg["fuentes_tc"].update(fuentes_tc)
+    return cfg
+
+def test_primer_valor_valido_gana(monkeypatch):
+    def lenta(cfg, cancelacion=None):
+        cancelacion.wait(5)
+        return "3.80"
+
+    def rapida(cfg, cancelacion=None):
+        return "USD 3.75"
+
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {"lenta": lenta, "rapida": rapida})
+    inicio = time.monotonic()
+    valor, valores = Bot_01.obtener_tipo_cambio_concurrente(_cfg(), fuentes=["lenta", "rapida"])
+    assert valor == 3.75
+    assert valores == {"rapida": 3.75}
+    assert time.monotonic() - inicio < 2
+
+def test_valor_invalido_no_gana(monkeypatch):
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {
+        "corrupta": lambda cfg, cancelacion=None: "<jҽsPjIudlԁ7|",
+        "buena": lambda cfg, cancelacion=None: "3.70",
+    })
+    valor, _ = Bot_01.obtener_tipo_cambio_concurrente(_cfg(), fuentes=["corrupta", "buena"])
+    assert valor == 3.70
+
+def test_quorum_retorna_mediana(monkeypatch):
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {
+        "a": lambda cfg, cancelacion=None: "3.70",
+        "b": lambda cfg, cancelacion=None: "3.80",
+        "c": lambda cfg, cancelacion=None: "3.90",
+    })
+    valor, valores = Bot_01.obtener_tipo_cambio_concurrente(_cfg(), fuentes=["a", "b", "c"], quorum=3)
+    assert valor == 3.80
+    assert len(valores) == 3
+
+def test_sin_quorum_retorna_none(monkeypatch):
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {
+        "a": lambda cfg, cancelacion=None: None,
+        "b": lambda cfg, cancelacion=None: "3.80",
+    })
+    valor, valores = Bot_01.obtener_tipo_cambio_concurrente(_cfg(), fuentes=["a", "b"], quorum=2)
+    assert valor is None
+    assert valores == {"b": 3.80}
+
+def test_perdedora_no_reintenta_tras_el_ganador():
+    import tempfile
+
+    from config.config import cargar_configuracion
+    from simulador.servicios import ConfigServicio, ServiciosSimulados
+    from utilidades.httpclient import configurar_limite_tasa
+
+    # Bloomberg responde 503 (estado que el adaptador reintenta) después de que xe.com ya ganó
+    lenta = {"bloomberg": ConfigServicio(latencia=0.3, tasa_error=1.0, estado_error=503)}
+    with ServiciosSimulados(lenta) as servicios, tempfile.TemporaryDirectory() as ruta_output:
+        cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+        configurar_limite_tasa(cfg)
+        valor, valores = Bot_01.obtener_tipo_cambio_concurrente(cfg, fuentes=["bloomberg", "xe"])
+        peticiones = servicios.peticiones["bloomberg"]
+        time.sleep(1)
+        assert servicios.peticiones["bloomberg"] == peticiones == 1
+    assert list(valores) == ["xe"]
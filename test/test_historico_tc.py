@@ -0,0 +1,53 @@
+import math
+from datetime import datetime
+
+import pytest
+
+from utilidades.historico_tc import HistoricoTC, obtener_historico
+
+# pytest -v test/test_historico_tc.py
+
+INICIO = datetime(2024, 1, 1).timestamp()
+HORA = 3600
+
+@pytest.fixture
+def historico(tmp_path):
+    historico = HistoricoTC(str(tmp_path / "historico"))
+    for i in range(24 * 30):
+        historico.registrar("bloomberg", "USDPEN", medio=3.70 + i / 10000, ts=INICIO + i * HORA)
+        if i % 24 == 0:
+            historico.registrar("sbs", "USDPEN", compra=3.71, venta=3.75, ts=INICIO + i * HORA + 1)
+    historico.registrar("xe", "EURPEN", medio=4.05, ts=INICIO)
+    return historico
+
+def test_tramo_por_rango_de_fechas(historico):
+    with historico.tramo("USDPEN", "bloomberg", "2024-01-02", datetime(2024, 1, 3)) as tramo:
+        assert len(tramo) == 24
+        assert tramo.columnas["ts"][0] == INICIO + 24 * HORA
+        assert math.isnan(tramo.columnas["compra"][0])
+        assert tramo.columnas["medio"][0] == pytest.approx(3.7024)
+
+def test_consultar_filtra_por_fuente_y_ordena(historico):
+    filas = list(historico.consultar(INICIO, INICIO + 2 * 24 * HORA, par="USDPEN"))
+    assert len(filas) == 48 + 2
+    assert [f.ts for f in filas] == sorted(f.ts for f in filas)
+    sbs = list(historico.consultar(INICIO, INICIO + 2 * 24 * HORA, fuente="sbs"))
+    assert [(f.par, f.compra, f.venta, f.medio) for f in sbs] == [("USDPEN", 3.71, 3.75, pytest.approx(3.73))] * 2
+
+def test_solo_anexado(historico):
+    with pytest.raises(ValueError):
+        historico.registrar("xe", "EURPEN", medio=4.0, ts=INICIO - 1)
+    assert historico.registrar("xe", "EURPEN", medio=4.1)
+    assert historico.series(par="EURPEN") == [("EURPEN", "xe")]
+
+def test_descarta_escritura_interrumpida(historico):
+    ruta = historico._ruta_serie("EURPEN", "xe")
+    with open(f"{ruta}/compra.f8", "ab") as archivo:
+        archivo.write(b"\0" * 8)
+    historico.registrar("xe", "EURPEN", compra=4.0, venta=4.2)
+    with historico.tramo("EURPEN", "xe") as tramo:
+        assert list(tramo.columnas["compra"]) == [pytest.approx(math.nan, nan_ok=True), 4.0]
+
+def test_obtener_historico_deshabilitado(tmp_path):
+    assert obtener_historico({"historico": {"habilitado": "false"}}) is None
+    assert obtener_historico({"historico": {"habilitado": "true"}, "rutas": {"ruta_output": str(tmp_path)}}) is not None
@@ -0,0 +1,156 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utilidades.httpclient import LimitadorPorHost, SondaIPEgreso, create_http_client
+from utilidades.plazo import Plazo, PlazoAgotado
+
+# pytest -v test/test_httpclient.py
+
+class _Handler(BaseHTTPRequestHandler):
+    peticiones = {}
+
+    def do_GET(self):
+        _Handler.peticiones[self.path] = _Handler.peticiones.get(self.path, 0) + 1
+        if self.path == "/saturado":
+            self.send_response(503)
+            self.send_header("Retry-After", "30")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/lento":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            for _ in range(20):
+                self.wfile.write(b"<p>" + b"x" * 100 + b"</p>")
+                self.wfile.flush()
+                time.sleep(0.1)
+            return
+        cuerpo = b"<html><body><main><span data-component='sized-price'>3.7512</span></main></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def servidor():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    hilo = threading.Thread(target=httpd.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+def test_make_request_sin_proxy(servidor):
+    cliente = create_http_client(rate_limiter=LimitadorPorHost(tasa=None))
+    respuesta = cliente.make_request(servidor + "/", proxies={}, timeout_total=5)
+    assert respuesta is not None
+    assert "sized-price" in respuesta.text
+
+def test_make_request_respeta_timeout_total(servidor):
+    cliente = create_http_client(rate_limiter=LimitadorPorHost(tasa=None))
+    inicio = time.monotonic()
+    respuesta = cliente.make_request(servidor + "/lento", proxies={}, timeout_total=0.5)
+    assert respuesta is None
+    assert time.monotonic() - inicio < 1.5
+
+def test_sonda_ip_no_bloquea():
+    class _SesionLenta:
+        def get(self, *args, **kwargs):
+            time.sleep(1)
+            raise RuntimeError("sin red")
+
+    sonda = SondaIPEgreso(_SesionLenta(), ttl=60)
+    inicio = time.monotonic()
+    assert sonda.obtener("http://proxy:3128") is None
+    assert time.monotonic() - inicio < 0.2
+
+def test_limitador_independiente_por_host():
+    limitador = LimitadorPorHost(tasa=10, rafaga=1)
+    assert limitador.reservar("bloomberg") == 0
+    assert limitador.reservar("sbs") == 0
+    # Segundo token del mismo host: exactamente 1/tasa después
+    assert limitador.reservar("bloomberg") == pytest.approx(0.1, abs=0.01)
+    assert limitador.reservar("bloomberg") == pytest.approx(0.2, abs=0.01)
+    estadisticas = limitador.estadisticas()
+    assert estadisticas["bloomberg"]["esperas"] == 2
+    assert estadisticas["bloomberg"]["espera_total"] == pytest.approx(0.3, abs=0.02)
+    assert estadisticas["sbs"]["esperas"] == 0
+
+def test_limitador_seguro_entre_hilos():
+    limitador = LimitadorPorHost(tasa=100, rafaga=5)
+    inicio = time.monotonic()
+    hilos = [threading.Thread(target=limitador.esperar, args=("http://host/",)) for _ in range(25)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    # 5 de ráfaga + 20 espaciados a 10ms
+    assert 0.15 < time.monotonic() - inicio < 1.0
+    assert limitador.estadisticas()["host"]["peticiones"] == 25
+
+def test_limitador_async_no_bloquea_otros_hosts():
+    import asyncio
+
+    limitador = LimitadorPorHost(tasa=5, rafaga=1)
+
+    async def consultar():
+        inicio = time.monotonic()
+        await asyncio.gather(*(limitador.esperar_async("http://lento/") for _ in range(3)),
+                             limitador.esperar_async("http://rapido/"))
+        return time.monotonic() - inicio
+
+    # 3 peticiones a 5/s sobre el mismo host: 0.4s; la del otro host no suma
+    assert 0.35 < asyncio.run(consultar()) < 0.7
+
+def test_limitador_respeta_el_plazo():
+    limitador = LimitadorPorHost(tasa=1, rafaga=1)
+    cliente = create_http_client(rate_limiter=limitador)
+    plazo = Plazo(0.3)
+    token = plazo.activar()
+    try:
+        limitador.esperar("http://host/")
+        inicio = time.monotonic()
+        # El siguiente token llega en ~1s, después del plazo: no se espera
+        with pytest.raises(PlazoAgotado):
+            limitador.esperar("http://host/")
+        assert cliente.make_request("http://host/", proxies={}) is None
+        assert time.monotonic() - inicio < 0.2
+    finally:
+        Plazo.desactivar(token)
+
+def test_reintentos_respetan_el_plazo(servidor):
+    cliente = create_http_client(max_retries=5, rate_limiter=LimitadorPorHost(tasa=None))
+    plazo = Plazo(0.5)
+    token = plazo.activar()
+    try:
+        inicio = time.monotonic()
+        # Retry-After de 30s: la espera se recorta al plazo y no se hace otro intento
+        assert cliente.make_request(servidor + "/saturado", proxies={}) is None
+        assert time.monotonic() - inicio < 1.0
+    finally:
+        Plazo.desactivar(token)
+    assert _Handler.peticiones["/saturado"] == 1
+    time.sleep(0.3)
+    assert _Handler.peticiones["/saturado"] == 1
+
+def test_validadores_quitan_no_cache():
+    cliente = create_http_client(rate_limiter=LimitadorPorHost(tasa=None))
+    enviadas = {}
+
+    def get(url, headers=None, **kwargs):
+        preparada = cliente.session.prepare_request(requests.Request("GET", url, headers=headers))
+        enviadas.update(preparada.headers)
+        raise requests.exceptions.ConnectionError("sin red")
+
+    cliente.session.get = get
+    cliente.make_request("http://sbs/", proxies={}, validadores={"If-None-Match": '"v1"'})
+    assert enviadas["If-None-Match"] == '"v1"'
+    assert "Cache-Control" not in enviadas and "Pragma" not in enviadas
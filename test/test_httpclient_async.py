@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from utilidades.httpclient import LimitadorPorHost
+from utilidades.httpclient_async import create_async_http_client
+from utilidades.plazo import Plazo
+
+# pytest -v test/test_httpclient_async.py
+
+TEXTO_LATIN1 = "<p>Tipo de cambio del Dólar de N.A. publicado por la Superintendencia: compra y venta según día hábil</p>"
+
+class _Handler(BaseHTTPRequestHandler):
+    fallos_restantes = 0
+    en_curso = 0
+    maximo_en_curso = 0
+    lock = threading.Lock()
+
+    def _responder(self, estado, cuerpo, tipo="text/html; charset=utf-8"):
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        cls = type(self)
+        if self.path == "/inestable":
+            with cls.lock:
+                fallar = cls.fallos_restantes > 0
+                cls.fallos_restantes -= 1
+            if fallar:
+                self._responder(503, b"")
+            else:
+                self._responder(200, b"<p>3.7512</p>")
+        elif self.path == "/lento":
+            with cls.lock:
+                cls.en_curso += 1
+                cls.maximo_en_curso = max(cls.maximo_en_curso, cls.en_curso)
+            time.sleep(0.2)
+            with cls.lock:
+                cls.en_curso -= 1
+            self._responder(200, b"ok")
+        elif self.path == "/latin1":
+            self._responder(200, TEXTO_LATIN1.encode("latin-1"), tipo="text/html")
+        else:
+            self._responder(404, b"")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def servidor():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    hilo = threading.Thread(target=httpd.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+def _cliente(**kwargs):
+    return create_async_http_client(rate_limiter=LimitadorPorHost(tasa=None), backoff_factor=0.01, **kwargs)
+
+def test_reintenta_estados_reintentables(servidor):
+    _Handler.fallos_restantes = 2
+
+    async def consultar():
+        async with _cliente() as cliente:
+            return await cliente.make_request(servidor + "/inestable", proxies={})
+
+    respuesta = asyncio.run(consultar())
+    assert respuesta is not None
+    assert respuesta.intentos == 3
+    assert respuesta.text == "<p>3.7512</p>"
+
+def test_limite_por_host(servidor):
+    _Handler.maximo_en_curso = 0
+
+    async def consultar():
+        async with _cliente(limite_por_host=2) as cliente:
+            return await cliente.make_requests([servidor + "/lento"] * 6, proxies={})
+
+    respuestas = asyncio.run(consultar())
+    assert all(r is not None for r in respuestas)
+    assert _Handler.maximo_en_curso <= 2
+
+def test_timeout_por_host(servidor):
+    async def consultar():
+        async with _cliente(max_retries=0, timeouts_por_host={"127.0.0.1": 0.05}) as cliente:
+            return await cliente.make_request(servidor + "/lento", proxies={})
+
+    assert asyncio.run(consultar()) is None
+
+def test_detecta_codificacion_sin_charset(servidor):
+    async def consultar():
+        async with _cliente() as cliente:
+            return await cliente.make_request(servidor + "/latin1", proxies={})
+
+    respuesta = asyncio.run(consultar())
+    assert respuesta.text == TEXTO_LATIN1
+
+def test_respeta_el_plazo(servidor):
+    async def consultar():
+        async with _cliente(max_retries=0) as cliente:
+            return await cliente.make_request(servidor + "/lento", proxies={})
+
+    plazo = Plazo(0.05)
+    token = plazo.activar()
+    try:
+        inicio = time.monotonic()
+        assert asyncio.run(consultar()) is None
+        assert time.monotonic() - inicio < 0.2
+        # Con el plazo vencido no se hace la petición
+        assert asyncio.run(consultar()) is None
+    finally:
+        Plazo.desactivar(token)
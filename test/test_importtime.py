@@ -0,0 +1,38 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# pytest -v test/test_importtime.py
+# Verifica con python -X importtime que los comandos livianos no carguen el árbol completo
+# de dependencias de los bots.
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+MODULOS_PESADOS = {"requests", "urllib3", "lxml", "bs4", "psutil", "selenium", "dotenv"}
+
+def _modulos_importados(*argumentos):
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", *argumentos],
+        cwd=RAIZ, capture_output=True, text=True, timeout=60,
+    )
+    modulos = set()
+    for linea in proceso.stderr.splitlines():
+        if linea.startswith("import time:") and "|" in linea:
+            nombre = linea.rsplit("|", 1)[1].strip()
+            modulos.add(nombre.split(".")[0])
+    return proceso.returncode, modulos
+
+@pytest.mark.parametrize("argumentos", [("main.py", "--help"), ("main.py", "--simular")])
+def test_comandos_livianos_no_importan_dependencias_pesadas(argumentos):
+    codigo, modulos = _modulos_importados(*argumentos)
+    assert codigo == 0
+    assert not modulos & MODULOS_PESADOS
+
+def test_importar_httpclient_no_crea_el_cliente():
+    codigo, _ = _modulos_importados(
+        "-c", "import utilidades.httpclient as h; assert h._cliente_global is None; h.get_http_client(); "
+              "assert h._cliente_global is h.advanced_http_client"
+    )
+    assert codigo == 0
@@ -0,0 +1,89 @@
+import logging
+import os
+import tempfile
+import urllib.request
+
+import pytest
+
+from config.config import cargar_configuracion
+from simulador.servicios import ConfigServicio, ServiciosSimulados
+from utilidades import metricas
+from utilidades.httpclient import configurar_limite_tasa
+
+# pytest -v test/test_metricas.py
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+def test_formato_texto():
+    registro = metricas.RegistroMetricas()
+    contador = registro.contador("x_total", "Ayuda", ("fuente",))
+    contador.inc(fuente='a"b\\c')
+    histograma = registro.histograma("y_segundos", "Ayuda", ("fuente",), limites=(0.1, 1.0))
+    for valor in (0.05, 0.5, 5.0):
+        histograma.observar(valor, fuente="sbs")
+
+    lineas = registro.exponer().splitlines()
+    assert "# TYPE x_total counter" in lineas
+    assert 'x_total{fuente="a\\"b\\\\c"} 1' in lineas
+    assert [linea for linea in lineas if linea.startswith("y_segundos")] == [
+        'y_segundos_bucket{fuente="sbs",le="0.1"} 1',
+        'y_segundos_bucket{fuente="sbs",le="1"} 2',
+        'y_segundos_bucket{fuente="sbs",le="+Inf"} 3',
+        'y_segundos_sum{fuente="sbs"} 5.55',
+        'y_segundos_count{fuente="sbs"} 3',
+    ]
+
+def test_etiquetas_incorrectas():
+    registro = metricas.RegistroMetricas()
+    contador = registro.contador("x_total", "Ayuda", ("fuente",))
+    with pytest.raises(ValueError):
+        contador.inc(destino="sbs")
+    with pytest.raises(ValueError):
+        registro.histograma("x_total", "Ayuda", ("fuente",))
+    assert registro.contador("x_total", "Ayuda", ("fuente",)) is contador
+
+def test_servidor_expone_metrics():
+    registro = metricas.RegistroMetricas()
+    registro.contador("x_total", "Ayuda").inc()
+    cfg = {"metricas": {"habilitado": "true", "host": "127.0.0.1", "puerto": "0"}}
+    assert metricas.iniciar_servidor_metricas(cfg, registro) is None
+
+    servidor = None
+    # Busca un puerto libre: el 0 deshabilita el servidor
+    for puerto in range(19464, 19564):
+        cfg["metricas"]["puerto"] = str(puerto)
+        servidor = metricas.iniciar_servidor_metricas(cfg, registro)
+        if servidor:
+            break
+    assert servidor is not None
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/metrics", timeout=5) as respuesta:
+            assert respuesta.headers["Content-Type"] == metricas.TIPO_CONTENIDO
+            assert "x_total 1" in respuesta.read().decode("utf-8")
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+def test_pipeline_registra_fuentes_y_respaldos():
+    import main
+
+    respaldos = metricas.RESPALDOS.valor(principal="bloomberg", respaldo="xe")
+    publicaciones = metricas.DURACION_PUBLICACION.total(destino="gescom", resultado="ok")
+    errores = {"bloomberg": ConfigServicio(tasa_error=1.0, estado_error=404)}
+    with ServiciosSimulados(errores) as servicios, tempfile.TemporaryDirectory() as ruta_output:
+        cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+        configurar_limite_tasa(cfg)
+        main.ejecutar_pipeline(cfg)
+        ruta = metricas.escribir_metricas(cfg)
+        assert ruta == os.path.join(ruta_output, "metricas", "tipo_cambio.prom")
+        with open(ruta, encoding="utf-8") as archivo:
+            contenido = archivo.read()
+
+    assert metricas.RESPALDOS.valor(principal="bloomberg", respaldo="xe") == respaldos + 1
+    assert metricas.DURACION_PUBLICACION.total(destino="gescom", resultado="ok") == publicaciones + 1
+    assert 'tc_fuente_duracion_segundos_count{fuente="sbs",resultado="ok"}' in contenido
+    assert 'tc_ejecuciones_total{resultado="ok"}' in contenido
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from utilidades.contexto import ContextoEjecucion
+from utilidades.orquestador import ESTADO_FALLO, ESTADO_OK, ESTADO_OMITIDA, Etapa, OrquestadorDAG
+
+# pytest -v test/test_orquestador.py
+
+def _bot(resultado=True, espera=0.0, registro=None, nombre=""):
+    def bot_run(cfg, contexto=None):
+        if registro is not None:
+            registro.append(nombre)
+        time.sleep(espera)
+        return resultado, nombre
+    return bot_run
+
+def test_ramas_independientes_en_paralelo():
+    etapas = [
+        Etapa("a", _bot(espera=0.3), salidas=("x",)),
+        Etapa("b", _bot(espera=0.3), entradas=("x",)),
+        Etapa("c", _bot(espera=0.3), salidas=("y",)),
+        Etapa("d", _bot(espera=0.3), entradas=("y",)),
+    ]
+    inicio = time.monotonic()
+    resultados, _ = OrquestadorDAG(etapas, max_workers=4).ejecutar({})
+    assert all(r.estado == ESTADO_OK for r in resultados.values())
+    # Ruta crítica de 2 etapas, no 4
+    assert time.monotonic() - inicio < 1.0
+
+def test_fallo_omite_solo_dependientes():
+    etapas = [
+        Etapa("a", _bot(resultado=False), salidas=("x",)),
+        Etapa("b", _bot(), entradas=("x",), salidas=("z",)),
+        Etapa("c", _bot(), entradas=("z",)),
+        Etapa("d", _bot(), salidas=("y",)),
+    ]
+    resultados, _ = OrquestadorDAG(etapas).ejecutar({})
+    assert resultados["a"].estado == ESTADO_FALLO
+    assert resultados["b"].estado == ESTADO_OMITIDA
+    assert resultados["c"].estado == ESTADO_OMITIDA
+    assert resultados["d"].estado == ESTADO_OK
+
+def test_secuencial_respeta_orden():
+    registro = []
+    etapas = [Etapa(n, _bot(registro=registro, nombre=n)) for n in ["a", "b", "c"]]
+    OrquestadorDAG(etapas, max_workers=1).ejecutar({})
+    assert registro == ["a", "b", "c"]
+
+def test_excepcion_en_etapa_es_fallo():
+    def explota(cfg, contexto=None):
+        raise RuntimeError("boom")
+    resultados, _ = OrquestadorDAG([Etapa("a", explota)]).ejecutar({})
+    assert resultados["a"].estado == ESTADO_FALLO
+
+def test_al_completar_solo_en_exito():
+    llamadas = threading.Event()
+    etapas = [Etapa("a", _bot(), al_completar=lambda contexto: llamadas.set())]
+    OrquestadorDAG(etapas).ejecutar({})
+    assert llamadas.is_set()
+
+def test_ciclo_rechazado():
+    with pytest.raises(ValueError):
+        OrquestadorDAG([
+            Etapa("a", _bot(), entradas=("y",), salidas=("x",)),
+            Etapa("b", _bot(), entradas=("x",), salidas=("y",)),
+        ])
+
+def test_salidas_fluyen_por_el_contexto():
+    def productor(cfg, contexto):
+        contexto.publicar("x", 41)
+        return True, ""
+
+    def consumidor(cfg, contexto):
+        contexto.publicar("y", contexto["x"] + 1)
+        return True, ""
+
+    etapas = [
+        Etapa("consumidor", consumidor, entradas=("x",), salidas=("y",)),
+        Etapa("productor", productor, salidas=("x",)),
+    ]
+    _, contexto = OrquestadorDAG(etapas).ejecutar({}, ContextoEjecucion(id_ejecucion="r1"))
+    assert contexto["y"] == 42
+    assert contexto.id_ejecucion == "r1"
+
+def test_salida_no_declarada_es_fallo():
+    def intruso(cfg, contexto):
+        contexto.publicar("z", 1)
+        return True, ""
+
+    resultados, contexto = OrquestadorDAG([Etapa("a", intruso, salidas=("x",))]).ejecutar({})
+    assert resultados["a"].estado == ESTADO_FALLO
+    assert "z" not in contexto
+
+def test_ejecuciones_concurrentes_aisladas():
+    def bot(cfg, contexto):
+        time.sleep(0.05)
+        contexto.publicar("x", contexto["semilla"] * 2)
+        return True, ""
+
+    orquestador = OrquestadorDAG([Etapa("a", bot, entradas=("semilla",), salidas=("x",))])
+    finales = {}
+
+    def correr(semilla):
+        _, contexto = orquestador.ejecutar({}, ContextoEjecucion({"semilla": semilla}))
+        finales[semilla] = contexto["x"]
+
+    hilos = [threading.Thread(target=correr, args=(i,)) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert finales == {i: i * 2 for i in range(8)}
@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+import modulos.bot_01_tc_bloomberg as Bot_01
+from config.config import cfg_para_par, modo_por_pares, pares_activos
+from modulos.bot_02_calcular_tc import bot_run as Bot_02_CalcularTC
+from utilidades.contexto import ContextoEjecucion, ContextoEtapa
+
+# pytest -v test/test_pares.py
+
+def _cfg():
+    return {
+        "valores": {"brecha": "3.0", "inicial": "3.0", "final": "5.0"},
+        "fuentes_tc": {"modo_concurrente": "true", "fuentes_activas": "a", "tc_minimo": "1.0", "tc_maximo": "10.0", "url_bloomberg": "usd"},
+        "reintentos": {"reintentos_max": "1"},
+        "pares": {
+            "principal": "USDPEN",
+            "activos": "EURPEN, USDPEN",
+            "USDPEN": {},
+            "EURPEN": {"url_bloomberg": "eur", "tc_minimo": "2.0", "inicial": "3.5", "final": "6.0", "brecha": "1.0"},
+        },
+    }
+
+def test_cfg_para_par_sobrescribe_sin_modificar_original():
+    cfg = _cfg()
+    cfg_eur = cfg_para_par(cfg, "EURPEN")
+    assert cfg_eur["fuentes_tc"]["url_bloomberg"] == "eur"
+    assert cfg_eur["valores"] == {"brecha": "1.0", "inicial": "3.5", "final": "6.0"}
+    assert cfg["fuentes_tc"]["url_bloomberg"] == "usd"
+    assert pares_activos(cfg) == ["USDPEN", "EURPEN"] and modo_por_pares(cfg)
+    cfg["pares"]["activos"] = "USDPEN"
+    assert not modo_por_pares(cfg)
+
+def test_bot_01_consulta_pares_en_lote(monkeypatch):
+    monkeypatch.setattr(Bot_01, "FUENTES_TC", {
+        "a": lambda cfg, cancelacion=None: {"usd": "3.75", "eur": "4.10"}[cfg["fuentes_tc"]["url_bloomberg"]],
+    })
+    contexto = ContextoEtapa()
+    resultado, _ = Bot_01.bot_run(_cfg(), contexto)
+    assert resultado
+    assert contexto.salidas["tipos_cambio_pares"] == {"USDPEN": 3.75, "EURPEN": 4.10}
+    assert contexto.salidas["tipo_cambio_bloomberg"] == 3.75
+
+def test_bot_02_calcula_todos_los_pares():
+    contexto = ContextoEtapa(ContextoEjecucion({
+        "tipo_cambio_bloomberg": 3.75,
+        "tipos_cambio_pares": {"USDPEN": 3.75, "EURPEN": 4.0},
+    }))
+    resultado, _ = Bot_02_CalcularTC(_cfg(), contexto)
+    calculados = contexto.salidas["tipos_cambio_calculados"]
+    assert resultado
+    assert calculados["EURPEN"] == {"compra": Decimal("3.96"), "venta": Decimal("4.04"), "en_rango": True}
+    assert contexto.salidas["tipo_cambio_compra"] == Decimal("3.6375")
+    assert contexto.salidas["tipo_cambio_venta"] == Decimal("3.8625")
@@ -0,0 +1,85 @@
+import logging
+import tempfile
+import threading
+import time
+
+import pytest
+
+from config.config import cargar_configuracion
+from simulador.servicios import ConfigServicio, ServiciosSimulados
+from utilidades.httpclient import configurar_limite_tasa
+from utilidades.orquestador import ESTADO_OK, ESTADO_OMITIDA, ESTADO_PLAZO_AGOTADO, Etapa, OrquestadorDAG
+from utilidades.plazo import Plazo, PlazoAgotado, plazo_actual, timeout_restante
+
+# pytest -v test/test_plazo.py
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+def test_timeout_restante():
+    assert timeout_restante(5) == 5 and timeout_restante((1, 5)) == (1, 5) and timeout_restante() is None
+
+    plazo = Plazo(2.0)
+    token = plazo.activar()
+    try:
+        assert timeout_restante(1) == 1
+        assert 1.5 < timeout_restante(30) <= 2.0
+        conexion, lectura = timeout_restante((1, 30))
+        assert conexion == 1 and 1.5 < lectura <= 2.0
+        assert 1.5 < timeout_restante() <= 2.0
+        plazo.limite = time.monotonic() - 1
+        with pytest.raises(PlazoAgotado):
+            timeout_restante(5)
+    finally:
+        Plazo.desactivar(token)
+    assert plazo_actual() is None
+
+def test_orquestador_corta_la_etapa_que_agota_el_plazo():
+    liberar = threading.Event()
+    timeouts = {}
+
+    def colgada(cfg, contexto):
+        liberar.wait(5)
+        return True, "tarde"
+
+    def rapida(cfg, contexto):
+        timeouts["rapida"] = timeout_restante(100)
+        return True, "ok"
+
+    etapas = [
+        Etapa("colgada", colgada, salidas=("a",)),
+        Etapa("dependiente", lambda cfg, contexto: (True, "ok"), entradas=("a",)),
+        Etapa("rapida", rapida),
+    ]
+    inicio = time.monotonic()
+    try:
+        resultados, _ = OrquestadorDAG(etapas, max_workers=2).ejecutar({}, plazo=Plazo(0.3))
+    finally:
+        liberar.set()
+    assert time.monotonic() - inicio < 2
+    assert resultados["colgada"].estado == ESTADO_PLAZO_AGOTADO
+    assert resultados["dependiente"].estado == ESTADO_OMITIDA
+    assert resultados["rapida"].estado == ESTADO_OK
+    # La etapa hereda el plazo de la ejecución
+    assert timeouts["rapida"] <= 0.3
+    assert plazo_actual() is None
+
+def test_pipeline_con_fuente_colgada_respeta_el_plazo():
+    import main
+
+    lentos = {"bloomberg": ConfigServicio(latencia=5), "xe": ConfigServicio(latencia=5)}
+    with ServiciosSimulados(lentos) as servicios, tempfile.TemporaryDirectory() as ruta_output:
+        cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+        cfg["plazo"]["segundos"] = "1"
+        configurar_limite_tasa(cfg)
+        inicio = time.monotonic()
+        resultados, _ = main.ejecutar_pipeline(cfg)
+        duracion = time.monotonic() - inicio
+
+    assert duracion < 3
+    assert resultados["Bot 01 - Obtener TC bloomberg"].estado == ESTADO_PLAZO_AGOTADO
+    assert resultados["Bot 02 - Calcular TC"].estado == ESTADO_OMITIDA
+    assert resultados["Bot 06 - Gescom Cargar TC"].estado == ESTADO_OK
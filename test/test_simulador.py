@@ -0,0 +1,49 @@
+import logging
+import tempfile
+
+import pytest
+import requests
+
+from config.config import cargar_configuracion
+from simulador.carga import TOTAL, ejecutar_carga, percentil, resumir
+from simulador.servicios import ConfigServicio, ServiciosSimulados
+from utilidades.httpclient import configurar_limite_tasa
+
+# pytest -v test/test_simulador.py
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+def test_percentil_interpola():
+    assert percentil([], 50) is None
+    assert percentil([1, 2, 3, 4], 50) == 2.5
+    assert percentil([5, 1, 3], 100) == 5
+
+def test_latencia_y_errores_por_servicio():
+    config = {"xe": ConfigServicio(tasa_error=1.0, estado_error=502), "sbs": ConfigServicio(latencia=0.2)}
+    with ServiciosSimulados(config, semilla=1) as servicios:
+        assert requests.get(f"{servicios.url}/xe/convert", timeout=5).status_code == 502
+        respuesta = requests.get(f"{servicios.url}/sbs", timeout=5)
+        assert respuesta.status_code == 200
+        assert respuesta.elapsed.total_seconds() >= 0.2
+        assert servicios.peticiones["xe"] == 1 and servicios.errores["xe"] == 1
+        assert servicios.errores["sbs"] == 0
+
+def test_servicio_desconocido():
+    with pytest.raises(ValueError):
+        ServiciosSimulados({"investing": ConfigServicio()})
+
+def test_carga_concurrente_resume_por_etapa():
+    with ServiciosSimulados() as servicios, tempfile.TemporaryDirectory() as ruta_output:
+        cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+        configurar_limite_tasa(cfg)
+        corridas, segundos = ejecutar_carga(cfg, 4, 2)
+    resumen = resumir(corridas, segundos)
+    assert resumen["ejecuciones"] == 4
+    assert resumen["etapas"][TOTAL]["estados"] == {"ok": 4, "fallo": 0}
+    assert len(resumen["etapas"]) > 1
+    for etapa in resumen["etapas"].values():
+        assert etapa["p50"] <= etapa["p95"] <= etapa["p99"] <= etapa["max"]
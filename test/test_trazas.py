@@ -0,0 +1,84 @@
+import glob
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config.config import cargar_configuracion
+from modulos.bot_01_tc_bloomberg import MARCA_TIEMPOS_CURL, _registrar_tiempos_curl
+from simulador.servicios import ServiciosSimulados
+from utilidades import trazas
+from utilidades.httpclient import configurar_limite_tasa
+
+# pytest -v test/test_trazas.py
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+@pytest.fixture
+def traza():
+    traza = trazas.Traza("prueba")
+    tokens = traza.activar()
+    yield traza
+    trazas.Traza.desactivar(tokens)
+
+def test_sin_traza_no_registra():
+    funcion = lambda: None  # noqa: E731
+    assert trazas.span("x", a=1) is trazas.SPAN_NULO
+    assert trazas.propagar(funcion) is funcion
+
+def test_spans_anidados_entre_hilos(traza):
+    def hijo(i):
+        with trazas.span("hijo", i=i):
+            pass
+
+    with trazas.span("raiz") as raiz:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(trazas.propagar(hijo), range(2)))
+    hijos = [s for s in traza.spans if s.nombre == "hijo"]
+    assert len(hijos) == 2 and all(s.padre == raiz.span_id for s in hijos)
+    assert trazas.traza_actual() is traza
+
+def test_excepcion_marca_error(traza):
+    with pytest.raises(ValueError):
+        with trazas.span("falla"):
+            raise ValueError("x")
+    assert traza.spans[0].a_otlp()["status"] == {"code": trazas.ESTADO_ERROR, "message": "ValueError: x"}
+
+def test_tiempos_curl_por_fase(traza):
+    salida = b"<html></html>" + MARCA_TIEMPOS_CURL + b"0.010 0.030 0.080 0.081 0.200 0.250 200"
+    with trazas.span("curl GET"):
+        assert _registrar_tiempos_curl(salida, 1_000_000_000) == b"<html></html>"
+    fases = {s.nombre: (s.fin_ns - s.inicio_ns) / 1e6 for s in traza.spans if s.nombre.startswith("http.")}
+    assert fases == pytest.approx({"http.dns": 10, "http.conexion": 20, "http.tls": 50, "http.ttfb": 119,
+                                   "http.cuerpo": 50})
+
+def test_pipeline_escribe_jsonl_otlp():
+    import main
+
+    with ServiciosSimulados() as servicios, tempfile.TemporaryDirectory() as ruta_output:
+        cfg = servicios.configurar(cargar_configuracion(), ruta_output)
+        cfg["trazas"]["habilitado"] = "true"
+        configurar_limite_tasa(cfg)
+        resultados, contexto = main.ejecutar_pipeline(cfg)
+        archivos = glob.glob(f"{ruta_output}/trazas/*_{contexto.id_ejecucion}.jsonl")
+        assert len(archivos) == 1
+        spans = trazas.leer_spans(archivos[0])
+
+    assert trazas.traza_actual() is None
+    assert len({s["traceId"] for s in spans}) == 1
+    ids = {s["spanId"]: s for s in spans}
+    raices = [s for s in spans if "parentSpanId" not in s]
+    assert [s["name"] for s in raices] == ["pipeline"]
+    etapas = {s["name"] for s in spans if s.get("parentSpanId") == raices[0]["spanId"]}
+    assert etapas == set(resultados)
+    peticiones = [s for s in spans if s["name"].startswith("HTTP ")]
+    assert peticiones and all(s["kind"] == trazas.TIPO_CLIENTE and s["parentSpanId"] in ids for s in peticiones)
+    assert any(s["name"] == "superadmin.login" for s in spans)
+    assert any(s["name"].startswith("parseo.") for s in spans)
+    exportado = trazas.a_otlp(spans)
+    assert exportado["resourceSpans"][0]["scopeSpans"][0]["spans"] == spans
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from utilidades.worker import TrabajadorResidente, enviar_orden
+
+# pytest -v test/test_worker.py
+
+@pytest.fixture
+def trabajador(tmp_path):
+    ordenes = []
+
+    def ejecutar(orden):
+        ordenes.append(orden)
+        return {"exito": True, "sin_cache": orden.get("sin_cache", False)}
+
+    ruta = str(tmp_path / "worker.sock")
+    trabajador = TrabajadorResidente(ruta, ejecutar)
+    hilo = threading.Thread(target=trabajador.iniciar, daemon=True)
+    hilo.start()
+    limite = time.monotonic() + 5
+    while trabajador._servidor is None and time.monotonic() < limite:
+        time.sleep(0.01)
+    yield trabajador, ruta, ordenes
+    trabajador.detener()
+    hilo.join(5)
+
+def test_ejecutar_por_socket(trabajador):
+    _, ruta, ordenes = trabajador
+    respuesta = enviar_orden(ruta, {"comando": "ejecutar", "sin_cache": True}, timeout=5)
+    assert respuesta == {"ok": True, "exito": True, "sin_cache": True}
+    assert len(ordenes) == 1
+
+def test_estado_y_comando_desconocido(trabajador):
+    _, ruta, _ = trabajador
+    enviar_orden(ruta, {"comando": "ejecutar"}, timeout=5)
+    estado = enviar_orden(ruta, {"comando": "estado"}, timeout=5)
+    assert estado["ok"] and estado["ejecuciones"] == 1
+    assert not enviar_orden(ruta, {"comando": "otro"}, timeout=5)["ok"]
+
+def test_ejecuciones_serializadas(tmp_path):
+    en_curso, maximo = [0], [0]
+    lock = threading.Lock()
+
+    def ejecutar(orden):
+        with lock:
+            en_curso[0] += 1
+            maximo[0] = max(maximo[0], en_curso[0])
+        time.sleep(0.05)
+        with lock:
+            en_curso[0] -= 1
+        return {}
+
+    trabajador = TrabajadorResidente(str(tmp_path / "w.sock"), ejecutar)
+    hilos = [threading.Thread(target=trabajador.atender, args=({"comando": "ejecutar"},)) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert maximo[0] == 1
+    assert trabajador.ejecuciones == 4
+
+def test_socket_huerfano_se_reemplaza(tmp_path):
+    ruta = tmp_path / "worker.sock"
+    ruta.write_text("")
+    trabajador = TrabajadorResidente(str(ruta), lambda orden: {})
+    trabajador._preparar_socket()
+    assert not ruta.exists()
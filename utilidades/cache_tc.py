@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import date
+
+from config.config import obtener_parametro
+
+# Configuración del logger
+logger = logging.getLogger("Utils - Cache TC")
+
+
+def fecha_negocio():
+    """Fecha de negocio de la ejecución (fecha local, formato YYYY-MM-DD)."""
+    return date.today().isoformat()
+
+
+class CacheTipoCambio:
+    def __init__(self, ruta_db):
+        """
+        Cache persistente de tipos de cambio ya parseados, en SQLite.
+
+        Cada registro se identifica por fuente y fecha de negocio y guarda el instante en
+        que se obtuvo, de modo que cada lector decide su propio TTL.
+
+        :param ruta_db: Ruta del archivo SQLite.
+        """
+        self.ruta_db = ruta_db
+        directorio = os.path.dirname(ruta_db)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with self._conectar() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS tipo_cambio ("
+                " fuente TEXT NOT NULL,"
+                " fecha_negocio TEXT NOT NULL,"
+                " valor TEXT NOT NULL,"
+                " obtenido_en REAL NOT NULL,"
+                " PRIMARY KEY (fuente, fecha_negocio))"
+            )
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS revalidacion ("
+                " url TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " valor TEXT NOT NULL,"
+                " actualizado_en REAL NOT NULL)"
+            )
+
+    def _conectar(self):
+        # Una conexión por operación: la cache se usa desde varios hilos (Bot 01 concurrente)
+        return sqlite3.connect(self.ruta_db, timeout=5)
+
+    def obtener(self, fuente, ttl, fecha=None):
+        """
+        Obtiene el valor cacheado de una fuente si no ha vencido.
+
+        :param fuente: Nombre de la fuente (ej. "bloomberg", "sbs").
+        :param ttl: Vigencia en segundos.
+        :param fecha: Fecha de negocio (por defecto la fecha actual).
+        :return: El valor guardado o None si no existe o venció.
+        """
+        fecha = fecha or fecha_negocio()
+        try:
+            with self._conectar() as conexion:
+                fila = conexion.execute(
+                    "SELECT valor, obtenido_en FROM tipo_cambio WHERE fuente = ? AND fecha_negocio = ?",
+                    (fuente, fecha),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo leer la cache de {fuente}: {e}")
+            return None
+
+        if fila is None:
+            return None
+        valor, obtenido_en = fila
+        antiguedad = time.time() - obtenido_en
+        if antiguedad > ttl:
+            logger.info(f"Cache de {fuente} vencida ({antiguedad:.0f}s > {ttl}s)")
+            return None
+        logger.info(f"Usando valor cacheado de {fuente} (antigüedad {antiguedad:.0f}s)")
+        return json.loads(valor)
+
+    def guardar(self, fuente, valor, fecha=None):
+        """
+        Guarda (o reemplaza) el valor de una fuente para la fecha de negocio.
+
+        :param fuente: Nombre de la fuente.
+        :param valor: Valor serializable en JSON.
+        :param fecha: Fecha de negocio (por defecto la fecha actual).
+        """
+        fecha = fecha or fecha_negocio()
+        try:
+            with self._conectar() as conexion:
+                conexion.execute(
+                    "INSERT OR REPLACE INTO tipo_cambio (fuente, fecha_negocio, valor, obtenido_en) VALUES (?, ?, ?, ?)",
+                    (fuente, fecha, json.dumps(valor), time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo guardar en cache el valor de {fuente}: {e}")
+
+
+    def obtener_validacion(self, url):
+        """
+        Obtiene los validadores HTTP y el último valor parseado de una URL.
+
+        :return: dict con etag, last_modified y valor, o None si no hay registro.
+        """
+        try:
+            with self._conectar() as conexion:
+                fila = conexion.execute(
+                    "SELECT etag, last_modified, valor FROM revalidacion WHERE url = ?", (url,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudieron leer los validadores de {url}: {e}")
+            return None
+        if fila is None:
+            return None
+        etag, last_modified, valor = fila
+        return {"etag": etag, "last_modified": last_modified, "valor": json.loads(valor)}
+
+    def guardar_validacion(self, url, etag, last_modified, valor):
+        """Guarda (o reemplaza) los validadores de una URL junto con el valor parseado."""
+        try:
+            with self._conectar() as conexion:
+                conexion.execute(
+                    "INSERT OR REPLACE INTO revalidacion (url, etag, last_modified, valor, actualizado_en)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, json.dumps(valor), time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudieron guardar los validadores de {url}: {e}")
+
+
+def cabeceras_condicionales(validacion):
+    """Cabeceras If-None-Match / If-Modified-Since a partir de un registro de validación."""
+    cabeceras = {}
+    if validacion:
+        if validacion.get("etag"):
+            cabeceras["If-None-Match"] = validacion["etag"]
+        if validacion.get("last_modified"):
+            cabeceras["If-Modified-Since"] = validacion["last_modified"]
+    return cabeceras
+
+
+def consultar_con_revalidacion(cache, url, peticion, parsear):
+    """
+    Descarga una página con GET condicional y reutiliza el último valor parseado si no cambió.
+
+    Si hay validadores guardados para la URL se envían If-None-Match / If-Modified-Since;
+    ante un 304 se retorna el valor guardado sin descargar ni parsear la página. Si la
+    respuesta es nueva, se parsea y se guardan sus validadores (ETag / Last-Modified).
+
+    :param cache: CacheTipoCambio o None (sin cache se hace un GET normal).
+    :param url: URL consultada (clave de los validadores).
+    :param peticion: Función (cabeceras_condicionales) -> respuesta de requests o None.
+    :param parsear: Función (respuesta) -> valor serializable en JSON, o None.
+    :return: Valor parseado o reutilizado (None si no se obtuvo).
+    """
+    validacion = cache.obtener_validacion(url) if cache is not None else None
+    response = peticion(cabeceras_condicionales(validacion))
+    if response is None:
+        return None
+
+    if response.status_code == 304:
+        response.close()
+        if validacion is not None:
+            logger.info(f"{url} sin cambios (304): se reutiliza el valor {validacion['valor']}")
+            return validacion["valor"]
+        logger.warning(f"{url} respondió 304 sin validadores guardados")
+        return None
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    valor = parsear(response)
+    if cache is not None and valor is not None and (etag or last_modified):
+        cache.guardar_validacion(url, etag, last_modified, valor)
+    return valor
+
+
+def obtener_cache(cfg):
+    """
+    Retorna la cache configurada, o None si está deshabilitada o se pidió omitirla.
+
+    :param cfg: Configuración cargada.
+    """
+    if not obtener_parametro(cfg, "cache", "habilitado", False, bool):
+        return None
+    if obtener_parametro(cfg, "cache", "omitir", False, bool):
+        logger.info("Cache de tipos de cambio omitida por configuración")
+        return None
+    ruta_output = obtener_parametro(cfg, "rutas", "ruta_output", ".")
+    archivo = obtener_parametro(cfg, "cache", "archivo", "cache_tc.sqlite")
+    return CacheTipoCambio(os.path.join(ruta_output, archivo))
+
+
+def obtener_cache_revalidacion(cfg):
+    """Cache para GET condicional, o None si está deshabilitada (cache.revalidacion)."""
+    if not obtener_parametro(cfg, "cache", "revalidacion", False, bool):
+        return None
+    return obtener_cache(cfg)
+
+
+def ttl_fuente(cfg, fuente):
+    """TTL en segundos de una fuente: cache.ttl_<fuente> o, en su defecto, cache.ttl."""
+    ttl_defecto = obtener_parametro(cfg, "cache", "ttl", 900.0, float)
+    return obtener_parametro(cfg, "cache", f"ttl_{fuente}", ttl_defecto, float)
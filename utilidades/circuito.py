@@ -0,0 +1,186 @@
+import logging
+import os
+import sqlite3
+import time
+
+from config.config import obtener_parametro
+from utilidades.metricas import REGISTRO
+
+# Configuración del logger
+logger = logging.getLogger("Utils - Circuito")
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+# Valor del indicador tc_circuito_estado por estado
+VALOR_ESTADO = {CERRADO: 0, SEMIABIERTO: 1, ABIERTO: 2}
+
+ESTADO_CIRCUITO = REGISTRO.indicador(
+    "tc_circuito_estado",
+    "Estado del circuito de cada fuente (0 cerrado, 1 semiabierto, 2 abierto)",
+    ("fuente",),
+)
+OMITIDAS = REGISTRO.contador(
+    "tc_circuito_omitido_total",
+    "Consultas omitidas porque el circuito de la fuente estaba abierto",
+    ("fuente",),
+)
+
+
+class CircuitoFuentes:
+    def __init__(self, ruta_db, umbral_fallos=3, espera_apertura=300.0):
+        """
+        Circuit breaker por fuente de tipo de cambio, persistido en SQLite entre ejecuciones.
+
+        - cerrado: la fuente se consulta normalmente; se cuentan los fallos consecutivos.
+        - abierto: tras umbral_fallos fallos seguidos la fuente se omite sin consultarla.
+        - semiabierto: pasados espera_apertura segundos se permite una sola consulta de
+          sondeo; si entrega un valor el circuito se cierra y si falla se vuelve a abrir.
+
+        :param ruta_db: Ruta del archivo SQLite.
+        :param umbral_fallos: Fallos consecutivos que abren el circuito.
+        :param espera_apertura: Segundos que el circuito permanece abierto antes de sondear.
+        """
+        self.ruta_db = ruta_db
+        self.umbral_fallos = max(1, umbral_fallos)
+        self.espera_apertura = espera_apertura
+        directorio = os.path.dirname(ruta_db)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with self._conectar() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS circuito ("
+                " fuente TEXT PRIMARY KEY,"
+                " estado TEXT NOT NULL,"
+                " fallos INTEGER NOT NULL,"
+                " abierto_en REAL,"
+                " actualizado_en REAL NOT NULL)"
+            )
+
+    def _conectar(self):
+        # Una conexión por operación: el circuito se usa desde varios hilos (Bot 01 concurrente)
+        return sqlite3.connect(self.ruta_db, timeout=5)
+
+    def _transaccion(self, fuente, decidir):
+        """
+        Lee y actualiza el registro de una fuente dentro de una transacción exclusiva.
+
+        :param decidir: Función (estado, fallos, abierto_en, ahora) -> (retorno, nuevo registro o None).
+        """
+        conexion = self._conectar()
+        try:
+            conexion.isolation_level = None
+            conexion.execute("BEGIN IMMEDIATE")
+            fila = conexion.execute(
+                "SELECT estado, fallos, abierto_en FROM circuito WHERE fuente = ?", (fuente,)
+            ).fetchone()
+            estado, fallos, abierto_en = fila if fila is not None else (CERRADO, 0, None)
+            ahora = time.time()
+            retorno, nuevo = decidir(estado, fallos, abierto_en, ahora)
+            if nuevo is not None:
+                conexion.execute(
+                    "INSERT OR REPLACE INTO circuito (fuente, estado, fallos, abierto_en, actualizado_en)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (fuente, *nuevo, ahora),
+                )
+                ESTADO_CIRCUITO.fijar(VALOR_ESTADO[nuevo[0]], fuente=fuente)
+            else:
+                ESTADO_CIRCUITO.fijar(VALOR_ESTADO[estado], fuente=fuente)
+            conexion.execute("COMMIT")
+            return retorno
+        finally:
+            conexion.close()
+
+    def permitir(self, fuente):
+        """
+        Indica si la fuente puede consultarse ahora.
+
+        Con el circuito abierto retorna False hasta que vence espera_apertura; entonces pasa
+        a semiabierto y solo el primer llamador recibe True (el sondeo). Un sondeo que no
+        reportó resultado en espera_apertura segundos se da por perdido y se permite otro.
+        """
+        def decidir(estado, fallos, abierto_en, ahora):
+            if estado == CERRADO:
+                return True, None
+            if ahora - (abierto_en or 0) < self.espera_apertura:
+                return False, None
+            logger.info(f"Circuito de {fuente}: se permite una consulta de sondeo")
+            return True, (SEMIABIERTO, fallos, ahora)
+
+        try:
+            permitida = self._transaccion(fuente, decidir)
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo leer el circuito de {fuente}: {e}")
+            return True
+        if not permitida:
+            OMITIDAS.inc(fuente=fuente)
+            logger.warning(f"Circuito de {fuente} abierto: se omite la consulta")
+        return permitida
+
+    def registrar_exito(self, fuente):
+        """Cierra el circuito y reinicia el conteo de fallos."""
+        def decidir(estado, fallos, abierto_en, ahora):
+            if estado == CERRADO and not fallos:
+                return None, None
+            if estado != CERRADO:
+                logger.info(f"Circuito de {fuente} cerrado: la fuente respondió")
+            return None, (CERRADO, 0, None)
+
+        self._registrar(fuente, decidir)
+
+    def registrar_fallo(self, fuente):
+        """Suma un fallo; abre el circuito al llegar al umbral o si falló el sondeo."""
+        def decidir(estado, fallos, abierto_en, ahora):
+            fallos += 1
+            if estado == SEMIABIERTO or (estado == CERRADO and fallos >= self.umbral_fallos):
+                logger.warning(f"Circuito de {fuente} abierto tras {fallos} fallos consecutivos")
+                return None, (ABIERTO, fallos, ahora)
+            return None, (estado, fallos, abierto_en)
+
+        self._registrar(fuente, decidir)
+
+    def liberar(self, fuente):
+        """
+        Devuelve un sondeo que terminó sin resultado (ej. cancelado porque otra fuente ganó),
+        para que la siguiente consulta pueda sondear sin esperar otra espera_apertura.
+        """
+        def decidir(estado, fallos, abierto_en, ahora):
+            if estado != SEMIABIERTO:
+                return None, None
+            return None, (ABIERTO, fallos, ahora - self.espera_apertura)
+
+        self._registrar(fuente, decidir)
+
+    def _registrar(self, fuente, decidir):
+        try:
+            self._transaccion(fuente, decidir)
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo actualizar el circuito de {fuente}: {e}")
+
+    def estado(self, fuente):
+        """Estado actual del circuito de una fuente (cerrado si nunca falló)."""
+        try:
+            with self._conectar() as conexion:
+                fila = conexion.execute("SELECT estado FROM circuito WHERE fuente = ?", (fuente,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo leer el circuito de {fuente}: {e}")
+            return CERRADO
+        return fila[0] if fila is not None else CERRADO
+
+
+def obtener_circuito(cfg):
+    """
+    Retorna el circuit breaker de fuentes configurado, o None si está deshabilitado.
+
+    :param cfg: Configuración cargada.
+    """
+    if not obtener_parametro(cfg, "circuito", "habilitado", False, bool):
+        return None
+    ruta_output = obtener_parametro(cfg, "rutas", "ruta_output", ".")
+    archivo = obtener_parametro(cfg, "circuito", "archivo", "circuito_fuentes.sqlite")
+    return CircuitoFuentes(
+        os.path.join(ruta_output, archivo),
+        umbral_fallos=obtener_parametro(cfg, "circuito", "umbral_fallos", 3, int),
+        espera_apertura=obtener_parametro(cfg, "circuito", "espera_apertura", 300.0, float),
+    )
@@ -0,0 +1,130 @@
+import logging
+import math
+import os
+import sqlite3
+import time
+
+from config.config import obtener_parametro
+from utilidades.metricas import REGISTRO
+
+# Configuración del logger
+logger = logging.getLogger("Utils - Cobertura")
+
+RESPALDOS_LANZADOS = REGISTRO.contador(
+    "tc_cobertura_lanzada_total",
+    "Consultas de respaldo lanzadas porque la principal no respondió dentro del retardo",
+    ("principal", "respaldo"),
+)
+GANADORES = REGISTRO.contador(
+    "tc_cobertura_ganador_total",
+    "Consultas con cobertura según la fuente que entregó el valor",
+    ("principal", "ganador"),
+)
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por el método del rango más cercano."""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[min(indice, len(ordenados) - 1)]
+
+
+class Cobertura:
+    def __init__(self, ruta_db, percentil=95.0, ventana=200, muestras_minimas=20,
+                 retardo_defecto=5.0, retardo_minimo=0.25, proxy_respaldo=""):
+        """
+        Solicitudes con cobertura (hedged requests) para las fuentes de tipo de cambio.
+
+        Se guarda en SQLite la latencia de las últimas 'ventana' consultas exitosas de cada
+        fuente; el retardo antes de lanzar un respaldo es el percentil configurado de esas
+        latencias. En el caso común la principal responde antes y no se lanza nada más.
+
+        :param ruta_db: Ruta del archivo SQLite.
+        :param percentil: Percentil (0-100) de la latencia usado como retardo.
+        :param ventana: Latencias guardadas por fuente.
+        :param muestras_minimas: Muestras necesarias para confiar en el percentil.
+        :param retardo_defecto: Retardo en segundos mientras no hay muestras suficientes.
+        :param retardo_minimo: Retardo mínimo en segundos (evita duplicar consultas rápidas).
+        :param proxy_respaldo: Proxy alternativo; si se define, el primer respaldo es la misma
+            fuente principal consultada a través de este proxy.
+        """
+        self.ruta_db = ruta_db
+        self.percentil = percentil
+        self.ventana = max(1, ventana)
+        self.muestras_minimas = max(1, muestras_minimas)
+        self.retardo_defecto = retardo_defecto
+        self.retardo_minimo = retardo_minimo
+        self.proxy_respaldo = proxy_respaldo
+        directorio = os.path.dirname(ruta_db)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with self._conectar() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS latencia ("
+                " fuente TEXT NOT NULL,"
+                " registrado_en REAL NOT NULL,"
+                " segundos REAL NOT NULL)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS latencia_fuente ON latencia (fuente, registrado_en)")
+
+    def _conectar(self):
+        # Una conexión por operación: se registra desde los hilos de las fuentes
+        return sqlite3.connect(self.ruta_db, timeout=5)
+
+    def registrar(self, fuente, segundos):
+        """Guarda la latencia de una consulta exitosa y descarta las que salen de la ventana."""
+        try:
+            with self._conectar() as conexion:
+                conexion.execute(
+                    "INSERT INTO latencia (fuente, registrado_en, segundos) VALUES (?, ?, ?)",
+                    (fuente, time.time(), segundos),
+                )
+                conexion.execute(
+                    "DELETE FROM latencia WHERE fuente = ? AND rowid NOT IN ("
+                    " SELECT rowid FROM latencia WHERE fuente = ? ORDER BY registrado_en DESC LIMIT ?)",
+                    (fuente, fuente, self.ventana),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo registrar la latencia de {fuente}: {e}")
+
+    def latencias(self, fuente):
+        """Latencias guardadas de una fuente, de la más reciente a la más antigua."""
+        try:
+            with self._conectar() as conexion:
+                filas = conexion.execute(
+                    "SELECT segundos FROM latencia WHERE fuente = ? ORDER BY registrado_en DESC", (fuente,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudieron leer las latencias de {fuente}: {e}")
+            return []
+        return [fila[0] for fila in filas]
+
+    def retardo(self, fuente):
+        """Segundos a esperar a la fuente antes de lanzar un respaldo."""
+        latencias = self.latencias(fuente)
+        if len(latencias) < self.muestras_minimas:
+            return self.retardo_defecto
+        return max(self.retardo_minimo, percentil(latencias, self.percentil))
+
+
+def obtener_cobertura(cfg):
+    """
+    Retorna la configuración de solicitudes con cobertura, o None si está deshabilitada.
+
+    :param cfg: Configuración cargada.
+    """
+    if not obtener_parametro(cfg, "cobertura", "habilitado", False, bool):
+        return None
+    ruta_output = obtener_parametro(cfg, "rutas", "ruta_output", ".")
+    archivo = obtener_parametro(cfg, "cobertura", "archivo", "latencias_fuentes.sqlite")
+    return Cobertura(
+        os.path.join(ruta_output, archivo),
+        percentil=obtener_parametro(cfg, "cobertura", "percentil", 95.0, float),
+        ventana=obtener_parametro(cfg, "cobertura", "ventana", 200, int),
+        muestras_minimas=obtener_parametro(cfg, "cobertura", "muestras_minimas", 20, int),
+        retardo_defecto=obtener_parametro(cfg, "cobertura", "retardo_defecto", 5.0, float),
+        retardo_minimo=obtener_parametro(cfg, "cobertura", "retardo_minimo", 0.25, float),
+        proxy_respaldo=obtener_parametro(cfg, "cobertura", "proxy_respaldo", ""),
+    )
@@ -0,0 +1,87 @@
+"""
+Contexto de ejecución del pipeline.
+
+Reemplaza el antiguo estado global de módulo: cada ejecución tiene su propio
+ContextoEjecucion inmutable y cada bot recibe un ContextoEtapa con una vista de solo
+lectura de ese contexto más un espacio propio donde publica sus salidas. El
+orquestador combina las salidas en un nuevo contexto para las etapas siguientes,
+por lo que varias ejecuciones pueden convivir en el mismo proceso.
+"""
+
+import uuid
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional
+
+
+class ContextoEjecucion:
+    """
+    Valores de una ejecución del pipeline (inmutable).
+
+    :param valores: Valores iniciales (ej. tipos de cambio ya conocidos).
+    :param id_ejecucion: Identificador de la ejecución (se genera si no se indica).
+    """
+
+    def __init__(self, valores: Optional[Mapping[str, Any]] = None, id_ejecucion: Optional[str] = None):
+        self.id_ejecucion = id_ejecucion or uuid.uuid4().hex[:12]
+        self._valores = MappingProxyType(dict(valores or {}))
+
+    @property
+    def valores(self) -> Mapping[str, Any]:
+        return self._valores
+
+    def get(self, clave: str, defecto: Any = None) -> Any:
+        return self._valores.get(clave, defecto)
+
+    def __getitem__(self, clave: str) -> Any:
+        return self._valores[clave]
+
+    def __contains__(self, clave: str) -> bool:
+        return clave in self._valores
+
+    def con(self, **cambios) -> "ContextoEjecucion":
+        """Retorna un nuevo contexto de la misma ejecución con los valores actualizados."""
+        valores = dict(self._valores)
+        valores.update(cambios)
+        return ContextoEjecucion(valores, self.id_ejecucion)
+
+    def __repr__(self) -> str:
+        return f"ContextoEjecucion({self.id_ejecucion}, {dict(self._valores)})"
+
+
+class ContextoEtapa:
+    """
+    Vista que recibe un bot: lee del contexto de la ejecución y publica sus salidas.
+
+    :param contexto: Contexto de la ejecución al momento de lanzar la etapa.
+    :param salidas_permitidas: Claves que la etapa declaró como salidas (None = cualquiera).
+    """
+
+    def __init__(self, contexto: Optional[ContextoEjecucion] = None, salidas_permitidas: Optional[Iterable[str]] = None):
+        self.contexto = contexto or ContextoEjecucion()
+        self.salidas_permitidas = set(salidas_permitidas) if salidas_permitidas is not None else None
+        self.salidas = {}
+
+    @property
+    def id_ejecucion(self) -> str:
+        return self.contexto.id_ejecucion
+
+    def get(self, clave: str, defecto: Any = None) -> Any:
+        """Obtiene un valor publicado por esta etapa o, si no, del contexto de la ejecución."""
+        if clave in self.salidas:
+            return self.salidas[clave]
+        return self.contexto.get(clave, defecto)
+
+    def __getitem__(self, clave: str) -> Any:
+        if clave in self.salidas:
+            return self.salidas[clave]
+        return self.contexto[clave]
+
+    def publicar(self, clave: str, valor: Any):
+        """
+        Publica una salida de la etapa.
+
+        :raises KeyError: Si la clave no está entre las salidas declaradas.
+        """
+        if self.salidas_permitidas is not None and clave not in self.salidas_permitidas:
+            raise KeyError(f"'{clave}' no está declarada como salida de la etapa")
+        self.salidas[clave] = valor
@@ -1,5 +1,3 @@
-import variables_globales as vg
-
 class BusinessException(TypeError):
     """
     Excepcion de negocio
@@ -8,10 +6,6 @@ class BusinessException(TypeError):
     params: mensaje (str) - Mensaje de error.
     """
 
-    def __init__(self, *args: object) -> None:
-        super().__init__(*args)
-        # Se asigna el mensaje de error a la variable global
-        vg.business_exception = args[0]
 
 class SystemException(TypeError):
     """
@@ -19,8 +13,4 @@ class SystemException(TypeError):
     
     Se utiliza para lanzar excepciones de sistema.
     params: mensaje (str) - Mensaje de error.
-    """
-    def __init__(self, *args: object) -> None:
-        super().__init__(*args)
-        # Se asigna el mensaje de error a la variable global
-        vg.system_exception = args[0]
\ No newline at end of file
+    """
\ No newline at end of file
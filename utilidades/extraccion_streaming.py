@@ -0,0 +1,161 @@
+"""
+Extracción incremental de valores desde páginas HTML descargadas en streaming.
+
+Los bloques de la respuesta se entregan a un HTMLPullParser de lxml a medida que
+llegan del socket. En cuanto el nodo buscado se cierra se extrae el valor y se deja
+de leer la respuesta, evitando descargar, decodificar y parsear la página completa.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from lxml import etree
+
+from utilidades.metricas import PARSEOS
+from utilidades.plazo import timeout_restante
+from utilidades.trazas import span
+
+logger = logging.getLogger("Utils - Extraccion Streaming")
+
+# Elementos voluminosos que nunca contienen el valor buscado; se vacían al cerrarse
+# para que el árbol parcial no crezca con scripts y estilos embebidos.
+ETIQUETAS_DESCARTABLES = {"script", "style", "svg", "noscript", "template"}
+
+TAMANO_BLOQUE = 16384
+
+
+class ObjetivoStreaming:
+    """
+    Describe el nodo que se busca dentro de la página.
+
+    :param nombre: Nombre descriptivo para el log.
+    :param es_objetivo: Función (elemento) -> bool evaluada al cerrarse cada elemento.
+    :param extraer: Función (elemento) -> valor; si retorna None se sigue buscando.
+    """
+
+    def __init__(self, nombre: str, es_objetivo: Callable[[Any], bool], extraer: Callable[[Any], Any]):
+        self.nombre = nombre
+        self.es_objetivo = es_objetivo
+        self.extraer = extraer
+
+
+def extraer_en_streaming(bloques: Iterable[bytes],
+                         objetivo: ObjetivoStreaming,
+                         encoding: Optional[str] = None) -> Tuple[Any, int]:
+    """
+    Alimenta el parser incremental con los bloques recibidos hasta encontrar el objetivo.
+
+    :param bloques: Iterable de bloques de bytes (se deja de consumir al encontrar el valor).
+    :param objetivo: ObjetivoStreaming a buscar.
+    :param encoding: Codificación declarada por el servidor (opcional).
+    :return: Tupla (valor o None, bytes leídos).
+    """
+    parser = etree.HTMLPullParser(events=("end",), encoding=encoding)
+    bytes_leidos = 0
+
+    def _procesar_eventos():
+        for _, elemento in parser.read_events():
+            if not isinstance(elemento.tag, str):
+                continue
+            if objetivo.es_objetivo(elemento):
+                valor = objetivo.extraer(elemento)
+                if valor is not None:
+                    return valor
+            elif elemento.tag in ETIQUETAS_DESCARTABLES:
+                elemento.clear(keep_tail=True)
+        return None
+
+    for bloque in bloques:
+        if not bloque:
+            continue
+        bytes_leidos += len(bloque)
+        parser.feed(bloque)
+        valor = _procesar_eventos()
+        if valor is not None:
+            logger.info(f"{objetivo.nombre}: valor encontrado tras leer {bytes_leidos} bytes")
+            return valor, bytes_leidos
+
+    try:
+        parser.close()
+    except etree.XMLSyntaxError as e:
+        logger.debug(f"{objetivo.nombre}: documento incompleto al cerrar el parser: {e}")
+    valor = _procesar_eventos()
+    if valor is None:
+        logger.warning(f"{objetivo.nombre}: no se encontró el nodo buscado en {bytes_leidos} bytes")
+    return valor, bytes_leidos
+
+
+def iterar_respuesta(response, tamano_bloque: int = TAMANO_BLOQUE) -> Iterable[bytes]:
+    """
+    Itera los bloques de una respuesta de requests abierta con stream=True.
+
+    Usa read1 cuando está disponible (urllib3 >= 2) para entregar cada bloque apenas
+    llega del socket, ya descomprimido.
+    """
+    leer1 = getattr(response.raw, "read1", None)
+    if leer1 is not None:
+        return iter(lambda: leer1(tamano_bloque, decode_content=True), b"")
+    return response.iter_content(chunk_size=tamano_bloque)
+
+
+def _con_limite(bloques: Iterable[bytes], timeout_total: Optional[float] = None,
+                cancelacion: Optional[threading.Event] = None) -> Iterable[bytes]:
+    """
+    Corta la iteración con TimeoutError si se supera el tiempo total, o con
+    InterruptedError si se activa la cancelación (otra consulta ya entregó el valor).
+    """
+    limite = time.monotonic() + timeout_total if timeout_total is not None else None
+    for bloque in bloques:
+        if limite is not None and time.monotonic() > limite:
+            raise TimeoutError(f"Se superó el tiempo total de descarga ({timeout_total}s)")
+        if cancelacion is not None and cancelacion.is_set():
+            raise InterruptedError("Lectura cancelada")
+        yield bloque
+
+
+def _guardando(bloques: Iterable[bytes], leidos: list) -> Iterable[bytes]:
+    """Entrega los bloques tal cual y guarda una copia en 'leidos'."""
+    for bloque in bloques:
+        leidos.append(bloque)
+        yield bloque
+
+
+def extraer_de_respuesta(response, objetivo: ObjetivoStreaming, timeout_total: Optional[float] = None,
+                         cancelacion: Optional[threading.Event] = None,
+                         respaldo: Optional[Callable[[bytes], Any]] = None) -> Any:
+    """
+    Extrae el objetivo de una respuesta en streaming y cierra la conexión.
+
+    Al cerrar antes de terminar el cuerpo urllib3 descarta la conexión en lugar de
+    devolverla al pool; se prefiere eso a seguir leyendo bytes que no se usarán.
+
+    :param timeout_total: Tiempo máximo en segundos para leer la respuesta (opcional; se
+        recorta al plazo restante de la ejecución, si lo hay).
+    :param cancelacion: threading.Event opcional; si se activa se deja de leer y se cierra la conexión.
+    :param respaldo: Función (contenido) -> valor opcional; si el objetivo no aparece se aplica
+        sobre los bytes ya leídos (la página completa), sin volver a descargarla.
+    :return: Valor extraído o None.
+    """
+    try:
+        encoding = response.encoding if "charset" in response.headers.get("Content-Type", "") else None
+        bloques = iterar_respuesta(response)
+        leidos = []
+        if respaldo is not None:
+            bloques = _guardando(bloques, leidos)
+        timeout_total = timeout_restante(timeout_total)
+        if timeout_total is not None or cancelacion is not None:
+            bloques = _con_limite(bloques, timeout_total, cancelacion)
+        with span("parseo.streaming", objetivo=objetivo.nombre) as span_parseo:
+            valor, bytes_leidos = extraer_en_streaming(bloques, objetivo, encoding=encoding)
+            span_parseo.atributo("bytes_leidos", bytes_leidos)
+            if valor is None:
+                span_parseo.error("Valor no encontrado")
+        PARSEOS.inc(objetivo=objetivo.nombre, estrategia="streaming", resultado="sin_valor" if valor is None else "ok")
+        if valor is None and respaldo is not None and leidos:
+            logger.info(f"{objetivo.nombre}: se aplican las estrategias de respaldo sobre la página leída")
+            valor = respaldo(b"".join(leidos))
+        return valor
+    finally:
+        response.close()
@@ -0,0 +1,224 @@
+import logging
+import math
+import mmap
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime
+from heapq import merge
+
+from config.config import obtener_parametro
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se serializa dentro del proceso
+    fcntl = None
+
+# Configuración del logger
+logger = logging.getLogger("Utils - Historico TC")
+
+# Una columna por archivo, float64 en el orden nativo. ts se escribe al final: su largo
+# define cuántas observaciones están completas.
+COLUMNAS = ("compra", "venta", "medio", "ts")
+TAMANO_VALOR = array("d").itemsize
+
+Observacion = namedtuple("Observacion", "ts par fuente compra venta medio")
+
+
+def _epoch(valor):
+    """Convierte datetime, date (inicio del día local), texto ISO o número a segundos epoch."""
+    if valor is None or isinstance(valor, (int, float)):
+        return valor
+    if isinstance(valor, str):
+        valor = datetime.fromisoformat(valor)
+    if not isinstance(valor, datetime):
+        valor = datetime(valor.year, valor.month, valor.day)
+    return valor.timestamp()
+
+
+def _numero(valor):
+    return math.nan if valor is None else float(valor)
+
+
+class Tramo:
+    def __init__(self, par, fuente, mapas, inicio, fin):
+        """
+        Rango de observaciones de una serie sobre los archivos mapeados en memoria.
+
+        Las columnas son memoryview de float64 sin copia; se liberan con cerrar() o al
+        salir del bloque with.
+        """
+        self.par = par
+        self.fuente = fuente
+        self._mapas = mapas
+        self.columnas = {
+            nombre: memoryview(mapa).cast("d")[inicio:fin] if mapa is not None else memoryview(array("d"))
+            for nombre, mapa in mapas.items()
+        }
+
+    def __len__(self):
+        return len(self.columnas["ts"])
+
+    def __iter__(self):
+        ts, compra, venta, medio = (self.columnas[c] for c in ("ts", "compra", "venta", "medio"))
+        for i in range(len(ts)):
+            yield Observacion(ts[i], self.par, self.fuente, compra[i], venta[i], medio[i])
+
+    def cerrar(self):
+        for vista in self.columnas.values():
+            vista.release()
+        for mapa in self._mapas.values():
+            if mapa is not None:
+                mapa.close()
+        self.columnas = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class HistoricoTC:
+    def __init__(self, directorio):
+        """
+        Histórico local y de solo anexado de todas las observaciones de tipo de cambio.
+
+        Cada serie (par, fuente) es un directorio con una columna float64 por archivo
+        (ts, compra, venta, medio), ordenada por ts. Las consultas por rango de fechas
+        hacen búsqueda binaria sobre ts mapeado en memoria, así que leer un año de una
+        fuente no crea objetos Python por cada observación fuera del rango.
+
+        :param directorio: Directorio raíz del histórico.
+        """
+        self.directorio = directorio
+        self._lock = threading.Lock()
+
+    def _ruta_serie(self, par, fuente):
+        return os.path.join(self.directorio, par, fuente)
+
+    def registrar(self, fuente, par, compra=None, venta=None, medio=None, ts=None):
+        """
+        Agrega una observación. Los valores ausentes se guardan como NaN; si no se indica
+        medio y hay compra y venta, se usa su promedio.
+
+        :param ts: Segundos epoch (o datetime); por defecto el instante actual. Debe ser
+                   mayor o igual al último de la serie.
+        :return: True si se guardó; False si hubo un error de disco (solo se registra en el log).
+        """
+        if medio is None and compra is not None and venta is not None:
+            medio = (float(compra) + float(venta)) / 2
+        valores = {"compra": _numero(compra), "venta": _numero(venta), "medio": _numero(medio)}
+        ruta = self._ruta_serie(par, fuente)
+        try:
+            os.makedirs(ruta, exist_ok=True)
+            with self._lock, open(os.path.join(ruta, ".lock"), "w") as candado:
+                if fcntl is not None:
+                    fcntl.flock(candado, fcntl.LOCK_EX)
+                valores["ts"] = self._siguiente_ts(ruta, _epoch(ts))
+                for nombre in COLUMNAS:
+                    with open(os.path.join(ruta, f"{nombre}.f8"), "ab") as archivo:
+                        array("d", [valores[nombre]]).tofile(archivo)
+        except OSError as e:
+            logger.warning(f"No se pudo registrar la observación {par}/{fuente} en el histórico: {e}")
+            return False
+        return True
+
+    def _siguiente_ts(self, ruta, ts):
+        """ts a usar para la nueva observación, validando el orden de la serie."""
+        n, ultimo = 0, None
+        ruta_ts = os.path.join(ruta, "ts.f8")
+        if os.path.exists(ruta_ts):
+            n = os.path.getsize(ruta_ts) // TAMANO_VALOR
+        if n:
+            with open(ruta_ts, "rb") as archivo:
+                archivo.seek((n - 1) * TAMANO_VALOR)
+                ultimo = array("d", archivo.read(TAMANO_VALOR))[0]
+        self._recortar(ruta, n)
+        if ts is None:
+            return max(time.time(), ultimo or 0.0)
+        if ultimo is not None and ts < ultimo:
+            raise ValueError(f"El histórico es de solo anexado: {ts} es anterior a la última observación ({ultimo})")
+        return ts
+
+    @staticmethod
+    def _recortar(ruta, n):
+        """Descarta valores de una escritura interrumpida (columnas más largas que ts)."""
+        for nombre in COLUMNAS[:-1]:
+            ruta_columna = os.path.join(ruta, f"{nombre}.f8")
+            if os.path.exists(ruta_columna) and os.path.getsize(ruta_columna) > n * TAMANO_VALOR:
+                os.truncate(ruta_columna, n * TAMANO_VALOR)
+
+    def series(self, par=None, fuente=None):
+        """Lista de (par, fuente) con datos, filtrada opcionalmente por par y/o fuente."""
+        if not os.path.isdir(self.directorio):
+            return []
+        pares = [par] if par else sorted(os.listdir(self.directorio))
+        encontradas = []
+        for nombre_par in pares:
+            ruta_par = os.path.join(self.directorio, nombre_par)
+            if not os.path.isdir(ruta_par):
+                continue
+            fuentes = [fuente] if fuente else sorted(os.listdir(ruta_par))
+            for nombre_fuente in fuentes:
+                if os.path.exists(os.path.join(ruta_par, nombre_fuente, "ts.f8")):
+                    encontradas.append((nombre_par, nombre_fuente))
+        return encontradas
+
+    def tramo(self, par, fuente, desde=None, hasta=None):
+        """
+        Observaciones de una serie con desde <= ts < hasta, mapeadas en memoria.
+
+        :param desde: Inicio inclusivo (epoch, datetime, date o texto ISO); None = desde el inicio.
+        :param hasta: Fin exclusivo; None = hasta la última observación.
+        :return: Tramo (usar con with para liberar los mapas).
+        """
+        ruta = self._ruta_serie(par, fuente)
+        mapas = {}
+        try:
+            # ts primero: las demás columnas son al menos igual de largas aunque haya una escritura en curso
+            for nombre in reversed(COLUMNAS):
+                with open(os.path.join(ruta, f"{nombre}.f8"), "rb") as archivo:
+                    tamano = os.fstat(archivo.fileno()).st_size
+                    tamano -= tamano % TAMANO_VALOR
+                    mapas[nombre] = mmap.mmap(archivo.fileno(), tamano, access=mmap.ACCESS_READ) if tamano else None
+        except FileNotFoundError:
+            for mapa in mapas.values():
+                if mapa is not None:
+                    mapa.close()
+            return Tramo(par, fuente, {nombre: None for nombre in COLUMNAS}, 0, 0)
+
+        ts = memoryview(mapas["ts"]).cast("d") if mapas["ts"] is not None else []
+        try:
+            inicio = 0 if desde is None else bisect_left(ts, _epoch(desde))
+            fin = len(ts) if hasta is None else bisect_left(ts, _epoch(hasta))
+        finally:
+            if isinstance(ts, memoryview):
+                ts.release()
+        return Tramo(par, fuente, mapas, inicio, fin)
+
+    def consultar(self, desde=None, hasta=None, par=None, fuente=None):
+        """
+        Itera las observaciones en el rango de todas las series que coinciden, ordenadas por ts.
+
+        Las filas se generan a medida que se consumen; para cálculos sobre una serie
+        completa conviene tramo() y sus columnas.
+        """
+        tramos = [self.tramo(p, f, desde, hasta) for p, f in self.series(par, fuente)]
+        try:
+            yield from merge(*tramos, key=lambda observacion: observacion.ts)
+        finally:
+            for tramo in tramos:
+                tramo.cerrar()
+
+
+def obtener_historico(cfg):
+    """Retorna el histórico configurado, o None si está deshabilitado (historico.habilitado)."""
+    if not obtener_parametro(cfg, "historico", "habilitado", False, bool):
+        return None
+    ruta_output = obtener_parametro(cfg, "rutas", "ruta_output", ".")
+    directorio = obtener_parametro(cfg, "historico", "directorio", "historico_tc")
+    return HistoricoTC(os.path.join(ruta_output, directorio))
@@ -3,41 +3,342 @@ Cliente HTTP mejorado con configuraciones avanzadas para web scraping.
 Incluye retry logic, connection pooling, rate limiting y mejor manejo de errores.
 """
 
+import contextvars
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import random
+import threading
 import time
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit
 import urllib3
 from contextlib import contextmanager
+from utilidades.plazo import PlazoAgotado, plazo_actual, plazo_vencido, timeout_restante
+from utilidades.trazas import span
 
 # Deshabilitar warnings de SSL para desarrollo
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
-class RateLimiter:
-    """Controlador de rate limiting para evitar ser bloqueado."""
-    
-    def __init__(self, min_delay: float = 1.0, max_delay: float = 3.0):
-        self.min_delay = min_delay
-        self.max_delay = max_delay
-        self.last_request_time = 0
+# Proxy de salida utilizado por defecto para las fuentes externas
+PROXY_POR_DEFECTO = 'http://a3da2aa31a50a4775a4758b9a880c924-1dc7a13991739a83.elb.us-east-1.amazonaws.com:3128'
+
+# urllib3 solo descomprime brotli si alguna de estas librerías está instalada
+try:
+    import brotli  # noqa: F401
+    SOPORTA_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        SOPORTA_BROTLI = True
+    except ImportError:
+        SOPORTA_BROTLI = False
+
+class LimitadorPorHost:
+    """
+    Limitador de tasa por host basado en token bucket.
+
+    Cada host tiene su propio balde con capacidad 'rafaga' que se recarga a 'tasa'
+    tokens por segundo, de modo que una petición reciente a Bloomberg no retrasa una a
+    la SBS. Cada petición reserva un token bajo un lock (el saldo puede quedar negativo)
+    y espera exactamente el tiempo que falta para que ese token exista: las esperas son
+    justas en orden de llegada y el lock nunca se mantiene durante la espera, por lo que
+    sirve igual para hilos (esperar) y para corrutinas (esperar_async).
+
+    :param tasa: Peticiones por segundo por host (None o 0 = sin límite).
+    :param rafaga: Peticiones que se permiten seguidas antes de espaciar.
+    :param limites_por_host: Sobrescrituras {host: (tasa, rafaga)}.
+    """
+
+    def __init__(self,
+                 tasa: Optional[float] = 1.0,
+                 rafaga: float = 2,
+                 limites_por_host: Optional[Dict[str, Tuple[Optional[float], float]]] = None):
+        self.tasa = tasa
+        self.rafaga = max(1.0, float(rafaga))
+        self.limites_por_host = dict(limites_por_host or {})
+        self._baldes: Dict[str, list] = {}
+        self._estadisticas: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_de(url: str) -> str:
+        return (urlsplit(url).hostname or url).lower()
+
+    def _limite(self, host: str) -> Tuple[Optional[float], float]:
+        if host in self.limites_por_host:
+            tasa, rafaga = self.limites_por_host[host]
+            return tasa, max(1.0, float(rafaga))
+        return self.tasa, self.rafaga
+
+    def reservar(self, host: str) -> float:
+        """Reserva un token del host y retorna los segundos que hay que esperar para usarlo."""
+        tasa, rafaga = self._limite(host)
+        with self._lock:
+            ahora = time.monotonic()
+            espera = 0.0
+            if tasa:
+                balde = self._baldes.get(host)
+                if balde is None:
+                    balde = self._baldes[host] = [rafaga, ahora]
+                tokens, ultimo = balde
+                tokens = min(rafaga, tokens + (ahora - ultimo) * tasa) - 1
+                balde[0], balde[1] = tokens, ahora
+                espera = -tokens / tasa if tokens < 0 else 0.0
+
+            estadistica = self._estadisticas.setdefault(
+                host, {"peticiones": 0, "esperas": 0, "espera_total": 0.0, "espera_maxima": 0.0}
+            )
+            estadistica["peticiones"] += 1
+            if espera > 0:
+                estadistica["esperas"] += 1
+                estadistica["espera_total"] += espera
+                estadistica["espera_maxima"] = max(estadistica["espera_maxima"], espera)
+        return espera
+
+    @staticmethod
+    def _validar_plazo(espera: float, host: str):
+        """Lanza PlazoAgotado si la espera no termina dentro del plazo de la ejecución."""
+        restante = timeout_restante()
+        if restante is not None and espera >= restante:
+            raise PlazoAgotado(f"La espera por límite de tasa para {host} ({espera:.3f}s) "
+                               f"supera el plazo restante ({restante:.3f}s)")
+
+    def esperar(self, url: str) -> float:
+        """
+        Bloquea el hilo hasta que haya token para el host de la URL. Retorna la espera.
+
+        :raises PlazoAgotado: Si la espera terminaría después del plazo de la ejecución.
+        """
+        espera = self.reservar(self.host_de(url))
+        if espera > 0:
+            self._validar_plazo(espera, self.host_de(url))
+            logger.debug(f"Límite de tasa: esperando {espera:.3f}s para {self.host_de(url)}")
+            with span("limite_tasa.espera", host=self.host_de(url)):
+                time.sleep(espera)
+        return espera
+
+    async def esperar_async(self, url: str) -> float:
+        """Versión para asyncio: suspende la corrutina sin bloquear el event loop."""
+        import asyncio
+
+        espera = self.reservar(self.host_de(url))
+        if espera > 0:
+            self._validar_plazo(espera, self.host_de(url))
+            logger.debug(f"Límite de tasa: esperando {espera:.3f}s para {self.host_de(url)}")
+            with span("limite_tasa.espera", host=self.host_de(url)):
+                await asyncio.sleep(espera)
+        return espera
+
+    def estadisticas(self) -> Dict[str, Dict[str, float]]:
+        """Peticiones y tiempo de espera acumulado por host."""
+        with self._lock:
+            return {host: dict(valores) for host, valores in self._estadisticas.items()}
+
+    def reiniciar_estadisticas(self):
+        with self._lock:
+            self._estadisticas.clear()
+
+
+# Limitador compartido por todos los clientes (síncrono y asíncrono) del proceso
+_limitador_global = LimitadorPorHost()
+
+def get_rate_limiter() -> LimitadorPorHost:
+    """Obtiene el limitador de tasa por host compartido."""
+    return _limitador_global
+
+def configurar_limite_tasa(cfg) -> LimitadorPorHost:
+    """
+    Aplica la sección [limite_tasa] al limitador compartido.
+
+    Los límites por host se leen de la subsección [[por_host]] (host = tasa, rafaga).
+    """
+    from config.config import obtener_parametro
+
+    limitador = _limitador_global
+    limitador.tasa = obtener_parametro(cfg, "limite_tasa", "tasa", limitador.tasa, float)
+    limitador.rafaga = max(1.0, obtener_parametro(cfg, "limite_tasa", "rafaga", limitador.rafaga, float))
+    try:
+        por_host = cfg["limite_tasa"]["por_host"]
+        for host, valor in por_host.items():
+            valores = [valor] if isinstance(valor, str) else list(valor)
+            tasa = float(valores[0])
+            rafaga = float(valores[1]) if len(valores) > 1 else limitador.rafaga
+            limitador.limites_por_host[host.lower()] = (tasa, rafaga)
+    except (KeyError, TypeError, AttributeError):
+        pass
+    except ValueError as e:
+        logger.warning(f"Límites por host inválidos en [limite_tasa]: {e}")
+    return limitador
+
+class SondaIPEgreso:
+    """
+    Diagnóstico opcional de la IP de salida.
+
+    El resultado se cachea por proxy con un TTL y se refresca en un hilo en segundo
+    plano, de modo que la petición de datos nunca espera a la consulta de la IP.
+    """
+
+    URL_IP = 'https://api.ipify.org?format=json'
+
+    def __init__(self, session: requests.Session, ttl: float = 600.0, timeout: float = 5.0):
+        self.session = session
+        self.ttl = ttl
+        self.timeout = timeout
+        self._cache: Dict[str, tuple] = {}
+        self._refrescando = set()
+        self._lock = threading.Lock()
+
+    def obtener(self, proxy: Optional[str]) -> Optional[str]:
+        """
+        Retorna la IP cacheada para el proxy indicado (None si aún no se conoce).
+        Si la entrada no existe o venció, programa un refresco en segundo plano.
+        """
+        clave = proxy or "directo"
+        with self._lock:
+            entrada = self._cache.get(clave)
+            vigente = entrada is not None and time.monotonic() - entrada[1] < self.ttl
+            if not vigente and clave not in self._refrescando:
+                self._refrescando.add(clave)
+                threading.Thread(
+                    target=self._refrescar, args=(clave, proxy), name="sonda_ip", daemon=True
+                ).start()
+        return entrada[0] if entrada else None
+
+    def _refrescar(self, clave: str, proxy: Optional[str]):
+        """Consulta la IP de salida y actualiza la cache."""
+        ip = None
+        try:
+            proxies = {'http': proxy, 'https': proxy} if proxy else None
+            respuesta = self.session.get(self.URL_IP, proxies=proxies, timeout=self.timeout)
+            ip = respuesta.json()['ip']
+            logger.info(f"IP de salida para {clave}: {ip}")
+        except Exception as e:
+            logger.debug(f"No se pudo obtener la IP de salida para {clave}: {e}")
+        finally:
+            with self._lock:
+                self._refrescando.discard(clave)
+                if ip:
+                    self._cache[clave] = (ip, time.monotonic())
+
+# User-Agents e idiomas para rotación (compartidos por los clientes síncrono y asíncrono)
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:122.0) Gecko/20100101 Firefox/122.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/120.0.0.0",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0"
+]
+
+IDIOMAS = [
+    "es-PE,es;q=0.9,en;q=0.8,en-US;q=0.7",
+    "en-US,en;q=0.9,es;q=0.8",
+    "es-ES,es;q=0.9,en;q=0.8",
+    "en-GB,en;q=0.9,es;q=0.8",
+    "es-MX,es;q=0.9,en;q=0.8"
+]
+
+# Política de reintentos común: estados que se reintentan y factor de backoff exponencial
+ESTADOS_REINTENTABLES = [429, 500, 502, 503, 504, 520, 521, 522, 523, 524]
+METODOS_REINTENTABLES = ["HEAD", "GET", "OPTIONS"]
+BACKOFF_FACTOR = 2
+
+# Evento de cancelación de la petición en curso en este hilo (make_request con cancelacion)
+_cancelacion_peticion: contextvars.ContextVar = contextvars.ContextVar("cancelacion_peticion", default=None)
+
+
+class PeticionCancelada(Exception):
+    """La petición se canceló (por ejemplo, otra fuente ya entregó el valor)."""
+
+
+class ReintentosConPlazo(Retry):
+    """
+    Política de reintentos de urllib3 que respeta el plazo de la ejecución (utilidades.plazo).
+
+    El adaptador de requests reintenta por su cuenta, fuera de make_request: sin esto un host
+    colgado seguiría reconectando y durmiendo el backoff mucho después de vencido el plazo.
+    Con un plazo activo no se reintenta una vez vencido, las esperas (backoff y Retry-After)
+    se recortan al tiempo restante y, si el plazo vence durante la espera, se lanza
+    PlazoAgotado en lugar de hacer otro intento.
+
+    Las peticiones cancelables (make_request con cancelacion) no se reintentan aquí: las
+    reintenta el llamador, que revisa la cancelación entre intentos.
+    """
+
+    @staticmethod
+    def _recortar(segundos: float) -> float:
+        plazo = plazo_actual()
+        return segundos if plazo is None else max(0.0, min(segundos, plazo.restante()))
+
+    def is_exhausted(self) -> bool:
+        return super().is_exhausted() or plazo_vencido() or _cancelacion_peticion.get() is not None
+
+    def get_backoff_time(self) -> float:
+        return self._recortar(super().get_backoff_time())
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else self._recortar(retry_after)
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        timeout_restante()
+
+
+class RotacionHeaders:
+    """Headers de navegador con rotación de User-Agent e idioma (base de los clientes HTTP)."""
+
+    user_agents = USER_AGENTS
+    languages = IDIOMAS
+
+    def _get_default_headers(self) -> Dict[str, str]:
+        """Genera headers por defecto más robustos."""
+        return {
+            "User-Agent": random.choice(self.user_agents),
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+            "Accept-Language": random.choice(self.languages),
+            "DNT": "1",
+            "Connection": "keep-alive",
+            "Upgrade-Insecure-Requests": "1",
+            "Sec-Fetch-Dest": "document",
+            "Sec-Fetch-Mode": "navigate",
+            "Sec-Fetch-Site": "none",
+            "Sec-Fetch-User": "?1",
+            "Cache-Control": "no-cache",
+            "Pragma": "no-cache",
+            "Sec-Ch-Ua": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+            "Sec-Ch-Ua-Mobile": "?0",
+            "Sec-Ch-Ua-Platform": '"Windows"'
+        }
     
-    def wait(self):
-        """Espera un tiempo aleatorio entre peticiones."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+    def get_random_headers(self) -> Dict[str, str]:
+        """Genera headers aleatorios para parecer más natural."""
+        headers = self._get_default_headers()
         
-        if time_since_last < self.min_delay:
-            sleep_time = random.uniform(self.min_delay, self.max_delay)
-            time.sleep(sleep_time)
+        # Rotar User-Agent
+        headers["User-Agent"] = random.choice(self.user_agents)
+        
+        # Rotar Accept-Language
+        headers["Accept-Language"] = random.choice(self.languages)
+        
+        # Agregar headers adicionales aleatorios
+        if random.random() > 0.5:
+            headers["Referer"] = "https://www.google.com/"
         
-        self.last_request_time = time.time()
+        return headers
+
+    @staticmethod
+    def accept_encoding() -> str:
+        """Valor de Accept-Encoding según los decodificadores disponibles."""
+        return "gzip, deflate, br" if SOPORTA_BROTLI else "gzip, deflate"
 
-class AdvancedHTTPClient:
+
+class AdvancedHTTPClient(RotacionHeaders):
     """
     Cliente HTTP avanzado con múltiples mejoras:
     - Connection pooling
@@ -53,23 +354,25 @@ class AdvancedHTTPClient:
                  timeout: int = 15,
                  pool_connections: int = 10,
                  pool_maxsize: int = 20,
-                 rate_limit_min: float = 1.0,
-                 rate_limit_max: float = 3.0,
-                 verify_ssl: bool = True):
+                 verify_ssl: bool = True,
+                 diagnostico_ip: bool = False,
+                 ip_ttl: float = 600.0,
+                 rate_limiter: Optional[LimitadorPorHost] = None):
         
         self.timeout = timeout
         self.verify_ssl = verify_ssl
-        self.rate_limiter = RateLimiter(rate_limit_min, rate_limit_max)
+        # Por defecto se comparte el limitador del proceso (los baldes son por host)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
         
         # Configurar sesión
         self.session = requests.Session()
         
         # Configurar retry strategy con backoff exponencial
-        retry_strategy = Retry(
+        retry_strategy = ReintentosConPlazo(
             total=max_retries,
-            status_forcelist=[429, 500, 502, 503, 504, 520, 521, 522, 523, 524],
-            allowed_methods=["HEAD", "GET", "OPTIONS"],
-            backoff_factor=2,  # Backoff exponencial: 1s, 2s, 4s, 8s...
+            status_forcelist=ESTADOS_REINTENTABLES,
+            allowed_methods=METODOS_REINTENTABLES,
+            backoff_factor=BACKOFF_FACTOR,  # Backoff exponencial: 1s, 2s, 4s, 8s...
             respect_retry_after_header=True,
             raise_on_status=False  # No lanzar excepción automáticamente
         )
@@ -84,73 +387,64 @@ class AdvancedHTTPClient:
         
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
+
+        # Diagnóstico de IP de salida (opcional, no bloquea las peticiones)
+        self.sonda_ip = SondaIPEgreso(self.session, ttl=ip_ttl) if diagnostico_ip else None
         
-        # Lista de User-Agents para rotación
-        self.user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:122.0) Gecko/20100101 Firefox/122.0",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/120.0.0.0",
-            "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0"
-        ]
-        
-        # Lista de idiomas para rotación
-        self.languages = [
-            "es-PE,es;q=0.9,en;q=0.8,en-US;q=0.7",
-            "en-US,en;q=0.9,es;q=0.8",
-            "es-ES,es;q=0.9,en;q=0.8",
-            "en-GB,en;q=0.9,es;q=0.8",
-            "es-MX,es;q=0.9,en;q=0.8"
-        ]
+        # Listas de User-Agents e idiomas para rotación
+        self.user_agents = list(USER_AGENTS)
+        self.languages = list(IDIOMAS)
         
         # Configurar headers por defecto
         self.session.headers.update(self._get_default_headers())
     
-    def _get_default_headers(self) -> Dict[str, str]:
-        """Genera headers por defecto más robustos."""
-        return {
-            "User-Agent": random.choice(self.user_agents),
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "Accept-Language": random.choice(self.languages),
-            "DNT": "1",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "none",
-            "Sec-Fetch-User": "?1",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
-            "Sec-Ch-Ua": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-            "Sec-Ch-Ua-Mobile": "?0",
-            "Sec-Ch-Ua-Platform": '"Windows"'
-        }
-    
-    def get_random_headers(self) -> Dict[str, str]:
-        """Genera headers aleatorios para parecer más natural."""
-        headers = self._get_default_headers()
-        
-        # Rotar User-Agent
-        headers["User-Agent"] = random.choice(self.user_agents)
-        
-        # Rotar Accept-Language
-        headers["Accept-Language"] = random.choice(self.languages)
-        
-        # Agregar headers adicionales aleatorios
-        if random.random() > 0.5:
-            headers["Referer"] = "https://www.google.com/"
-        
-        return headers
-    
+    def habilitar_diagnostico_ip(self, ttl: float = 600.0):
+        """Activa la sonda de IP de salida cacheada para este cliente."""
+        if self.sonda_ip is None:
+            self.sonda_ip = SondaIPEgreso(self.session, ttl=ttl)
+        else:
+            self.sonda_ip.ttl = ttl
+
+    @staticmethod
+    def _leer_con_limite(response: requests.Response, limite: float, url: str,
+                         cancelacion: Optional[threading.Event] = None):
+        """
+        Lee el cuerpo de una respuesta en streaming sin superar el instante límite.
+
+        El timeout de requests aplica a cada lectura del socket; un servidor que envía
+        bytes lentamente puede mantener la descarga abierta indefinidamente. Aquí se
+        corta la lectura cuando se supera el límite total o se activa la cancelación.
+        """
+        partes = []
+        # read1 (urllib3 >= 2) retorna apenas hay datos disponibles; iter_content espera a llenar el bloque
+        leer1 = getattr(response.raw, "read1", None)
+        if leer1 is not None:
+            bloques = iter(lambda: leer1(16384, decode_content=True), b"")
+        else:
+            bloques = response.iter_content(chunk_size=16384)
+        for parte in bloques:
+            partes.append(parte)
+            if cancelacion is not None and cancelacion.is_set():
+                response.close()
+                raise PeticionCancelada(f"Descarga de {url} cancelada")
+            if time.monotonic() > limite:
+                response.close()
+                raise requests.exceptions.Timeout(f"Se superó el tiempo total de descarga de {url}")
+        response._content = b"".join(partes)
+        response._content_consumed = True
+
     def make_request(self, 
                     url: str, 
                     timeout: Optional[int] = None,
                     headers: Optional[Dict[str, str]] = None,
                     verify_ssl: Optional[bool] = None,
                     allow_redirects: bool = True,
-                    max_redirects: int = 5) -> Optional[requests.Response]:
+                    max_redirects: int = 5,
+                    proxies: Optional[Dict[str, str]] = None,
+                    timeout_total: Optional[float] = None,
+                    stream: bool = False,
+                    validadores: Optional[Dict[str, str]] = None,
+                    cancelacion: Optional[threading.Event] = None) -> Optional[requests.Response]:
         """
         Realiza una petición HTTP con todas las mejoras implementadas.
         
@@ -161,42 +455,79 @@ class AdvancedHTTPClient:
             verify_ssl: Si verificar SSL
             allow_redirects: Si permitir redirecciones
             max_redirects: Máximo número de redirecciones
+            proxies: Proxies a utilizar (por defecto PROXY_POR_DEFECTO para http)
+            timeout_total: Tiempo máximo en segundos para toda la descarga
+                (ambos timeouts se recortan al plazo restante de la ejecución, si lo hay)
+            stream: Si True retorna la respuesta sin leer el cuerpo (el llamador debe cerrarla)
+            validadores: Cabeceras If-None-Match / If-Modified-Since para un GET condicional
+                (la respuesta puede ser 304 sin cuerpo)
+            cancelacion: threading.Event opcional; si se activa no se inicia la petición y se
+                deja de leer el cuerpo. Sin reintentos del adaptador: reintenta el llamador.
             
         Returns:
-            Response object o None si hay error
+            Response object o None si hay error o si se canceló
         """
-        # Rate limiting
-        self.rate_limiter.wait()
-        
         try:
-            # Usar timeout personalizado o el por defecto
-            request_timeout = timeout or self.timeout
+            # Rate limiting por host (sin esperar más allá del plazo de la ejecución)
+            self.rate_limiter.esperar(url)
+
+            # Usar timeout personalizado o el por defecto, sin pasar del plazo de la ejecución
+            request_timeout = timeout_restante(timeout or self.timeout)
+            timeout_total = timeout_restante(timeout_total)
             
             # Usar headers personalizados o aleatorios
             request_headers = headers or self.get_random_headers()
+            if validadores:
+                # Con validadores se deja que el servidor decida: sin forzar no-cache
+                # (None elimina también la cabecera por defecto de la sesión)
+                request_headers = {**request_headers, **validadores, "Cache-Control": None, "Pragma": None}
             
             # Usar verify_ssl personalizado o el por defecto
             request_verify = verify_ssl if verify_ssl is not None else self.verify_ssl
             
             logger.info(f"Realizando petición a: {url}")
             logger.info(f"Timeout: {request_timeout}s, Headers: {len(request_headers)}")
-            proxies = {
-                'http': 'http://a3da2aa31a50a4775a4758b9a880c924-1dc7a13991739a83.elb.us-east-1.amazonaws.com:3128'
-            }
-            # Obtener la IP desde la que se realiza la request
-            ip_check_response = self.session.get('https://api.ipify.org?format=json', proxies=proxies)
-            ip_address = ip_check_response.json()['ip']
-            logger.info(f"Realizando request desde IP: {ip_address}")
+            if proxies is None:
+                proxies = {'http': PROXY_POR_DEFECTO}
+            # Diagnóstico de la IP de salida: solo se lee la cache, nunca se espera
+            if self.sonda_ip is not None:
+                proxy = proxies.get(url.split(':', 1)[0].lower())
+                ip_address = self.sonda_ip.obtener(proxy)
+                logger.info(f"Realizando request desde IP: {ip_address or 'pendiente'}")
             
-            response = self.session.get(
-                url,
-                headers=request_headers,
-                timeout=request_timeout,
-                verify=request_verify,
-                allow_redirects=allow_redirects,
-                stream=False,
-                proxies=proxies 
-            )
+            inicio = time.monotonic()
+            if timeout_total is not None:
+                # Ninguna lectura individual puede superar el límite total
+                request_timeout = min(request_timeout, timeout_total)
+            if cancelacion is not None and cancelacion.is_set():
+                raise PeticionCancelada(f"Petición a {url} cancelada antes de iniciarse")
+            token = _cancelacion_peticion.set(cancelacion)
+            try:
+                response = self.session.get(
+                    url,
+                    headers=request_headers,
+                    timeout=request_timeout,
+                    verify=request_verify,
+                    allow_redirects=allow_redirects,
+                    stream=stream or timeout_total is not None or cancelacion is not None,
+                    proxies=proxies
+                )
+            finally:
+                _cancelacion_peticion.reset(token)
+
+            if stream:
+                # El llamador consume el cuerpo incrementalmente y cierra la respuesta
+                logger.info(f"Respuesta recibida en streaming: {response.status_code}")
+                if response.status_code >= 400:
+                    logger.warning(f"Error HTTP {response.status_code} en {url}")
+                    response.close()
+                    return None
+                return response
+
+            if timeout_total is not None or cancelacion is not None:
+                limite = inicio + timeout_total if timeout_total is not None else float("inf")
+                with span("http.cuerpo"):
+                    self._leer_con_limite(response, limite, url, cancelacion)
             
             # Log de información de la respuesta
             logger.info(f"Respuesta recibida: {response.status_code} - {len(response.content)} bytes")
@@ -210,9 +541,11 @@ class AdvancedHTTPClient:
             # Convertir el contenido de bytes a texto
             try:
                 # Intentar detectar la codificación automáticamente
-                encoding = response.apparent_encoding
-                response.encoding = encoding
-                response.text  # Forzar decodificación
+                with span("http.decodificar") as span_decodificar:
+                    encoding = response.apparent_encoding
+                    response.encoding = encoding
+                    response.text  # Forzar decodificación
+                    span_decodificar.atributo("encoding", encoding)
                 logger.info(f"Codificación detectada: {encoding}")
             except (UnicodeDecodeError, AttributeError):
                 # Intentar codificaciones comunes en orden
@@ -230,6 +563,12 @@ class AdvancedHTTPClient:
             
             return response
             
+        except PlazoAgotado as e:
+            logger.warning(f"No se realizó la petición a {url}: {e}")
+            return None
+        except PeticionCancelada as e:
+            logger.info(str(e))
+            return None
         except requests.exceptions.Timeout as e:
             logger.warning(f"Timeout en petición a {url}: {e}")
             return None
@@ -267,15 +606,30 @@ class AdvancedHTTPClient:
             "pool_connections": self.session.adapters['http://'].poolmanager.connection_pool_kw.get('maxsize', 0),
             "pool_maxsize": self.session.adapters['http://'].poolmanager.connection_pool_kw.get('maxsize', 0),
             "timeout": self.timeout,
-            "verify_ssl": self.verify_ssl
+            "verify_ssl": self.verify_ssl,
+            "diagnostico_ip": self.sonda_ip is not None
         }
 
-# Instancia global del cliente HTTP avanzado
-advanced_http_client = AdvancedHTTPClient()
+# Instancia global del cliente HTTP avanzado. Se crea en el primer uso y no al importar
+# el módulo, para que --help, las órdenes al worker y las ejecuciones servidas desde la
+# cache no paguen la sesión, los adaptadores y la política de reintentos.
+_cliente_global: Optional[AdvancedHTTPClient] = None
+_lock_cliente_global = threading.Lock()
 
 def get_http_client() -> AdvancedHTTPClient:
-    """Obtiene la instancia global del cliente HTTP."""
-    return advanced_http_client
+    """Obtiene la instancia global del cliente HTTP (la crea en el primer uso)."""
+    global _cliente_global
+    if _cliente_global is None:
+        with _lock_cliente_global:
+            if _cliente_global is None:
+                _cliente_global = AdvancedHTTPClient()
+    return _cliente_global
+
+def __getattr__(nombre):
+    # Compatibilidad con el acceso directo a utilidades.httpclient.advanced_http_client
+    if nombre == "advanced_http_client":
+        return get_http_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
 def create_http_client(**kwargs) -> AdvancedHTTPClient:
     """Crea una nueva instancia del cliente HTTP con configuración personalizada."""
@@ -0,0 +1,332 @@
+"""
+Cliente HTTP asíncrono (asyncio + aiohttp), contraparte de AdvancedHTTPClient.
+
+Comparte con el cliente síncrono la rotación de headers, la política de reintentos con
+backoff exponencial, el proxy por defecto y el manejo de codificaciones, y agrega
+límites de conexiones por host y timeouts por host. Permite que las consultas a las
+fuentes y las publicaciones corran en paralelo en un solo event loop, sin un hilo por
+petición.
+
+aiohttp es una dependencia opcional: el módulo se puede importar sin ella, pero crear
+un AsyncHTTPClient lanza ImportError. Por eso es solo una librería: ningún bot lo usa
+todavía y las fuentes siguen en AdvancedHTTPClient. Igual que el cliente síncrono,
+respeta el plazo de la ejecución (utilidades.plazo) en cada intento y en las esperas.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from utilidades.httpclient import (
+    BACKOFF_FACTOR,
+    ESTADOS_REINTENTABLES,
+    METODOS_REINTENTABLES,
+    PROXY_POR_DEFECTO,
+    LimitadorPorHost,
+    RotacionHeaders,
+    get_rate_limiter,
+)
+from utilidades.plazo import PlazoAgotado, timeout_restante
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger("Utils - HTTPClient Async")
+
+# Máximo de espera entre reintentos (mismo tope que urllib3)
+BACKOFF_MAXIMO = 120.0
+
+# Codificaciones a probar cuando el servidor no declara charset y la detección falla
+CODIFICACIONES_RESPALDO = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+
+
+def _detectar_codificacion(contenido: bytes) -> str:
+    """Detecta la codificación del cuerpo como requests.apparent_encoding, con respaldo."""
+    try:
+        import charset_normalizer
+
+        resultado = charset_normalizer.from_bytes(contenido).best()
+        if resultado is not None:
+            return resultado.encoding
+    except ImportError:
+        pass
+    for codificacion in CODIFICACIONES_RESPALDO:
+        try:
+            contenido.decode(codificacion)
+            return codificacion
+        except UnicodeDecodeError:
+            continue
+    return 'utf-8'
+
+
+@dataclass
+class RespuestaAsync:
+    """
+    Respuesta ya leída por AsyncHTTPClient (interfaz compatible con lo que usan los bots).
+    """
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    encoding: Optional[str] = None
+    intentos: int = 1
+    duracion: float = 0.0
+    _texto: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def text(self) -> str:
+        if self._texto is None:
+            self._texto = self.content.decode(self.encoding or 'utf-8', errors='replace')
+        return self._texto
+
+    def json(self) -> Any:
+        import json
+
+        return json.loads(self.text)
+
+
+class AsyncHTTPClient(RotacionHeaders):
+    """
+    Cliente HTTP asíncrono con:
+    - Pool de conexiones con límite global y por host
+    - Timeouts de conexión, lectura y total (configurables por host)
+    - Retry logic con backoff exponencial y respeto de Retry-After
+    - Rotación de User-Agents y headers dinámicos
+    - Proxy por esquema (por defecto PROXY_POR_DEFECTO para http)
+    """
+
+    def __init__(self,
+                 max_retries: int = 3,
+                 timeout: float = 15,
+                 timeout_conexion: Optional[float] = None,
+                 timeout_total: Optional[float] = None,
+                 limite_conexiones: int = 20,
+                 limite_por_host: int = 4,
+                 timeouts_por_host: Optional[Dict[str, float]] = None,
+                 verify_ssl: bool = True,
+                 backoff_factor: float = BACKOFF_FACTOR,
+                 rate_limiter: Optional[LimitadorPorHost] = None):
+        """
+        :param max_retries: Reintentos ante errores de conexión o estados reintentables.
+        :param timeout: Timeout de lectura por defecto (segundos).
+        :param timeout_conexion: Timeout de conexión (por defecto igual a timeout).
+        :param timeout_total: Tiempo máximo por intento, incluida la descarga (None = sin límite).
+        :param limite_conexiones: Conexiones simultáneas máximas del pool.
+        :param limite_por_host: Conexiones simultáneas máximas por host.
+        :param timeouts_por_host: Timeout total por host (ej. {"www.sbs.gob.pe": 30}).
+        :param verify_ssl: Si verificar certificados SSL.
+        :param rate_limiter: Limitador por host (por defecto el compartido con el cliente síncrono).
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncHTTPClient requiere aiohttp (pip install aiohttp)")
+
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.timeout_conexion = timeout_conexion or timeout
+        self.timeout_total = timeout_total
+        self.limite_conexiones = limite_conexiones
+        self.limite_por_host = limite_por_host
+        self.timeouts_por_host = dict(timeouts_por_host or {})
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.verify_ssl = verify_ssl
+        self.backoff_factor = backoff_factor
+        self.user_agents = list(self.user_agents)
+        self.languages = list(self.languages)
+
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    def _obtener_sesion(self) -> "aiohttp.ClientSession":
+        # La sesión se crea dentro del event loop que la usará
+        if self._session is None or self._session.closed:
+            conector = aiohttp.TCPConnector(
+                limit=self.limite_conexiones,
+                limit_per_host=self.limite_por_host,
+                ssl=None if self.verify_ssl else False,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=conector,
+                headers=self._get_default_headers(),
+                auto_decompress=True,
+            )
+        return self._session
+
+    def _timeout_para(self, url: str, timeout: Optional[float], timeout_total: Optional[float]) -> "aiohttp.ClientTimeout":
+        host = urlsplit(url).hostname or ""
+        # Sin pasar del plazo de la ejecución (lanza PlazoAgotado si ya venció)
+        total = timeout_restante(timeout_total or self.timeouts_por_host.get(host) or self.timeout_total)
+        lectura = timeout or self.timeout
+        if total is not None:
+            lectura = min(lectura, total)
+        return aiohttp.ClientTimeout(total=total, connect=self.timeout_conexion, sock_read=lectura)
+
+    def _espera_reintento(self, intento: int, retry_after: Optional[str]) -> float:
+        """Backoff exponencial (backoff_factor * 2^(intento-1)) o el Retry-After del servidor."""
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAXIMO)
+            except ValueError:
+                pass
+        return min(self.backoff_factor * (2 ** (intento - 1)), BACKOFF_MAXIMO)
+
+    async def make_request(self,
+                           url: str,
+                           timeout: Optional[float] = None,
+                           headers: Optional[Dict[str, str]] = None,
+                           verify_ssl: Optional[bool] = None,
+                           allow_redirects: bool = True,
+                           max_redirects: int = 5,
+                           proxies: Optional[Dict[str, str]] = None,
+                           timeout_total: Optional[float] = None,
+                           method: str = "GET",
+                           json: Any = None,
+                           data: Any = None) -> Optional[RespuestaAsync]:
+        """
+        Realiza una petición HTTP con la misma política que AdvancedHTTPClient.make_request.
+
+        Args:
+            url: URL a consultar
+            timeout: Timeout de lectura personalizado
+            headers: Headers personalizados (por defecto headers aleatorios)
+            verify_ssl: Si verificar SSL
+            allow_redirects: Si permitir redirecciones
+            max_redirects: Máximo número de redirecciones
+            proxies: Proxies por esquema (por defecto PROXY_POR_DEFECTO para http)
+            timeout_total: Tiempo máximo en segundos por intento
+            method: Método HTTP (solo HEAD, GET y OPTIONS se reintentan)
+            json / data: Cuerpo de la petición
+
+        Returns:
+            RespuestaAsync o None si hay error o si se agotó el plazo de la ejecución
+        """
+        try:
+            return await self._make_request(url, timeout, headers, verify_ssl, allow_redirects, max_redirects,
+                                            proxies, timeout_total, method, json, data)
+        except PlazoAgotado as e:
+            logger.warning(f"No se realizó la petición a {url}: {e}")
+            return None
+
+    async def _make_request(self, url, timeout, headers, verify_ssl, allow_redirects, max_redirects,
+                            proxies, timeout_total, method, json, data) -> Optional[RespuestaAsync]:
+        session = self._obtener_sesion()
+        await self.rate_limiter.esperar_async(url)
+
+        request_headers = headers or self.get_random_headers()
+        if proxies is None:
+            proxies = {'http': PROXY_POR_DEFECTO}
+        proxy = proxies.get(urlsplit(url).scheme.lower())
+        ssl = None if (verify_ssl if verify_ssl is not None else self.verify_ssl) else False
+        reintentable = method.upper() in METODOS_REINTENTABLES
+        max_intentos = 1 + (self.max_retries if reintentable else 0)
+
+        logger.info(f"Realizando petición asíncrona a: {url}")
+        inicio = time.monotonic()
+        for intento in range(1, max_intentos + 1):
+            retry_after = None
+            try:
+                async with session.request(
+                    method,
+                    url,
+                    headers=request_headers,
+                    timeout=self._timeout_para(url, timeout, timeout_total),
+                    ssl=ssl,
+                    allow_redirects=allow_redirects,
+                    max_redirects=max_redirects,
+                    proxy=proxy,
+                    json=json,
+                    data=data,
+                ) as response:
+                    if response.status in ESTADOS_REINTENTABLES and intento < max_intentos:
+                        retry_after = response.headers.get("Retry-After")
+                        logger.warning(f"HTTP {response.status} en {url} (intento {intento} de {max_intentos})")
+                    else:
+                        contenido = await response.read()
+                        respuesta = RespuestaAsync(
+                            url=str(response.url),
+                            status_code=response.status,
+                            headers=dict(response.headers),
+                            content=contenido,
+                            encoding=response.charset or _detectar_codificacion(contenido),
+                            intentos=intento,
+                            duracion=time.monotonic() - inicio,
+                        )
+                        logger.info(f"Respuesta recibida: {respuesta.status_code} - {len(contenido)} bytes "
+                                    f"({respuesta.duracion:.2f}s, codificación {respuesta.encoding})")
+                        if respuesta.status_code >= 400:
+                            logger.warning(f"Error HTTP {respuesta.status_code} en {url}")
+                            return None
+                        return respuesta
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout en petición a {url} (intento {intento} de {max_intentos})")
+            except aiohttp.TooManyRedirects as e:
+                logger.warning(f"Demasiadas redirecciones en {url}: {e}")
+                return None
+            except aiohttp.ClientConnectionError as e:
+                logger.warning(f"Error de conexión a {url} (intento {intento} de {max_intentos}): {e}")
+            except aiohttp.ClientError as e:
+                logger.warning(f"Error de petición a {url}: {e}")
+                return None
+
+            if intento < max_intentos:
+                await asyncio.sleep(timeout_restante(self._espera_reintento(intento, retry_after)))
+        return None
+
+    async def make_requests(self, urls: List[str], **kwargs) -> List[Optional[RespuestaAsync]]:
+        """Realiza varias peticiones en paralelo (respetando los límites por host)."""
+        return await asyncio.gather(*(self.make_request(url, **kwargs) for url in urls))
+
+    async def close(self):
+        """Cierra la sesión y el pool de conexiones."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self) -> "AsyncHTTPClient":
+        self._obtener_sesion()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def get_session_info(self) -> Dict[str, Any]:
+        """Obtiene información de la configuración del cliente."""
+        return {
+            "limite_conexiones": self.limite_conexiones,
+            "limite_por_host": self.limite_por_host,
+            "timeout": self.timeout,
+            "timeout_total": self.timeout_total,
+            "timeouts_por_host": self.timeouts_por_host,
+            "verify_ssl": self.verify_ssl,
+        }
+
+
+def create_async_http_client(**kwargs) -> AsyncHTTPClient:
+    """Crea una instancia del cliente HTTP asíncrono con configuración personalizada."""
+    return AsyncHTTPClient(**kwargs)
+
+
+def crear_cliente_async(cfg) -> AsyncHTTPClient:
+    """
+    Crea el cliente asíncrono con los parámetros de la sección [http_async].
+
+    Los timeouts por host se leen de la subsección [[timeouts_por_host]] (host = segundos).
+    """
+    from config.config import obtener_parametro
+
+    try:
+        timeouts_por_host = {host: float(valor) for host, valor in cfg["http_async"]["timeouts_por_host"].items()}
+    except (KeyError, TypeError, AttributeError):
+        timeouts_por_host = {}
+    return AsyncHTTPClient(
+        max_retries=obtener_parametro(cfg, "http_async", "max_retries", 3, int),
+        timeout=obtener_parametro(cfg, "http_async", "timeout", 15.0, float),
+        timeout_conexion=obtener_parametro(cfg, "proxy", "timeout_conexion", None, float),
+        timeout_total=obtener_parametro(cfg, "http_async", "timeout_total", None, float),
+        limite_conexiones=obtener_parametro(cfg, "http_async", "limite_conexiones", 20, int),
+        limite_por_host=obtener_parametro(cfg, "http_async", "limite_por_host", 4, int),
+        timeouts_por_host=timeouts_por_host,
+    )
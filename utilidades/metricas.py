@@ -0,0 +1,332 @@
+"""
+Métricas del proceso en formato de texto de Prometheus (sin dependencias externas).
+
+El registro vive en memoria del proceso y se publica de dos formas:
+- Modo residente (main.py --worker): endpoint HTTP local /metrics (metricas.puerto).
+- Ejecución única (main.py): archivo .prom para el textfile collector de node_exporter
+  (metricas.archivo_textfile), escrito de forma atómica al terminar.
+
+Ejemplos de consultas:
+    histogram_quantile(0.95, sum by (fuente, le) (rate(tc_fuente_duracion_segundos_bucket[1d])))
+    sum by (principal, respaldo) (increase(tc_respaldo_total[7d]))
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from config.config import obtener_parametro
+
+logger = logging.getLogger("Utils - Metricas")
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+# Segundos: desde una respuesta en caché del proxy hasta el timeout total de una fuente
+LIMITES_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatear(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    """Base de las métricas: un valor por combinación de etiquetas (los histogramas lo redefinen)."""
+
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def _clave(self, etiquetas: Dict[str, str]) -> Tuple[str, ...]:
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f"{self.nombre}: se esperaban las etiquetas {self.etiquetas}, no {tuple(etiquetas)}")
+        return tuple(str(etiquetas[nombre]) for nombre in self.etiquetas)
+
+    def _texto_etiquetas(self, clave: Tuple[str, ...], extra: Iterable[Tuple[str, str]] = ()) -> str:
+        pares = list(zip(self.etiquetas, clave)) + list(extra)
+        if not pares:
+            return ""
+        return "{" + ",".join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in pares) + "}"
+
+    def _muestras(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [f"{self.nombre}{self._texto_etiquetas(clave)} {_formatear(valor)}" for clave, valor in valores]
+
+    def exponer(self) -> str:
+        lineas = [f"# HELP {self.nombre} {_escapar(self.ayuda)}", f"# TYPE {self.nombre} {self.tipo}"]
+        lineas.extend(self._muestras())
+        return "\n".join(lineas)
+
+
+class Contador(_Metrica):
+    """Contador monótono por combinación de etiquetas."""
+
+    tipo = "counter"
+
+    def inc(self, valor: float = 1.0, **etiquetas):
+        if valor < 0:
+            raise ValueError("Un contador solo puede aumentar")
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + valor
+
+    def valor(self, **etiquetas) -> float:
+        with self._lock:
+            return self._valores.get(self._clave(etiquetas), 0.0)
+
+
+class Indicador(_Metrica):
+    """Valor que puede subir o bajar (gauge)."""
+
+    tipo = "gauge"
+
+    def fijar(self, valor: float, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = float(valor)
+
+
+class Histograma(_Metrica):
+    """
+    Histograma acumulado por combinación de etiquetas.
+
+    :param limites: Límites superiores de los buckets (se agrega +Inf).
+    """
+
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites: Sequence[float] = LIMITES_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites)) + (math.inf,)
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observar(self, valor: float, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                # [conteos por bucket (no acumulados), suma, total]
+                serie = self._series[clave] = [[0] * len(self.limites), 0.0, 0]
+            for indice, limite in enumerate(self.limites):
+                if valor <= limite:
+                    serie[0][indice] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    @contextmanager
+    def medir(self, **etiquetas):
+        """Observa la duración del bloque en segundos."""
+        inicio = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observar(time.monotonic() - inicio, **etiquetas)
+
+    def total(self, **etiquetas) -> int:
+        with self._lock:
+            serie = self._series.get(self._clave(etiquetas))
+            return serie[2] if serie else 0
+
+    def _muestras(self):
+        with self._lock:
+            series = sorted((clave, [list(serie[0]), serie[1], serie[2]]) for clave, serie in self._series.items())
+        lineas = []
+        for clave, (conteos, suma, total) in series:
+            acumulado = 0
+            for limite, conteo in zip(self.limites, conteos):
+                acumulado += conteo
+                etiquetas = self._texto_etiquetas(clave, [("le", _formatear(limite))])
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{self._texto_etiquetas(clave)} {_formatear(suma)}")
+            lineas.append(f"{self.nombre}_count{self._texto_etiquetas(clave)} {total}")
+        return lineas
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, clase, nombre, ayuda, etiquetas, **kwargs):
+        with self._lock:
+            existente = self._metricas.get(nombre)
+            if existente is not None:
+                if not isinstance(existente, clase) or existente.etiquetas != tuple(etiquetas):
+                    raise ValueError(f"La métrica {nombre} ya está registrada con otro tipo o etiquetas")
+                return existente
+            metrica = self._metricas[nombre] = clase(nombre, ayuda, etiquetas, **kwargs)
+            return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        return self._registrar(Contador, nombre, ayuda, etiquetas)
+
+    def indicador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Indicador:
+        return self._registrar(Indicador, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                   limites: Sequence[float] = LIMITES_LATENCIA) -> Histograma:
+        return self._registrar(Histograma, nombre, ayuda, etiquetas, limites=limites)
+
+    def exponer(self) -> str:
+        """Todas las métricas en el formato de texto de Prometheus (0.0.4)."""
+        with self._lock:
+            metricas = [self._metricas[nombre] for nombre in sorted(self._metricas)]
+        return "\n".join(metrica.exponer() for metrica in metricas) + "\n"
+
+    def escribir_textfile(self, ruta: str) -> str:
+        """
+        Escribe las métricas para el textfile collector.
+
+        Se escribe en un archivo temporal y se renombra, para que node_exporter nunca lea
+        un archivo a medio escribir.
+        """
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(self.exponer())
+        os.replace(temporal, ruta)
+        return ruta
+
+
+# Registro del proceso y métricas del pipeline
+REGISTRO = RegistroMetricas()
+
+DURACION_FUENTE = REGISTRO.histograma(
+    "tc_fuente_duracion_segundos",
+    "Duración de cada consulta a una fuente de tipo de cambio",
+    ("fuente", "resultado"),
+)
+RESPALDOS = REGISTRO.contador(
+    "tc_respaldo_total",
+    "Consultas en que la fuente principal no aportó el valor y se usó otra",
+    ("principal", "respaldo"),
+)
+PARSEOS = REGISTRO.contador(
+    "tc_parseo_total",
+    "Extracciones por página y estrategia de parseo",
+    ("objetivo", "estrategia", "resultado"),
+)
+DURACION_PUBLICACION = REGISTRO.histograma(
+    "tc_publicacion_duracion_segundos",
+    "Duración de la publicación del tipo de cambio en cada sistema destino",
+    ("destino", "resultado"),
+)
+NOTIFICACIONES_FALLIDAS = REGISTRO.contador(
+    "tc_notificaciones_fallidas_total",
+    "Notificaciones que no se pudieron enviar",
+    ("canal",),
+)
+DURACION_ETAPA = REGISTRO.histograma(
+    "tc_etapa_duracion_segundos",
+    "Duración de cada etapa del pipeline",
+    ("etapa", "estado"),
+)
+EJECUCIONES = REGISTRO.contador(
+    "tc_ejecuciones_total",
+    "Ejecuciones del pipeline por resultado",
+    ("resultado",),
+)
+ULTIMA_EJECUCION = REGISTRO.indicador(
+    "tc_ultima_ejecucion_timestamp_segundos",
+    "Hora Unix de fin de la última ejecución del pipeline",
+)
+
+
+@contextmanager
+def medir_publicacion(destino: str):
+    """
+    Observa la duración de una publicación en tc_publicacion_duracion_segundos.
+
+    El bloque recibe un dict cuyo "resultado" puede cambiar (ej. a "sin_cambios");
+    si el bloque lanza una excepción se registra como "error".
+    """
+    publicacion = {"resultado": "ok"}
+    inicio = time.monotonic()
+    try:
+        yield publicacion
+    except BaseException:
+        publicacion["resultado"] = "error"
+        raise
+    finally:
+        DURACION_PUBLICACION.observar(time.monotonic() - inicio, destino=destino, resultado=publicacion["resultado"])
+
+
+# ---------------------------------------------------------------------------
+# Publicación
+# ---------------------------------------------------------------------------
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        cuerpo = self.server.registro.exponer().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", TIPO_CONTENIDO)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class _ServidorMetricas(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def iniciar_servidor_metricas(cfg, registro: RegistroMetricas = REGISTRO) -> Optional[ThreadingHTTPServer]:
+    """
+    Expone /metrics en metricas.host:metricas.puerto en un hilo en segundo plano.
+
+    :return: Servidor iniciado (server_address tiene el puerto real) o None si está deshabilitado
+             (metricas.habilitado = false o puerto = 0) o no se pudo abrir el puerto.
+    """
+    if not obtener_parametro(cfg, "metricas", "habilitado", True, bool):
+        return None
+    puerto = obtener_parametro(cfg, "metricas", "puerto", 0, int)
+    if not puerto:
+        return None
+    host = obtener_parametro(cfg, "metricas", "host", "127.0.0.1")
+    try:
+        servidor = _ServidorMetricas((host, puerto), _ManejadorMetricas)
+    except OSError as e:
+        logger.warning(f"No se pudo exponer las métricas en {host}:{puerto}: {e}")
+        return None
+    servidor.registro = registro
+    threading.Thread(target=servidor.serve_forever, name="metricas", daemon=True).start()
+    logger.info(f"Métricas disponibles en http://{host}:{servidor.server_address[1]}/metrics")
+    return servidor
+
+
+def escribir_metricas(cfg, registro: RegistroMetricas = REGISTRO) -> Optional[str]:
+    """Escribe metricas.archivo_textfile tras una ejecución única. Retorna la ruta o None."""
+    if not obtener_parametro(cfg, "metricas", "habilitado", True, bool):
+        return None
+    ruta = obtener_parametro(cfg, "metricas", "archivo_textfile", "")
+    if not ruta:
+        return None
+    try:
+        return registro.escribir_textfile(ruta)
+    except OSError as e:
+        logger.warning(f"No se pudieron escribir las métricas en {ruta}: {e}")
+        return None
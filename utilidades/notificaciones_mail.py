@@ -2,12 +2,14 @@ import smtplib
 import ssl
 from email.message import EmailMessage
 import logging
+from utilidades.metricas import NOTIFICACIONES_FALLIDAS
+from utilidades.plazo import timeout_restante
 
 # Configuracionn del logger
 logger = logging.getLogger("Utils - EmailSender")
 
 class EmailSender:
-    def __init__(self, servidor_smtp, puerto, usuario, contrasena):
+    def __init__(self, servidor_smtp, puerto, usuario, contrasena, timeout=30.0):
         """
         Inicializa el remitente de correos electronicos.
 
@@ -15,11 +17,13 @@ class EmailSender:
         :param puerto: Puerto del servidor SMTP.
         :param usuario: Nombre de usuario para autenticarse en el servidor.
         :param contrasena: Contraseña para autenticarse en el servidor.
+        :param timeout: Timeout en segundos de la conexión SMTP (recortado al plazo de la ejecución).
         """
         self.servidor_smtp = servidor_smtp
         self.puerto = puerto
         self.usuario = usuario
         self.contrasena = contrasena
+        self.timeout = timeout
 
     def enviar_correo(self, destinatarios, asunto, cuerpo, adjuntos=None):
         try:
@@ -49,10 +53,12 @@ class EmailSender:
             # Configuracion de la conexion segura al servidor SMTP
             context = ssl.create_default_context()
 
-            with smtplib.SMTP_SSL(self.servidor_smtp, self.puerto, context=context) as server:
+            with smtplib.SMTP_SSL(self.servidor_smtp, self.puerto, context=context,
+                                  timeout=timeout_restante(self.timeout)) as server:
                 server.login(self.usuario, self.contrasena)
                 server.send_message(mensaje)
                 logger.info(f"Correo enviado exitosamente a: {', '.join(destinatarios)}")
 
         except Exception as e:
+            NOTIFICACIONES_FALLIDAS.inc(canal="correo")
             logger.error(f"Error al enviar el correo: {e}")
\ No newline at end of file
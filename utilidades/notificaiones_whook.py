@@ -1,9 +1,16 @@
 import requests
 import json
+from utilidades.metricas import NOTIFICACIONES_FALLIDAS
+from utilidades.plazo import PlazoAgotado, timeout_restante
 
 class WebhookNotifier:
-    def __init__(self, webhook_url):
+    def __init__(self, webhook_url, timeout=10.0):
+        """
+        :param webhook_url: URL del webhook.
+        :param timeout: Timeout en segundos de cada envío (recortado al plazo de la ejecución).
+        """
         self.webhook_url = webhook_url
+        self.timeout = timeout
 
     def send_notification(self, message):
         """
@@ -16,9 +23,11 @@ class WebhookNotifier:
         payload = {"text": message}
 
         try:
-            response = requests.post(self.webhook_url, headers=headers, data=json.dumps(payload))
+            response = requests.post(self.webhook_url, headers=headers, data=json.dumps(payload),
+                                     timeout=timeout_restante(self.timeout))
             response.raise_for_status()
             return response
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, PlazoAgotado) as e:
+            NOTIFICACIONES_FALLIDAS.inc(canal="webhook")
             print(f"Failed to send notification: {e}")
             return None
@@ -0,0 +1,230 @@
+"""
+Orquestador de bots basado en un grafo de dependencias.
+
+Cada etapa declara los datos que consume (entradas) y los que produce (salidas).
+Una etapa depende de las etapas que producen sus entradas; las ramas independientes
+se ejecutan en paralelo y, si una etapa falla, solo se omiten las etapas que
+dependen de ella (directa o transitivamente).
+
+Los datos viajan en un ContextoEjecucion inmutable: cada etapa recibe una vista del
+contexto vigente al lanzarse y sus salidas se combinan en un nuevo contexto cuando
+termina con éxito.
+
+Con un plazo (ver utilidades.plazo) el orquestador deja de esperar al vencer: las etapas
+en curso se reportan como plazo_agotado y las que no llegaron a lanzarse se omiten.
+"""
+
+import importlib
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utilidades.contexto import ContextoEjecucion, ContextoEtapa
+from utilidades.plazo import Plazo, plazo_vencido
+from utilidades.trazas import propagar, span
+
+logger = logging.getLogger("Utils - Orquestador")
+
+ESTADO_OK = "ok"
+ESTADO_FALLO = "fallo"
+ESTADO_OMITIDA = "omitida"
+ESTADO_PLAZO_AGOTADO = "plazo_agotado"
+
+
+class FuncionDiferida:
+    """
+    Referencia a una función "modulo:atributo" que se importa recién al invocarse.
+
+    Permite declarar el grafo completo sin cargar las dependencias de cada bot
+    (selenium, lxml, bs4, requests) hasta que la etapa realmente se ejecuta.
+
+    :param ruta: Ruta "paquete.modulo:atributo" (atributo por defecto: bot_run).
+    """
+
+    def __init__(self, ruta: str):
+        self.modulo, _, atributo = ruta.partition(":")
+        self.atributo = atributo or "bot_run"
+        self._funcion: Optional[Callable] = None
+
+    def cargar(self) -> Callable:
+        """Importa el módulo (una sola vez) y retorna la función."""
+        if self._funcion is None:
+            self._funcion = getattr(importlib.import_module(self.modulo), self.atributo)
+        return self._funcion
+
+    def __call__(self, *args, **kwargs):
+        return self.cargar()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"FuncionDiferida({self.modulo}:{self.atributo})"
+
+
+@dataclass
+class Etapa:
+    """
+    Etapa del pipeline.
+
+    :param nombre: Nombre único de la etapa (se usa en logs y notificaciones).
+    :param funcion: Función (cfg, contexto) -> (resultado, mensaje), normalmente un bot_run.
+    :param entradas: Datos que la etapa necesita.
+    :param salidas: Datos que la etapa produce (publicados en su ContextoEtapa).
+    :param al_completar: Función opcional (contexto) -> None que se ejecuta si la etapa termina con éxito.
+    """
+    nombre: str
+    funcion: Callable
+    entradas: Tuple[str, ...] = ()
+    salidas: Tuple[str, ...] = ()
+    al_completar: Optional[Callable] = None
+
+
+@dataclass
+class ResultadoEtapa:
+    nombre: str
+    estado: str
+    mensaje: str = ""
+    duracion: float = 0.0
+
+
+class OrquestadorDAG:
+    def __init__(self, etapas: List[Etapa], max_workers: int = 4):
+        """
+        Construye el grafo de dependencias y valida que no tenga ciclos.
+
+        :param etapas: Lista de etapas en orden de prioridad de lanzamiento.
+        :param max_workers: Número máximo de etapas ejecutándose a la vez (1 = secuencial).
+        """
+        self.etapas = etapas
+        self.max_workers = max(1, max_workers)
+
+        productores: Dict[str, str] = {}
+        for etapa in etapas:
+            for salida in etapa.salidas:
+                if salida in productores:
+                    raise ValueError(f"'{salida}' es producida por {productores[salida]} y {etapa.nombre}")
+                productores[salida] = etapa.nombre
+
+        self.dependencias: Dict[str, set] = {}
+        for etapa in etapas:
+            dependencias = set()
+            for entrada in etapa.entradas:
+                if entrada in productores:
+                    dependencias.add(productores[entrada])
+                else:
+                    logger.warning(f"{etapa.nombre}: la entrada '{entrada}' no es producida por ninguna etapa")
+            dependencias.discard(etapa.nombre)
+            self.dependencias[etapa.nombre] = dependencias
+
+        self._validar_aciclico()
+
+    def _validar_aciclico(self):
+        pendientes = {nombre: set(dependencias) for nombre, dependencias in self.dependencias.items()}
+        while pendientes:
+            listas = [nombre for nombre, dependencias in pendientes.items() if not dependencias]
+            if not listas:
+                raise ValueError(f"Dependencias circulares entre: {', '.join(pendientes)}")
+            for nombre in listas:
+                del pendientes[nombre]
+            for dependencias in pendientes.values():
+                dependencias.difference_update(listas)
+
+    def _ejecutar_etapa(self, etapa: Etapa, cfg, contexto: ContextoEtapa) -> ResultadoEtapa:
+        with span(etapa.nombre) as span_etapa:
+            resultado = self._ejecutar_funcion(etapa, cfg, contexto)
+            span_etapa.atributo("etapa.estado", resultado.estado)
+            if resultado.estado != ESTADO_OK:
+                span_etapa.error(resultado.mensaje)
+        return resultado
+
+    def _ejecutar_funcion(self, etapa: Etapa, cfg, contexto: ContextoEtapa) -> ResultadoEtapa:
+        inicio = time.monotonic()
+        logger.info(f"==================== INICIANDO {etapa.nombre} ====================")
+        try:
+            resultado, mensaje = etapa.funcion(cfg, contexto)
+        except Exception as e:
+            logger.error(f"{etapa.nombre} lanzó una excepción: {e}")
+            resultado, mensaje = False, f"Error inesperado: {e}"
+        duracion = time.monotonic() - inicio
+
+        if resultado:
+            logger.info(f"{etapa.nombre} completado exitosamente: {mensaje}")
+            if etapa.al_completar is not None:
+                try:
+                    etapa.al_completar(contexto)
+                except Exception as e:
+                    logger.warning(f"{etapa.nombre}: error en la acción posterior: {e}")
+            return ResultadoEtapa(etapa.nombre, ESTADO_OK, mensaje, duracion)
+
+        logger.error(f"{etapa.nombre} falló: {mensaje}")
+        if plazo_vencido():
+            return ResultadoEtapa(etapa.nombre, ESTADO_PLAZO_AGOTADO, mensaje, duracion)
+        return ResultadoEtapa(etapa.nombre, ESTADO_FALLO, mensaje, duracion)
+
+    @staticmethod
+    def _cerrar_por_plazo(plazo: Plazo, resultados, pendientes, en_curso):
+        """Reporta las etapas en curso como plazo_agotado y omite las que no se lanzaron."""
+        ahora = time.monotonic()
+        agotadas = [nombre for nombre, _, _ in en_curso.values()]
+        logger.error(f"Plazo de ejecución de {plazo.segundos:g}s agotado durante: {', '.join(agotadas) or '-'}")
+        for nombre, _, inicio in en_curso.values():
+            mensaje = f"Cancelada: se agotó el plazo de ejecución ({plazo.segundos:g}s)"
+            resultados[nombre] = ResultadoEtapa(nombre, ESTADO_PLAZO_AGOTADO, mensaje, ahora - inicio)
+        for etapa in pendientes:
+            mensaje = "Omitida: se agotó el plazo de ejecución"
+            logger.warning(f"{etapa.nombre}: {mensaje}")
+            resultados[etapa.nombre] = ResultadoEtapa(etapa.nombre, ESTADO_OMITIDA, mensaje)
+
+    def ejecutar(self, cfg, contexto: Optional[ContextoEjecucion] = None,
+                 plazo: Optional[Plazo] = None) -> Tuple[Dict[str, ResultadoEtapa], ContextoEjecucion]:
+        """
+        Ejecuta todas las etapas respetando las dependencias.
+
+        :param cfg: Configuración que se pasa a cada etapa.
+        :param contexto: Contexto inicial de la ejecución (por defecto uno vacío).
+        :param plazo: Plazo de la ejecución (opcional). Las etapas lo heredan para recortar sus
+            timeouts; al vencer no se espera a las etapas en curso (sus hilos terminan solos
+            cuando vencen esos timeouts).
+        :return: Tupla (nombre -> ResultadoEtapa en el orden de declaración, contexto final).
+        """
+        contexto = contexto or ContextoEjecucion()
+        resultados: Dict[str, ResultadoEtapa] = {}
+        en_curso = {}
+        pendientes = list(self.etapas)
+
+        token = plazo.activar() if plazo is not None else None
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="etapa")
+        try:
+            while pendientes or en_curso:
+                if plazo is not None and plazo.vencido():
+                    self._cerrar_por_plazo(plazo, resultados, pendientes, en_curso)
+                    break
+                for etapa in list(pendientes):
+                    dependencias = self.dependencias[etapa.nombre]
+                    fallidas = [d for d in dependencias if d in resultados and resultados[d].estado != ESTADO_OK]
+                    if fallidas:
+                        pendientes.remove(etapa)
+                        mensaje = f"Omitida porque no se completó: {', '.join(sorted(fallidas))}"
+                        logger.warning(f"{etapa.nombre}: {mensaje}")
+                        resultados[etapa.nombre] = ResultadoEtapa(etapa.nombre, ESTADO_OMITIDA, mensaje)
+                    elif all(d in resultados for d in dependencias) and len(en_curso) < self.max_workers:
+                        pendientes.remove(etapa)
+                        contexto_etapa = ContextoEtapa(contexto, etapa.salidas)
+                        futuro = executor.submit(propagar(self._ejecutar_etapa), etapa, cfg, contexto_etapa)
+                        en_curso[futuro] = (etapa.nombre, contexto_etapa, time.monotonic())
+
+                if not en_curso:
+                    continue
+                espera = max(0.0, plazo.restante()) if plazo is not None else None
+                completados, _ = wait(en_curso, timeout=espera, return_when=FIRST_COMPLETED)
+                for futuro in completados:
+                    nombre, contexto_etapa, _ = en_curso.pop(futuro)
+                    resultados[nombre] = futuro.result()
+                    if resultados[nombre].estado == ESTADO_OK:
+                        contexto = contexto.con(**contexto_etapa.salidas)
+        finally:
+            executor.shutdown(wait=not en_curso, cancel_futures=True)
+            if token is not None:
+                Plazo.desactivar(token)
+
+        return {etapa.nombre: resultados[etapa.nombre] for etapa in self.etapas}, contexto
@@ -0,0 +1,93 @@
+"""
+Plazo (deadline) de una ejecución del pipeline.
+
+El plazo se fija una vez por ejecución (plazo.segundos) y viaja en una ContextVar, igual
+que la traza: el orquestador lo activa y lo propaga a los hilos de cada etapa, y cada
+llamada de red recorta su timeout con timeout_restante() para no esperar más allá del
+plazo. Sin plazo activo (bots ejecutados sueltos, notificaciones finales) los timeouts
+quedan como los configuró cada módulo.
+"""
+
+import contextvars
+import logging
+import time
+from typing import Optional
+
+from config.config import obtener_parametro
+from utilidades.excepciones import BusinessException
+
+logger = logging.getLogger("Utils - Plazo")
+
+_plazo_actual: contextvars.ContextVar = contextvars.ContextVar("plazo_actual", default=None)
+
+
+class PlazoAgotado(BusinessException):
+    """Se agotó el plazo de la ejecución antes de iniciar una llamada."""
+
+
+class Plazo:
+    def __init__(self, segundos: float):
+        """
+        :param segundos: Tiempo total disponible desde este momento.
+        """
+        self.segundos = segundos
+        self.limite = time.monotonic() + segundos
+
+    def restante(self) -> float:
+        """Segundos que quedan del plazo (negativo si ya venció)."""
+        return self.limite - time.monotonic()
+
+    def vencido(self) -> bool:
+        return self.restante() <= 0
+
+    def activar(self):
+        """Fija este plazo como el del contexto actual. Retorna el token para desactivar()."""
+        return _plazo_actual.set(self)
+
+    @staticmethod
+    def desactivar(token):
+        _plazo_actual.reset(token)
+
+
+def plazo_actual() -> Optional[Plazo]:
+    return _plazo_actual.get()
+
+
+def plazo_vencido() -> bool:
+    """True si hay un plazo activo y ya venció."""
+    plazo = plazo_actual()
+    return plazo is not None and plazo.vencido()
+
+
+def timeout_restante(timeout=None):
+    """
+    Recorta un timeout al plazo restante de la ejecución.
+
+    :param timeout: Segundos, tupla (conexión, lectura) como en requests, o None (sin límite propio).
+    :return: El timeout recortado; sin plazo activo se retorna sin cambios.
+    :raises PlazoAgotado: Si el plazo ya venció.
+    """
+    plazo = plazo_actual()
+    if plazo is None:
+        return timeout
+    restante = plazo.restante()
+    if restante <= 0:
+        raise PlazoAgotado(f"Plazo de ejecución agotado ({plazo.segundos:g}s)")
+    if timeout is None:
+        return restante
+    if isinstance(timeout, tuple):
+        return tuple(restante if valor is None else min(valor, restante) for valor in timeout)
+    return min(timeout, restante)
+
+
+def iniciar_plazo(cfg) -> Optional[Plazo]:
+    """
+    Crea el plazo de una ejecución a partir de plazo.segundos (0 = sin plazo).
+
+    :param cfg: Configuración cargada.
+    """
+    segundos = obtener_parametro(cfg, "plazo", "segundos", 0.0, float)
+    if segundos <= 0:
+        return None
+    logger.info(f"Plazo de la ejecución: {segundos:g}s")
+    return Plazo(segundos)
@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configuración del logger
+logger = logging.getLogger("Utils - Sesion Persistente")
+
+
+class SesionPersistente:
+    def __init__(self, ruta_archivo, ttl=1200.0, pool_maxsize=4):
+        """
+        Sesión HTTP con pool de conexiones cuyas cookies de autenticación se guardan en disco.
+
+        Los sistemas de destino entregan cookies de sesión sin fecha de expiración, así que
+        la vigencia se controla con un TTL desde el último inicio de sesión (o la expiración
+        de la cookie, si es menor). El archivo solo es legible por el usuario.
+
+        :param ruta_archivo: Ruta del archivo JSON con las cookies.
+        :param ttl: Vigencia en segundos de una sesión iniciada.
+        :param pool_maxsize: Conexiones keep-alive por host.
+        """
+        self.ruta_archivo = ruta_archivo
+        self.ttl = ttl
+        self.expira_en = 0.0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cargar()
+
+    @property
+    def vigente(self):
+        """True si hay cookies de una sesión que aún no vence."""
+        return bool(self.session.cookies) and time.time() < self.expira_en
+
+    def cargar(self):
+        """Carga las cookies guardadas si no vencieron. Retorna True si la sesión quedó vigente."""
+        try:
+            with open(self.ruta_archivo, encoding="utf-8") as archivo:
+                datos = json.load(archivo)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo leer la sesión guardada en {self.ruta_archivo}: {e}")
+            return False
+
+        if time.time() >= datos.get("expira_en", 0):
+            logger.info("La sesión guardada venció")
+            return False
+        for cookie in datos.get("cookies", []):
+            self.session.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain", ""), path=cookie.get("path", "/"),
+                expires=cookie.get("expires"), secure=cookie.get("secure", False),
+            )
+        self.expira_en = datos["expira_en"]
+        logger.info(f"Sesión reutilizada (vence en {self.expira_en - time.time():.0f}s)")
+        return self.vigente
+
+    def guardar(self):
+        """Guarda las cookies actuales con la vigencia de una sesión recién iniciada."""
+        ahora = time.time()
+        cookies = list(self.session.cookies)
+        expiraciones = [cookie.expires for cookie in cookies if cookie.expires]
+        self.expira_en = min([ahora + self.ttl] + expiraciones)
+        datos = {
+            "expira_en": self.expira_en,
+            "cookies": [
+                {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+                 "expires": c.expires, "secure": c.secure}
+                for c in cookies
+            ],
+        }
+        try:
+            directorio = os.path.dirname(self.ruta_archivo)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            descriptor = os.open(self.ruta_archivo, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, "w", encoding="utf-8") as archivo:
+                json.dump(datos, archivo)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la sesión en {self.ruta_archivo}: {e}")
+
+    def invalidar(self):
+        """Descarta la sesión en memoria y en disco (ej. ante un 401)."""
+        self.session.cookies.clear()
+        self.expira_en = 0.0
+        try:
+            os.remove(self.ruta_archivo)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"No se pudo eliminar la sesión guardada en {self.ruta_archivo}: {e}")
@@ -0,0 +1,389 @@
+"""
+Trazas de una ejecución: spans anidados de las etapas, las peticiones HTTP, el parseo
+y las esperas del límite de tasa.
+
+Cada ejecución con trazas.habilitado = true escribe un archivo JSON lines (un span por
+línea) en formato OTLP/JSON, el mismo que usan los exportadores de OpenTelemetry:
+
+    {"traceId": ..., "spanId": ..., "parentSpanId": ..., "name": "HTTP GET",
+     "startTimeUnixNano": "...", "endTimeUnixNano": "...", "attributes": [...], "status": {...}}
+
+    python -m utilidades.trazas cliente/output/trazas/<archivo>.jsonl                 # resumen en árbol
+    python -m utilidades.trazas <archivo>.jsonl --otlp http://localhost:4318/v1/traces  # envía al collector
+
+La traza y el span vigentes viajan en contextvars. Sin una traza activa span() retorna
+un objeto vacío compartido y las peticiones HTTP no se instrumentan, así que el costo
+con las trazas deshabilitadas es una lectura de ContextVar por punto instrumentado.
+"""
+
+import argparse
+import contextvars
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from config.config import obtener_parametro
+from utilidades.plazo import plazo_actual
+
+logger = logging.getLogger("Utils - Trazas")
+
+SERVICIO = "py_tipo_cambio"
+
+# SpanKind y StatusCode de OpenTelemetry
+TIPO_INTERNO = 1
+TIPO_CLIENTE = 3
+ESTADO_SIN_DEFINIR = 0
+ESTADO_OK = 1
+ESTADO_ERROR = 2
+
+_traza_actual: contextvars.ContextVar = contextvars.ContextVar("traza_actual", default=None)
+_span_actual: contextvars.ContextVar = contextvars.ContextVar("span_actual", default=None)
+
+
+class _SpanNulo:
+    """Span que no registra nada (trazas deshabilitadas)."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def atributo(self, clave, valor):
+        pass
+
+    def error(self, mensaje):
+        pass
+
+
+SPAN_NULO = _SpanNulo()
+
+
+class Span:
+    """
+    Intervalo medido dentro de una traza. Se usa como context manager.
+
+    :param traza: Traza a la que pertenece.
+    :param nombre: Nombre del span (ej. "HTTP GET", "parseo.lxml").
+    :param padre: span_id del span que lo contiene (None = raíz).
+    :param atributos: Atributos iniciales (convenciones de OpenTelemetry cuando existen).
+    :param tipo: SpanKind (TIPO_INTERNO o TIPO_CLIENTE).
+    """
+
+    __slots__ = ("traza", "nombre", "span_id", "padre", "atributos", "tipo", "inicio_ns", "fin_ns",
+                 "estado", "mensaje_estado", "_token")
+
+    def __init__(self, traza, nombre, padre=None, atributos=None, tipo=TIPO_INTERNO):
+        self.traza = traza
+        self.nombre = nombre
+        self.span_id = secrets.token_hex(8)
+        self.padre = padre
+        self.atributos = dict(atributos or {})
+        self.tipo = tipo
+        self.inicio_ns = 0
+        self.fin_ns = 0
+        self.estado = ESTADO_SIN_DEFINIR
+        self.mensaje_estado = ""
+        self._token = None
+
+    def __enter__(self):
+        self.inicio_ns = time.time_ns()
+        self._token = _span_actual.set(self)
+        return self
+
+    def __exit__(self, tipo_excepcion, excepcion, _traceback):
+        self.fin_ns = time.time_ns()
+        _span_actual.reset(self._token)
+        if excepcion is not None and self.estado != ESTADO_ERROR:
+            self.error(f"{type(excepcion).__name__}: {excepcion}")
+        self.traza.agregar(self)
+        return False
+
+    def atributo(self, clave, valor):
+        self.atributos[clave] = valor
+
+    def error(self, mensaje):
+        """Marca el span como fallido sin necesidad de una excepción."""
+        self.estado = ESTADO_ERROR
+        self.mensaje_estado = str(mensaje)
+
+    def a_otlp(self) -> Dict[str, Any]:
+        """Span en formato OTLP/JSON."""
+        datos = {
+            "traceId": self.traza.trace_id,
+            "spanId": self.span_id,
+            "name": self.nombre,
+            "kind": self.tipo,
+            "startTimeUnixNano": str(self.inicio_ns),
+            "endTimeUnixNano": str(self.fin_ns),
+            "attributes": [_atributo_otlp(clave, valor) for clave, valor in self.atributos.items()],
+            "status": {"code": self.estado},
+        }
+        if self.padre:
+            datos["parentSpanId"] = self.padre
+        if self.mensaje_estado:
+            datos["status"]["message"] = self.mensaje_estado
+        return datos
+
+
+def _atributo_otlp(clave, valor) -> Dict[str, Any]:
+    if isinstance(valor, bool):
+        return {"key": clave, "value": {"boolValue": valor}}
+    if isinstance(valor, int):
+        return {"key": clave, "value": {"intValue": str(valor)}}
+    if isinstance(valor, float):
+        return {"key": clave, "value": {"doubleValue": valor}}
+    return {"key": clave, "value": {"stringValue": str(valor)}}
+
+
+class Traza:
+    """
+    Spans de una ejecución del pipeline.
+
+    :param id_ejecucion: Identificador de la ejecución (se usa en el nombre del archivo).
+    """
+
+    def __init__(self, id_ejecucion: Optional[str] = None):
+        self.trace_id = secrets.token_hex(16)
+        self.id_ejecucion = id_ejecucion
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def agregar(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def activar(self):
+        """Activa la traza en el contexto actual. Retorna el token para desactivar()."""
+        return _traza_actual.set(self), _span_actual.set(None)
+
+    @staticmethod
+    def desactivar(tokens):
+        token_traza, token_span = tokens
+        _span_actual.reset(token_span)
+        _traza_actual.reset(token_traza)
+
+    def guardar(self, ruta: str) -> str:
+        """Escribe los spans terminados en ruta (JSON lines, ordenados por inicio)."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.inicio_ns)
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            for span in spans:
+                archivo.write(json.dumps(span.a_otlp(), ensure_ascii=False) + "\n")
+        return ruta
+
+
+def traza_actual() -> Optional[Traza]:
+    return _traza_actual.get()
+
+
+def span(nombre: str, tipo: int = TIPO_INTERNO, **atributos):
+    """
+    Abre un span hijo del span vigente (usar con with).
+
+    Sin traza activa retorna SPAN_NULO, que no mide ni registra nada.
+    """
+    traza = _traza_actual.get()
+    if traza is None:
+        return SPAN_NULO
+    padre = _span_actual.get()
+    return Span(traza, nombre, padre.span_id if padre is not None else None, atributos, tipo)
+
+
+def span_medido(nombre: str, inicio_ns: int, fin_ns: int, **atributos):
+    """Registra un span ya medido (ej. las fases que informa curl) como hijo del span vigente."""
+    traza = _traza_actual.get()
+    if traza is None or fin_ns < inicio_ns:
+        return
+    padre = _span_actual.get()
+    medido = Span(traza, nombre, padre.span_id if padre is not None else None, atributos)
+    medido.inicio_ns, medido.fin_ns = inicio_ns, fin_ns
+    traza.agregar(medido)
+
+
+def propagar(funcion):
+    """
+    Envuelve funcion para que herede la traza, el span y el plazo de la ejecución vigentes al
+    ejecutarse en otro hilo (ThreadPoolExecutor no copia los contextvars). Sin traza ni plazo
+    activos retorna funcion tal cual.
+    """
+    if _traza_actual.get() is None and plazo_actual() is None:
+        return funcion
+    contexto = contextvars.copy_context()
+
+    def envoltura(*args, **kwargs):
+        # Una copia por llamada: un mismo Context no puede estar activo en dos hilos a la vez
+        return contexto.copy().run(funcion, *args, **kwargs)
+
+    return envoltura
+
+
+# ---------------------------------------------------------------------------
+# Instrumentación de requests / urllib3
+# ---------------------------------------------------------------------------
+
+_instrumentado = False
+_lock_instrumentacion = threading.Lock()
+
+
+def instrumentar_http():
+    """
+    Instrumenta requests.Session.send y la apertura de conexiones de urllib3 (una sola vez).
+
+    Cubre AdvancedHTTPClient, las sesiones de SuperAdmin, ModuloTC y Gescom, requests.get/post
+    de la SBS y el webhook. Cada petición genera un span "HTTP <método>" con hijos
+    http.dns_tcp / http.tls (solo conexiones nuevas), http.ttfb y http.cuerpo.
+    """
+    global _instrumentado
+    with _lock_instrumentacion:
+        if _instrumentado:
+            return
+        import requests
+        from urllib3 import connection
+
+        send_original = requests.Session.send
+
+        def send(sesion, request, **kwargs):
+            if _traza_actual.get() is None:
+                return send_original(sesion, request, **kwargs)
+            url = request.url or ""
+            with span(f"HTTP {request.method}", TIPO_CLIENTE, **{
+                "http.request.method": request.method,
+                "url.full": url.split("?", 1)[0],
+                "server.address": urlsplit(url).hostname or "",
+            }) as actual:
+                inicio_ns = actual.inicio_ns
+                response = send_original(sesion, request, **kwargs)
+                fin_ns = time.time_ns()
+                cabeceras_ns = inicio_ns + int(response.elapsed.total_seconds() * 1e9)
+                span_medido("http.ttfb", inicio_ns, min(cabeceras_ns, fin_ns))
+                if not kwargs.get("stream"):
+                    span_medido("http.cuerpo", min(cabeceras_ns, fin_ns), fin_ns,
+                                **{"http.response.body.size": len(response.content or b"")})
+                actual.atributo("http.response.status_code", response.status_code)
+                if response.status_code >= 400:
+                    actual.error(f"HTTP {response.status_code}")
+                return response
+
+        requests.Session.send = send
+
+        nueva_conexion_original = connection.HTTPConnection._new_conn
+
+        def nueva_conexion(conexion):
+            if _traza_actual.get() is None:
+                return nueva_conexion_original(conexion)
+            with span("http.dns_tcp", **{"server.address": conexion.host, "server.port": conexion.port}):
+                sock = nueva_conexion_original(conexion)
+            conexion._fin_tcp_ns = time.time_ns()
+            return sock
+
+        connection.HTTPConnection._new_conn = nueva_conexion
+
+        conectar_tls_original = connection.HTTPSConnection.connect
+
+        def conectar_tls(conexion):
+            if _traza_actual.get() is None:
+                return conectar_tls_original(conexion)
+            conexion._fin_tcp_ns = None
+            conectar_tls_original(conexion)
+            # El handshake TLS (y el túnel CONNECT del proxy) es lo que sigue a la conexión TCP
+            if conexion._fin_tcp_ns is not None:
+                span_medido("http.tls", conexion._fin_tcp_ns, time.time_ns(), **{"server.address": conexion.host})
+
+        connection.HTTPSConnection.connect = conectar_tls
+        _instrumentado = True
+
+
+# ---------------------------------------------------------------------------
+# Configuración y exportación
+# ---------------------------------------------------------------------------
+
+def iniciar_traza(cfg, id_ejecucion: Optional[str] = None) -> Optional[Traza]:
+    """Crea la traza de una ejecución si trazas.habilitado = true (None si no)."""
+    if not obtener_parametro(cfg, "trazas", "habilitado", False, bool):
+        return None
+    instrumentar_http()
+    return Traza(id_ejecucion)
+
+
+def ruta_traza(cfg, traza: Traza) -> str:
+    """<ruta_output>/<trazas.directorio>/<fecha>_<id_ejecucion>.jsonl"""
+    ruta_output = obtener_parametro(cfg, "rutas", "ruta_output", ".")
+    directorio = obtener_parametro(cfg, "trazas", "directorio", "trazas")
+    nombre = f"{time.strftime('%Y%m%d_%H%M%S')}_{traza.id_ejecucion or traza.trace_id[:12]}.jsonl"
+    return os.path.join(ruta_output, directorio, nombre)
+
+
+def leer_spans(ruta: str) -> List[Dict[str, Any]]:
+    with open(ruta, encoding="utf-8") as archivo:
+        return [json.loads(linea) for linea in archivo if linea.strip()]
+
+
+def a_otlp(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """ExportTraceServiceRequest (OTLP/JSON) con los spans de un archivo de trazas."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_atributo_otlp("service.name", SERVICIO)]},
+            "scopeSpans": [{"scope": {"name": "utilidades.trazas"}, "spans": spans}],
+        }]
+    }
+
+
+def _valor_atributo(valor: Dict[str, Any]):
+    return next(iter(valor.values()), None)
+
+
+def imprimir_arbol(spans: List[Dict[str, Any]], salida=sys.stdout):
+    """Muestra los spans indentados por anidamiento con su duración en ms."""
+    hijos: Dict[Optional[str], list] = {}
+    ids = {s["spanId"] for s in spans}
+    for s in spans:
+        padre = s.get("parentSpanId")
+        hijos.setdefault(padre if padre in ids else None, []).append(s)
+
+    def mostrar(padre, nivel):
+        for s in sorted(hijos.get(padre, []), key=lambda s: int(s["startTimeUnixNano"])):
+            duracion = (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6
+            atributos = ", ".join(f"{a['key']}={_valor_atributo(a['value'])}" for a in s.get("attributes", []))
+            error = " ERROR" if s.get("status", {}).get("code") == ESTADO_ERROR else ""
+            print(f"{'  ' * nivel}{s['name']:<{max(1, 48 - 2 * nivel)}} {duracion:>10.1f} ms{error}  {atributos}",
+                  file=salida)
+            mostrar(s["spanId"], nivel + 1)
+
+    mostrar(None, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Muestra o exporta un archivo de trazas (JSON lines)")
+    parser.add_argument("archivo", help="Archivo .jsonl escrito por una ejecución con trazas.habilitado")
+    parser.add_argument("--otlp", metavar="URL", help="Envía los spans a un collector OTLP/HTTP (ej. .../v1/traces)")
+    parser.add_argument("--json", action="store_true", help="Imprime el ExportTraceServiceRequest en lugar del árbol")
+    args = parser.parse_args(argv)
+
+    spans = leer_spans(args.archivo)
+    if args.otlp:
+        import requests
+
+        respuesta = requests.post(args.otlp, json=a_otlp(spans), timeout=30)
+        print(f"{len(spans)} spans enviados a {args.otlp}: HTTP {respuesta.status_code}")
+        return 0 if respuesta.ok else 1
+    if args.json:
+        print(json.dumps(a_otlp(spans), indent=2, ensure_ascii=False))
+    else:
+        imprimir_arbol(spans)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
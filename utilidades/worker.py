@@ -0,0 +1,154 @@
+"""
+Modo residente del orquestador.
+
+Un proceso de larga duración mantiene cargados la configuración, los módulos
+(selenium, lxml, XPath precompilados) y el pool de conexiones del cliente HTTP, y
+recibe órdenes de ejecución por un socket Unix local. Así una ejecución bajo demanda
+empieza a consultar las fuentes en milisegundos en lugar de pagar el arranque del
+intérprete, las importaciones y los handshakes DNS/TLS en cada corrida.
+
+Protocolo: el cliente envía una línea JSON ({"comando": "ejecutar", ...}) y recibe
+una línea JSON con la respuesta. Comandos: ejecutar, estado, recargar, detener.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("Utils - Worker")
+
+TAMANO_MAXIMO_ORDEN = 65536
+
+
+class _ManejadorOrden(socketserver.StreamRequestHandler):
+    def handle(self):
+        linea = self.rfile.readline(TAMANO_MAXIMO_ORDEN)
+        try:
+            orden = json.loads(linea or b"{}")
+            if not isinstance(orden, dict):
+                raise ValueError("la orden debe ser un objeto JSON")
+            respuesta = self.server.trabajador.atender(orden)
+        except ValueError as e:
+            respuesta = {"ok": False, "error": f"Orden inválida: {e}"}
+        self.wfile.write(json.dumps(respuesta, default=str).encode("utf-8") + b"\n")
+
+
+class _ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class TrabajadorResidente:
+    def __init__(self,
+                 ruta_socket: str,
+                 ejecutar: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 recargar: Optional[Callable[[], None]] = None):
+        """
+        Servidor de órdenes sobre un socket Unix.
+
+        Las ejecuciones se serializan: si llega una orden mientras otra corre, espera su
+        turno (dos corridas simultáneas registrarían dos veces el mismo tipo de cambio).
+
+        :param ruta_socket: Ruta del socket Unix.
+        :param ejecutar: Función (orden) -> resumen serializable en JSON de la ejecución.
+        :param recargar: Función opcional que vuelve a cargar la configuración.
+        """
+        self.ruta_socket = ruta_socket
+        self.ejecutar = ejecutar
+        self.recargar = recargar
+        self.inicio = time.time()
+        self.ejecuciones = 0
+        self._lock_ejecucion = threading.Lock()
+        self._servidor = None
+
+    def atender(self, orden: Dict[str, Any]) -> Dict[str, Any]:
+        """Procesa una orden y retorna la respuesta para el cliente."""
+        comando = orden.get("comando", "ejecutar")
+        if comando == "estado":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "activo_desde": self.inicio,
+                "ejecuciones": self.ejecuciones,
+                "ocupado": self._lock_ejecucion.locked(),
+            }
+        if comando == "ejecutar":
+            with self._lock_ejecucion:
+                self.ejecuciones += 1
+                try:
+                    return {"ok": True, **self.ejecutar(orden)}
+                except Exception as e:
+                    logger.error(f"Error en la ejecución solicitada: {e}")
+                    return {"ok": False, "error": str(e)}
+        if comando == "recargar":
+            if self.recargar is None:
+                return {"ok": False, "error": "Recarga no soportada"}
+            with self._lock_ejecucion:
+                self.recargar()
+            return {"ok": True}
+        if comando == "detener":
+            threading.Thread(target=self.detener, daemon=True).start()
+            return {"ok": True}
+        return {"ok": False, "error": f"Comando desconocido: {comando}"}
+
+    def _preparar_socket(self):
+        directorio = os.path.dirname(self.ruta_socket)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        if not os.path.exists(self.ruta_socket):
+            return
+        # Un socket que no acepta conexiones quedó de un proceso anterior
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sonda:
+            try:
+                sonda.connect(self.ruta_socket)
+            except OSError:
+                os.unlink(self.ruta_socket)
+                return
+        raise RuntimeError(f"Ya hay un worker escuchando en {self.ruta_socket}")
+
+    def iniciar(self):
+        """Crea el socket (solo accesible por el usuario) y atiende órdenes hasta detener()."""
+        self._preparar_socket()
+        mascara = os.umask(0o177)
+        try:
+            self._servidor = _ServidorUnix(self.ruta_socket, _ManejadorOrden)
+        finally:
+            os.umask(mascara)
+        self._servidor.trabajador = self
+        logger.info(f"Worker residente escuchando en {self.ruta_socket} (PID {os.getpid()})")
+        try:
+            self._servidor.serve_forever()
+        finally:
+            self._servidor.server_close()
+            if os.path.exists(self.ruta_socket):
+                os.unlink(self.ruta_socket)
+            logger.info("Worker residente detenido")
+
+    def detener(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+
+
+def enviar_orden(ruta_socket: str, orden: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Envía una orden al worker residente y espera su respuesta.
+
+    :param ruta_socket: Ruta del socket Unix del worker.
+    :param orden: Orden a enviar (ej. {"comando": "ejecutar", "sin_cache": True}).
+    :param timeout: Tiempo máximo de espera en segundos (None = sin límite).
+    :return: Respuesta del worker.
+    :raises OSError: Si el worker no está escuchando o no responde a tiempo.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as cliente:
+        cliente.settimeout(timeout)
+        cliente.connect(ruta_socket)
+        cliente.sendall(json.dumps(orden).encode("utf-8") + b"\n")
+        with cliente.makefile("rb") as lector:
+            linea = lector.readline()
+    if not linea:
+        raise ConnectionError("El worker cerró la conexión sin responder")
+    return json.loads(linea)
@@ -1,8 +0,0 @@
-## VARIABLES GLOBALES
-
-system_exception = ""
-business_exception = ""
-tipo_cambio_bloomberg = 0.0
-tipo_cambio_local = 0.0
-tipo_cambio_compra = 0.0
-tipo_cambio_venta = 0.0